@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ActivitiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'activities'
+
+    def ready(self):
+        # RECHECK WHETHER THE OVERLAP CONSTRAINT EXISTS ONCE MIGRATIONS HAVE RUN
+        from activities.locking import forget_overlap_constraint
+
+        post_migrate.connect(forget_overlap_constraint, sender=self)
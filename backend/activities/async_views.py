@@ -0,0 +1,13 @@
+from activities.views import ActivityViewSet
+from utils.async_views import async_read
+
+
+@async_read
+async def activity_list(request):
+    """
+    Async version of the activity listing, with the same filters and cursor pagination
+    """
+    view = ActivityViewSet(request=request, args=(), kwargs={}, format_kwarg=None, action="list")
+    paginator = view.paginator
+    page = await paginator.apaginate_queryset(view.get_queryset(), request, view=view)
+    return paginator.get_paginated_response(view.get_serializer(page, many=True).data)
@@ -0,0 +1,58 @@
+import csv
+import json
+from itertools import islice
+
+# COLUMNS WRITTEN BY EXPORTS, IN ORDER
+EXPORT_FIELDS = ["id", "start_time", "end_time", "category_id", "category", "energy_level", "mood", "notes"]
+
+# ROWS FETCHED PER DATABASE ROUND TRIP AND JOINED INTO ONE RESPONSE CHUNK
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object whose write returns the value, lets csv.writer produce strings
+    """
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """
+    Stream activity tuples in EXPORT_FIELDS order, without building model instances
+    """
+    return queryset.values_list(
+        "id", "start_time", "end_time", "category_id", "category__name", "energy_level", "mood", "notes"
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            [row[0], row[1].isoformat(), row[2].isoformat(), *row[3:]]
+        )
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["start_time"] = record["start_time"].isoformat()
+        record["end_time"] = record["end_time"].isoformat()
+        yield json.dumps(record) + "\n"
+
+
+def chunked(lines, size=EXPORT_CHUNK_SIZE):
+    """
+    Join lines into larger chunks, one response write per chunk instead of per row
+    """
+    lines = iter(lines)
+    while chunk := "".join(islice(lines, size)):
+        yield chunk
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_lines, "text/csv", "activities.csv"),
+    "ndjson": (ndjson_lines, "application/x-ndjson", "activities.ndjson"),
+}
@@ -0,0 +1,278 @@
+import csv
+from datetime import datetime, time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from activities.locking import author_timeline_lock
+from activities.models import Activity
+from activities.overlaps import sweep_conflicts
+from activities.signals import activities_bulk_changed
+from categories.models import Category
+
+# ROWS VALIDATED, OVERLAP-CHECKED AND INSERTED TOGETHER
+IMPORT_BATCH_SIZE = 1000
+
+# PER-ROW ERRORS KEPT IN THE REPORT, THE REST ARE ONLY COUNTED
+MAX_REPORTED_ERRORS = 100
+
+# COLOR OF CATEGORIES CREATED FOR UNKNOWN NAMES
+IMPORTED_CATEGORY_COLOR = "#9ca3af"
+
+DEFAULT_ENERGY_LEVEL = 5
+DEFAULT_MOOD = "neutral"
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def parse_csv(stream):
+    """
+    Yield (line number, record) from a CSV with a header row.
+    Columns: start_time, end_time, category, and optionally energy_level, mood, notes
+    (the activity export format is accepted as is).
+    """
+    reader = csv.DictReader(stream)
+    missing = {"start_time", "end_time", "category"} - set(reader.fieldnames or [])
+    if missing:
+        raise ImportRowError(f"Missing CSV columns: {', '.join(sorted(missing))}.")
+
+    for record in reader:
+        yield reader.line_num, record
+
+
+def parse_ics(stream):
+    """
+    Yield (line number, record) for every VEVENT of an iCalendar stream.
+    The category is taken from CATEGORIES, falling back to SUMMARY; DESCRIPTION becomes notes.
+    """
+    event = None
+    for line_no, name, params, value in _ics_properties(stream):
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {"line": line_no}
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            yield event["line"], {
+                "start_time": event.get("DTSTART"),
+                "end_time": event.get("DTEND"),
+                "category": event.get("CATEGORIES") or event.get("SUMMARY"),
+                "notes": event.get("DESCRIPTION", ""),
+            }
+            event = None
+        elif event is not None:
+            if name in ("DTSTART", "DTEND"):
+                event[name] = (value, params)
+            elif name == "CATEGORIES":
+                event[name] = _ics_unescape(value).split(",")[0].strip()
+            elif name in ("SUMMARY", "DESCRIPTION"):
+                event[name] = _ics_unescape(value)
+
+
+def _ics_properties(stream):
+    """
+    Yield (line number, name, params, value) for each unfolded content line
+    """
+    pending, pending_no = None, 0
+    for line_no, raw in enumerate(stream, start=1):
+        line = raw.rstrip("\r\n")
+        # FOLDED LINES CONTINUE THE PREVIOUS ONE
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield (pending_no, *_ics_split(pending))
+        pending, pending_no = line, line_no
+    if pending:
+        yield (pending_no, *_ics_split(pending))
+
+
+def _ics_split(line):
+    head, _, value = line.partition(":")
+    name, *raw_params = head.split(";")
+    params = dict(param.partition("=")[::2] for param in raw_params)
+    return name.upper(), {key.upper(): val for key, val in params.items()}, value
+
+
+def _ics_unescape(value):
+    return (
+        value.replace("\\n", "\n").replace("\\N", "\n")
+        .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+    )
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ics": parse_ics,
+}
+
+
+class ActivityImporter:
+    """
+    Import activity records for one user in bounded batches.
+
+    Categories are resolved by name through a cache loaded once; unknown names become new
+    categories of the user unless CREATE_CATEGORIES is off, created once a row using them is
+    inserted. The whole file is parsed and validated before anything is written, so a file
+    failing midway (bad encoding, broken CSV) leaves nothing behind and parsing does not hold
+    up other writers. Each batch is then overlap-checked with one range query and an in-memory
+    sweep and inserted with bulk_create, all batches in one transaction.
+    """
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE, create_categories=True, default_tz="UTC", progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.default_tz = ZoneInfo(default_tz)
+        self.progress = progress
+        self.mood_values = {value for value, _ in Activity.MOOD_CHOICES}
+        self.mood_labels = {label.lower(): value for value, label in Activity.MOOD_CHOICES}
+
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+        # USER'S OWN CATEGORIES TAKE PRECEDENCE OVER DEFAULTS WITH THE SAME NAME
+        self.categories = {}
+        for category in Category.objects.filter(Q(user=user) | Q(is_default=True)).order_by("-is_default"):
+            self.categories[category.name.strip().lower()] = category
+
+    def run(self, records):
+        """
+        Import (line number, record) pairs and return a summary report
+        """
+        batches, batch = [], {}
+        for line_no, record in records:
+            try:
+                batch[line_no] = self.build(record)
+            except ImportRowError as exc:
+                self.fail(line_no, str(exc))
+
+            if len(batch) >= self.batch_size:
+                batches.append(batch)
+                batch = {}
+        batches.append(batch)
+
+        # ONLY THE OVERLAP CHECKS AND INSERTS RUN UNDER THE LOCK, IN ONE TRANSACTION
+        with author_timeline_lock(self.user.id):
+            for batch in batches:
+                self.flush(batch)
+        return self.report()
+
+    def build(self, record):
+        """
+        Validate one record into an unsaved Activity
+        """
+        start = self.parse_time(record.get("start_time"), "start_time")
+        end = self.parse_time(record.get("end_time"), "end_time")
+        if end <= start:
+            raise ImportRowError("End time must be after start time.")
+
+        energy = record.get("energy_level") or DEFAULT_ENERGY_LEVEL
+        try:
+            energy = int(energy)
+        except (TypeError, ValueError):
+            raise ImportRowError(f"Invalid energy level: {energy}.")
+        if not 0 <= energy <= 10:
+            raise ImportRowError("Energy level must be between 0 and 10.")
+
+        mood = (record.get("mood") or DEFAULT_MOOD).strip().lower()
+        mood = self.mood_labels.get(mood, mood)
+        if mood not in self.mood_values:
+            raise ImportRowError(f"Unknown mood: {mood}.")
+
+        notes = record.get("notes") or ""
+        if len(notes) > 2000:
+            raise ImportRowError("Notes are longer than 2000 characters.")
+
+        # ASSIGN KEYS RATHER THAN INSTANCES, CHEAPER FOR MANY THOUSANDS OF ROWS
+        activity = Activity(
+            author_id=self.user.id, start_time=start, end_time=end, energy_level=energy, mood=mood, notes=notes,
+        )
+        category = self.resolve_category(record.get("category"))
+        if category.pk is None:
+            # NOT CREATED YET, THE ROW MAY STILL BE REJECTED
+            activity.category = category
+        else:
+            activity.category_id = category.pk
+        return activity
+
+    def parse_time(self, value, field):
+        """
+        Parse an ISO 8601 string, or an iCalendar (value, params) pair, into an aware datetime
+        """
+        if not value:
+            raise ImportRowError(f"Missing {field}.")
+
+        try:
+            if isinstance(value, tuple):
+                value, params = value
+                tz = ZoneInfo(params["TZID"]) if "TZID" in params else self.default_tz
+                if value.endswith("Z"):
+                    return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=ZoneInfo("UTC"))
+                if params.get("VALUE") == "DATE" or len(value) == 8:
+                    return datetime.combine(datetime.strptime(value, "%Y%m%d").date(), time.min, tz)
+                return datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=tz)
+
+            parsed = parse_datetime(value.strip())
+        except (ValueError, ZoneInfoNotFoundError):
+            parsed = None
+
+        if parsed is None:
+            raise ImportRowError(f"Invalid {field}: {value}.")
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=self.default_tz)
+
+    def resolve_category(self, name):
+        if not name or not name.strip():
+            raise ImportRowError("Missing category.")
+
+        key = name.strip().lower()
+        if key not in self.categories:
+            if not self.create_categories:
+                raise ImportRowError(f"Unknown category: {name}.")
+            self.categories[key] = Category(name=name.strip()[:100], color=IMPORTED_CATEGORY_COLOR, user=self.user)
+        return self.categories[key]
+
+    def flush(self, batch):
+        """
+        Reject rows overlapping each other or stored activities, insert the rest.
+        Runs under the author's timeline lock.
+        """
+        if not batch:
+            return
+
+        intervals = [(activity.start_time, activity.end_time, line_no) for line_no, activity in batch.items()]
+        existing = (
+            Activity.objects.overlapping(
+                self.user.id, min(start for start, _, _ in intervals), max(end for _, end, _ in intervals)
+            )
+            .order_by("start_time")
+            .values_list("start_time", "end_time")
+        )
+        for line_no in sweep_conflicts(intervals, existing):
+            del batch[line_no]
+            self.fail(line_no, "Activity times overlap with an existing activity.")
+
+        # CREATE THE NEW CATEGORIES OF THE ROWS LEFT, BULK_CREATE THEN PICKS UP THEIR KEYS
+        for activity in batch.values():
+            if activity.category_id is None and activity.category.pk is None:
+                activity.category.save()
+
+        Activity.objects.bulk_create(batch.values())
+        activities_bulk_changed.send(
+            sender=Activity,
+            author_id=self.user.id,
+            added=[(activity.category_id, activity.start_time, activity.end_time) for activity in batch.values()],
+        )
+
+        self.imported += len(batch)
+        if self.progress:
+            self.progress(self.imported, self.failed)
+
+    def fail(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def report(self):
+        return {"imported": self.imported, "failed": self.failed, "errors": sorted(self.errors, key=lambda e: e["line"])}
@@ -0,0 +1,65 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+# NAME OF THE POSTGRESQL EXCLUSION CONSTRAINT (SEE MIGRATION 0002)
+OVERLAP_CONSTRAINT = "activity_no_overlap"
+
+# WHETHER THE CONSTRAINT EXISTS, PER DATABASE NAME
+_constraint_exists = {}
+
+# BACKENDS WITHOUT ROW LOCKS (SQLITE) SERIALIZE TIMELINE WRITES IN-PROCESS
+_timeline_lock = threading.RLock()
+
+
+@contextmanager
+def author_timeline_lock(author_id):
+    """
+    Open a transaction in which no other writer can change the author's activities.
+    Overlap checks and writes done inside it cannot race with a concurrent save.
+    """
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            # LOCK THE AUTHOR ROW, CONCURRENT WRITERS FOR THE SAME AUTHOR QUEUE BEHIND IT
+            list(User.objects.select_for_update().filter(pk=author_id).values_list("pk", flat=True))
+            yield
+    else:
+        # SQLITE ALLOWS A SINGLE WRITER, HOLD THE LOCK UNTIL THE TRANSACTION IS COMMITTED
+        with _timeline_lock, transaction.atomic():
+            yield
+
+
+def overlap_constraint_exists(using=None):
+    """
+    Whether the database enforces the exclusion constraint, so an author's activities
+    can be relied on to never overlap
+    """
+    database = connections[using or DEFAULT_DB_ALIAS]
+    if database.vendor != "postgresql":
+        return False
+    name = database.settings_dict["NAME"]
+    if name not in _constraint_exists:
+        with database.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = %s AND conrelid = 'activities_activity'::regclass)",
+                [OVERLAP_CONSTRAINT],
+            )
+            _constraint_exists[name] = cursor.fetchone()[0]
+    return _constraint_exists[name]
+
+
+def forget_overlap_constraint(**kwargs):
+    # MIGRATIONS MAY HAVE ADDED OR DROPPED THE CONSTRAINT
+    _constraint_exists.clear()
+
+
+def defer_overlap_constraint():
+    """
+    Check the exclusion constraint at commit instead of per row, for the current transaction.
+    Does nothing where the constraint does not exist.
+    """
+    if overlap_constraint_exists():
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET CONSTRAINTS {OVERLAP_CONSTRAINT} DEFERRED")
@@ -0,0 +1,74 @@
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from activities.models import Activity
+from activities.serializers import ActivitySerializer
+from categories.models import Category
+
+SLOT = timedelta(minutes=30)
+INSERT_CHUNK = 10_000
+
+
+class Command(BaseCommand):
+    help = "Measure activity write latency (overlap check + insert) as a user's history grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                            help="Comma-separated history sizes to benchmark")
+        parser.add_argument("--samples", type=int, default=200,
+                            help="Number of timed writes per history size")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+
+        self.stdout.write(f"{'history':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for size in sizes:
+            timings = self.run_size(size, options["samples"])
+            p50 = statistics.median(timings)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            self.stdout.write(f"{size:>10} {p50:>8.2f} {p95:>8.2f} {max(timings):>8.2f}")
+
+    def run_size(self, size, samples):
+        """
+        Seed SIZE back-to-back activities for a throwaway user, then time SAMPLES serializer writes.
+        Everything is rolled back afterwards.
+        """
+        timings = []
+        with transaction.atomic():
+            user = User.objects.create_user(username=f"bench-writes-{size}-{time.time_ns()}")
+            category = Category.objects.create(name="Bench", color="#000000", user=user)
+
+            # SEED HISTORY THAT ENDS AT ORIGIN
+            origin = datetime(2025, 1, 1, tzinfo=timezone.utc)
+            first = origin - SLOT * size
+            for offset in range(0, size, INSERT_CHUNK):
+                Activity.objects.bulk_create(
+                    Activity(
+                        author=user, category=category, energy_level=5, mood="neutral",
+                        start_time=first + SLOT * i, end_time=first + SLOT * (i + 1),
+                    )
+                    for i in range(offset, min(offset + INSERT_CHUNK, size))
+                )
+
+            # TIME WRITES APPENDED AFTER THE HISTORY, LIKE A USER LOGGING NEW ACTIVITIES
+            for i in range(samples):
+                serializer = ActivitySerializer(data={
+                    "category_id": category.id,
+                    "start_time": origin + SLOT * i,
+                    "end_time": origin + SLOT * (i + 1),
+                    "energy_level": 5,
+                    "mood": "neutral",
+                })
+                serializer.is_valid(raise_exception=True)
+
+                started = time.perf_counter()
+                serializer.save(author=user)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            transaction.set_rollback(True)
+        return timings
@@ -0,0 +1,60 @@
+import csv
+import time
+from zoneinfo import ZoneInfoNotFoundError
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.imports import IMPORT_BATCH_SIZE, PARSERS, ActivityImporter, ImportRowError
+
+
+class Command(BaseCommand):
+    help = "Import a user's activities from a CSV or iCalendar file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="User the activities belong to")
+        parser.add_argument("path", help="CSV or .ics file to import")
+        parser.add_argument("--type", choices=list(PARSERS), help="File format, defaults to the file extension")
+        parser.add_argument("--tz", default="UTC", help="Timezone of times without an explicit offset")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--no-create-categories", action="store_true",
+                            help="Reject rows whose category does not exist instead of creating it")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+
+        import_type = options["type"] or options["path"].rsplit(".", 1)[-1].lower()
+        if import_type not in PARSERS:
+            raise CommandError(f"Unknown file type {import_type}, use --type.")
+
+        started = time.perf_counter()
+
+        def progress(imported, failed):
+            self.stdout.write(f"imported {imported} rows, {failed} failed ({time.perf_counter() - started:.1f}s)")
+
+        try:
+            importer = ActivityImporter(
+                user,
+                batch_size=options["batch_size"],
+                create_categories=not options["no_create_categories"],
+                default_tz=options["tz"],
+                progress=progress,
+            )
+        except (ZoneInfoNotFoundError, ValueError):
+            raise CommandError(f"Unknown timezone {options['tz']}.")
+
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                report = importer.run(PARSERS[import_type](stream))
+        except (ImportRowError, UnicodeDecodeError, csv.Error) as exc:
+            raise CommandError(f"Nothing was imported: {exc}")
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['imported']} activities, {report['failed']} failed "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,101 @@
+import time
+from datetime import date, timedelta
+from random import Random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from activities.imports import IMPORT_BATCH_SIZE
+from activities.models import Activity
+from activities.signals import activities_bulk_changed
+from activities.synthetic import CUSTOM_CATEGORIES, DEFAULT_CATEGORIES, TIMEZONES, synthetic_history
+from categories.models import Category
+
+# AVERAGE ACTIVITIES OF A SYNTHETIC DAY, TO START HISTORIES SO THEY END AROUND TODAY
+ACTIVITIES_PER_DAY = 12
+
+
+class Command(BaseCommand):
+    help = "Create users with realistic, non-overlapping activity histories for benchmarks and demos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="Users to create")
+        parser.add_argument("--activities", type=int, default=2000, help="Activities per user")
+        parser.add_argument("--custom-categories", type=int, default=3, help="Own categories per user")
+        parser.add_argument("--prefix", default="synthetic", help="Usernames are PREFIX-00001, PREFIX-00002, ...")
+        parser.add_argument("--password", default="synthetic", help="Password of every created user")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed creates the same data")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        usernames = [f"{options['prefix']}-{index:05d}" for index in range(1, options["users"] + 1)]
+        existing = User.objects.filter(username__in=usernames).count()
+        if existing:
+            raise CommandError(f"{existing} of the users already exist, use another --prefix.")
+        if options["custom_categories"] > len(CUSTOM_CATEGORIES):
+            raise CommandError(f"At most {len(CUSTOM_CATEGORIES)} custom categories per user.")
+
+        started = time.perf_counter()
+        defaults = self.default_categories()
+        # ONE HASH FOR EVERYONE, HASHING IS SLOWER THAN WRITING A USER'S WHOLE HISTORY
+        password = make_password(options["password"])
+        first_day = date.today() - timedelta(days=options["activities"] // ACTIVITIES_PER_DAY + 1)
+
+        rng = Random(options["seed"])
+        total = 0
+        for username in usernames:
+            tz = rng.choice(TIMEZONES)
+            total += self.seed_user(rng, username, password, defaults, tz, first_day, options)
+            self.stdout.write(f"{username} ({tz}): {total} activities ({time.perf_counter() - started:.1f}s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(usernames)} users and {total} activities in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def default_categories(self):
+        """
+        The default categories synthetic days are built from by name, created when missing
+        """
+        categories = {
+            category.name: category
+            for category in Category.objects.filter(is_default=True, name__in=DEFAULT_CATEGORIES)
+        }
+        for name, color in DEFAULT_CATEGORIES.items():
+            if name not in categories:
+                categories[name] = Category.objects.create(name=name, color=color, is_default=True)
+        return categories
+
+    def seed_user(self, rng, username, password, defaults, tz, first_day, options):
+        """
+        Create a user with their own categories and history, returning the number of activities
+        """
+        with transaction.atomic():
+            user = User.objects.create(username=username, email=f"{username}@example.com", password=password)
+            hobbies = rng.sample(CUSTOM_CATEGORIES, options["custom_categories"])
+            own = Category.objects.bulk_create(
+                Category(name=name, color=f"#{rng.randrange(0x1000000):06x}", user=user) for name in hobbies
+            )
+            categories = {**defaults, **{category.name: category for category in own}}
+
+            history = synthetic_history(rng, user, categories, hobbies, tz, first_day, options["activities"])
+            batch = []
+            for activity in history:
+                batch.append(activity)
+                if len(batch) == options["batch_size"]:
+                    self.flush(user, batch)
+                    batch = []
+            self.flush(user, batch)
+        return options["activities"]
+
+    def flush(self, user, batch):
+        # LIKE IMPORTS, BULK WRITES UPDATE THE ROLLUPS AND INVALIDATE CACHED REPORTS THROUGH THE SIGNAL
+        if not batch:
+            return
+        Activity.objects.bulk_create(batch)
+        activities_bulk_changed.send(
+            sender=Activity,
+            author_id=user.id,
+            added=[(activity.category_id, activity.start_time, activity.end_time) for activity in batch],
+        )
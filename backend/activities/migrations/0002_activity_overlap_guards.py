@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import DatabaseError, migrations, models, transaction
+
+# OVERLAPPING ACTIVITIES LISTED WHEN EXISTING DATA BREAKS THE CONSTRAINT
+REPORTED_OVERLAPS = 10
+
+
+def find_overlaps(cursor):
+    """
+    (author id, activity id, total) of up to REPORTED_OVERLAPS activities starting before an
+    earlier activity of their author has ended, total being the number of all such activities
+    """
+    cursor.execute(
+        "SELECT author_id, id, COUNT(*) OVER () FROM ("
+        "  SELECT author_id, id, start_time, MAX(end_time) OVER ("
+        "    PARTITION BY author_id ORDER BY start_time, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING"
+        "  ) AS earlier_end FROM activities_activity"
+        ") activities WHERE start_time < earlier_end ORDER BY author_id, start_time LIMIT %s",
+        [REPORTED_OVERLAPS],
+    )
+    return cursor.fetchall()
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    """
+    Reject overlapping activities of the same author at the database level (PostgreSQL only)
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        overlaps = find_overlaps(cursor)
+    if overlaps:
+        listed = ", ".join(f"activity {activity_id} of user {author_id}" for author_id, activity_id, _ in overlaps)
+        raise RuntimeError(
+            f"{overlaps[0][2]} activities overlap an earlier activity of their author ({listed}). "
+            "Fix or remove them before migrating, the overlap constraint cannot be added otherwise."
+        )
+
+    try:
+        # SAVEPOINT, SO A FAILURE IS REPORTED INSTEAD OF ABORTING THE MIGRATION'S TRANSACTION
+        with transaction.atomic(using=connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    except DatabaseError as exc:
+        raise RuntimeError(
+            "The overlap constraint needs the btree_gist PostgreSQL extension, which could not be "
+            f"enabled ({exc}). Install it (postgresql-contrib) or have a superuser run "
+            "CREATE EXTENSION btree_gist in this database, then migrate again."
+        ) from exc
+
+    schema_editor.execute(
+        "ALTER TABLE activities_activity ADD CONSTRAINT activity_no_overlap "
+        "EXCLUDE USING gist (author_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&) "
+        # DEFERRABLE SO BULK WRITES CAN MOVE ACTIVITIES INTO SLOTS FREED BY THE SAME STATEMENT
+        "DEFERRABLE INITIALLY IMMEDIATE"
+    )
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("ALTER TABLE activities_activity DROP CONSTRAINT IF EXISTS activity_no_overlap")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['author', 'start_time', 'end_time'], name='activity_author_time_idx'),
+        ),
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
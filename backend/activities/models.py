@@ -1,9 +1,35 @@
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models import Subquery, Value
+from django.db.models.functions import Coalesce
 
+from activities.locking import overlap_constraint_exists
 from categories.models import Category
 from django.contrib.auth.models import User
 
+
+class ActivityQuerySet(models.QuerySet):
+    def overlapping(self, author_id, start, end):
+        """
+        Activities of an author intersecting the half-open range [start, end).
+
+        Where the database rejects overlapping activities of an author, besides those starting
+        inside the range only the latest one starting before it can reach into it. Starting the
+        scan at that activity keeps it a bounded seek on (author, start_time) instead of a walk
+        over the author's whole history. Without the constraint an earlier, longer activity
+        could still reach into the range, so the plain predicate is used.
+        """
+        own = self.filter(author_id=author_id)
+        if not overlap_constraint_exists(self.db):
+            return own.filter(start_time__lt=end, end_time__gt=start)
+        previous = own.filter(start_time__lt=start).order_by("-start_time").values("start_time")[:1]
+        return own.filter(
+            start_time__gte=Coalesce(Subquery(previous), Value(start)),
+            start_time__lt=end,
+            end_time__gt=start,
+        )
+
+
 class Activity(models.Model):
     MOOD_CHOICES = [
         # Positive moods
@@ -40,5 +66,13 @@ class Activity(models.Model):
     energy_level = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(10)])
     mood = models.CharField(max_length=20, choices=MOOD_CHOICES)
 
+    objects = ActivityQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # BACKS OVERLAP CHECKS AND PER-USER RANGE SCANS
+            models.Index(fields=["author", "start_time", "end_time"], name="activity_author_time_idx"),
+        ]
+
     def __str__(self):
         return f'{self.category.name} {self.author.username}'
\ No newline at end of file
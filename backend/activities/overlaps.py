@@ -0,0 +1,32 @@
+def sweep_conflicts(batch, existing):
+    """
+    Find batch intervals that overlap each other or an existing activity, in one sweep.
+
+    batch: iterable of (start, end, key)
+    existing: (start, end) pairs of stored activities sorted by start, which never overlap
+    Returns the keys of conflicting batch intervals. Among batch intervals overlapping
+    each other, the one starting first wins.
+    """
+    conflicts = set()
+    existing = list(existing)
+    cursor = 0
+    accepted_end = None
+
+    for start, end, key in sorted(batch, key=lambda item: (item[0], item[1])):
+        # CONFLICT WITH AN EARLIER INTERVAL OF THE SAME BATCH
+        if accepted_end is not None and start < accepted_end:
+            conflicts.add(key)
+            continue
+
+        # SKIP STORED ACTIVITIES THAT END BEFORE THIS INTERVAL, THE SWEEP ONLY MOVES FORWARD
+        while cursor < len(existing) and existing[cursor][1] <= start:
+            cursor += 1
+
+        # CONFLICT WITH A STORED ACTIVITY
+        if cursor < len(existing) and existing[cursor][0] < end:
+            conflicts.add(key)
+            continue
+
+        accepted_end = end
+
+    return conflicts
@@ -0,0 +1,111 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class ActivityCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (start_time, id).
+
+    DRF's CursorPagination positions on the first ordering field only and skips ties with
+    an offset. Positions here carry both fields, so they are unique and every page is a
+    single index seek no matter how deep the client has paged.
+    """
+    ordering = ("start_time", "id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async version of paginate_queryset
+        """
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page([instance async for instance in queryset])
+
+    def page_queryset(self, queryset, request):
+        """
+        Rows of the requested page and one more, to know whether another page follows
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        self.cursor = self.decode_cursor(request)
+        reverse, current_position = self.cursor_state()
+
+        # CURSOR PAGINATION ALWAYS ENFORCES AN ORDERING
+        if reverse:
+            queryset = queryset.order_by("-start_time", "-id")
+        else:
+            queryset = queryset.order_by("start_time", "id")
+
+        # KEEP ONLY ROWS AFTER (OR BEFORE, WHEN GOING BACK) THE CURSOR POSITION
+        if current_position is not None:
+            start, pk = self.parse_position(current_position)
+            # THE PLAIN RANGE ON START_TIME LETS THE INDEX SEEK, THE OR BREAKS TIES BY ID
+            if reverse:
+                queryset = queryset.filter(Q(start_time__lt=start) | Q(id__lt=pk), start_time__lte=start)
+            else:
+                queryset = queryset.filter(Q(start_time__gt=start) | Q(id__gt=pk), start_time__gte=start)
+
+        # FETCH ONE EXTRA ROW TO KNOW WHETHER ANOTHER PAGE FOLLOWS
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        Keep the page of the RESULTS of page_queryset and the positions around it
+        """
+        reverse, current_position = self.cursor_state()
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if has_following else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = has_following
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def cursor_state(self):
+        """
+        Direction and position of the decoded cursor
+        """
+        if self.cursor is None:
+            return False, None
+        return self.cursor.reverse, self.cursor.position
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f"{instance.start_time.isoformat()}|{instance.id}"
+
+    def parse_position(self, position):
+        """
+        Split an encoded "start_time|id" position
+        """
+        try:
+            start, pk = position.rsplit("|", 1)
+            start = parse_datetime(start)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if start is None:
+            raise NotFound(self.invalid_cursor_message)
+        return start, pk
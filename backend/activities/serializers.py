@@ -1,10 +1,43 @@
+from contextlib import contextmanager
+
+from django.db import IntegrityError
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
+from activities.locking import OVERLAP_CONSTRAINT, author_timeline_lock
 from activities.models import Activity
+from categories.index import user_categories
 from categories.models import Category
 from categories.serializers import CategorySerializer
 
 
+class CategoryIdField(serializers.PrimaryKeyRelatedField):
+    """
+    Category primary key field resolved from the requesting user's category index, so only
+    their own and default categories are accepted and validation does not query categories
+    """
+    def to_internal_value(self, data):
+        request = self.context.get("request")
+        if request is None:
+            return super().to_internal_value(data)
+        # RESOLVED ONCE PER REQUEST, BULK REQUESTS VALIDATE MANY ITEMS
+        categories = getattr(request, "_user_categories", None)
+        if categories is None:
+            categories = request._user_categories = user_categories(request.user.id)
+
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        category = categories.get(pk)
+        if category is None:
+            self.fail("does_not_exist", pk_value=data)
+        return category
+
+
 class ActivitySerializer(serializers.ModelSerializer):
     # MAKE AUTHOR READ ONLY
     author = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -13,7 +46,7 @@ class ActivitySerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     
     # CATEGORY ID WILL ONLY BE WRITTEN
-    category_id = serializers.PrimaryKeyRelatedField(
+    category_id = CategoryIdField(
         queryset=Category.objects.all(), write_only=True, source="category"
     )
 
@@ -48,26 +81,57 @@ class ActivitySerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """
-        Validate whether new activity is in conflict of any existings timewise
+        Validate that the activity ends after it starts.
+        Overlaps are checked when saving, under the author's timeline lock.
         """
-        # GET USER, START AND END TIME
-        author = self.context["request"].user
-        start = data["start_time"]
-        end = data["end_time"]
-
-        # GET ALL USER'S ACTIVITY WITHIN NEW ACTIVITY'S TIME FRAME
-        overlapping_activities = Activity.objects.filter(
-            author=author, start_time__lt=end, end_time__gt=start
-        )
-
-        # IF UPDATING (SELF.INSTANCE IS TRUE), EXCLUDE ITSELF
-        if self.instance:
-            overlapping_activities = overlapping_activities.exclude(id=self.instance.id)
-
-        # IF OVERLAPPING_ACTIVITIES IS NOT EMPTY, RAISE ERROR
-        if overlapping_activities.exists():
-            raise serializers.ValidationError(
-                "Activity times overlap with an existing activity."
-            )
+        # ON PARTIAL UPDATES FALL BACK TO THE STORED TIMES
+        start = data.get("start_time", getattr(self.instance, "start_time", None))
+        end = data.get("end_time", getattr(self.instance, "end_time", None))
+
+        if start is not None and end is not None and end <= start:
+            raise serializers.ValidationError("End time must be after start time.")
 
         return data
+
+    def create(self, validated_data):
+        with self.timeline_guard(validated_data["author"].pk, validated_data):
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with self.timeline_guard(instance.author_id, validated_data):
+            return super().update(instance, validated_data)
+
+    @contextmanager
+    def timeline_guard(self, author_id, validated_data):
+        """
+        Check whether the activity is in conflict of any existings timewise,
+        then save it within the same locked transaction
+        """
+        start = validated_data.get("start_time", getattr(self.instance, "start_time", None))
+        end = validated_data.get("end_time", getattr(self.instance, "end_time", None))
+
+        try:
+            with author_timeline_lock(author_id):
+                # GET ALL USER'S ACTIVITY WITHIN NEW ACTIVITY'S TIME FRAME
+                overlapping_activities = Activity.objects.overlapping(author_id, start, end)
+
+                # IF UPDATING (SELF.INSTANCE IS TRUE), EXCLUDE ITSELF
+                if self.instance:
+                    overlapping_activities = overlapping_activities.exclude(id=self.instance.id)
+
+                # IF OVERLAPPING_ACTIVITIES IS NOT EMPTY, RAISE ERROR
+                if overlapping_activities.exists():
+                    raise overlap_error()
+
+                yield
+        except IntegrityError as exc:
+            # THE POSTGRESQL EXCLUSION CONSTRAINT CAUGHT A WRITE THE CHECK ABOVE MISSED
+            if OVERLAP_CONSTRAINT in str(exc):
+                raise overlap_error()
+            raise
+
+
+def overlap_error():
+    return serializers.ValidationError(
+        {api_settings.NON_FIELD_ERRORS_KEY: ["Activity times overlap with an existing activity."]}
+    )
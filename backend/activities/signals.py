@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# SENT AFTER BULK WRITES, WHICH BYPASS THE MODEL SAVE/DELETE SIGNALS
+# KWARGS: author_id, removed AND added, LISTS OF (category_id, start_time, end_time) INTERVALS
+activities_bulk_changed = Signal()
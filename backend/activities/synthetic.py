@@ -0,0 +1,118 @@
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from activities.models import Activity
+
+# HOME TIME ZONES OF SYNTHETIC USERS, THEIR DAYS ARE LAID OUT IN LOCAL TIME
+TIMEZONES = (
+    "UTC", "Europe/London", "Europe/Berlin", "America/New_York", "America/Los_Angeles",
+    "America/Sao_Paulo", "Asia/Kolkata", "Asia/Tokyo", "Australia/Sydney",
+)
+
+# DEFAULT CATEGORIES THE DAY IS BUILT FROM, CREATED WHEN MISSING
+DEFAULT_CATEGORIES = {
+    "Sleep": "#4b5563",
+    "Work": "#2563eb",
+    "Meals": "#f59e0b",
+    "Commute": "#6b7280",
+    "Exercise": "#16a34a",
+    "Leisure": "#db2777",
+}
+
+# NAMES OF CUSTOM CATEGORIES, EACH USER PICKS A FEW AS HOBBIES
+CUSTOM_CATEGORIES = (
+    "Reading", "Side project", "Language study", "Chores", "Family", "Music practice",
+    "Meditation", "Gaming", "Volunteering", "Errands", "Cooking", "Gardening",
+)
+
+# CATEGORY -> MOODS IT IS LOGGED WITH, MORE LIKELY FIRST
+MOODS = {
+    "Sleep": ("peaceful", "tired", "neutral", "content"),
+    "Work": ("neutral", "motivated", "stressed", "tired", "bored", "frustrated", "overwhelmed", "anxious"),
+    "Meals": ("content", "happy", "neutral", "grateful"),
+    "Commute": ("neutral", "bored", "tired", "stressed", "indifferent"),
+    "Exercise": ("motivated", "happy", "tired", "excited", "content"),
+    "Leisure": ("happy", "content", "excited", "peaceful", "lonely", "bored"),
+}
+CUSTOM_MOODS = ("content", "happy", "motivated", "peaceful", "neutral", "frustrated", "guilty", "sad", "fearful")
+
+NOTES = ("", "", "", "", "Planned ahead", "Took longer than expected", "Felt productive", "Interrupted a few times")
+
+# TYPICAL ENERGY LEVEL BY LOCAL HOUR, HIGHEST LATE MORNING AND LOWEST AT NIGHT
+ENERGY_BY_HOUR = {7: 5, 8: 6, 9: 7, 10: 8, 11: 8, 12: 7, 13: 6, 14: 5, 15: 6, 16: 6, 17: 6, 18: 6, 19: 5, 20: 4, 21: 3}
+
+# UNRECORDED MINUTES BETWEEN TWO ACTIVITIES
+GAPS = (0, 0, 0, 5, 10, 15, 30, 60)
+
+
+def category_kind(rng, local, weekday, hobbies, previous):
+    """
+    Category name and length in minutes of an activity starting at the local time LOCAL,
+    following one named PREVIOUS
+    """
+    hour = local.hour + local.minute / 60
+    # TO WORK IN THE MORNING AND BACK ONCE WORK IS DONE
+    if weekday and (7.5 <= hour < 9.5 and previous not in ("Commute", "Work") or hour >= 17 and previous == "Work"):
+        return "Commute", rng.randint(15, 55)
+    if (6 <= hour < 9 or 11.5 <= hour < 13.5 or 18.5 <= hour < 20) and previous != "Meals" and rng.random() < 0.6:
+        return "Meals", rng.randint(15, 60)
+    if weekday and 8 <= hour < 17:
+        return "Work", rng.randint(30, 180)
+    roll = rng.random()
+    if roll < 0.2:
+        return "Exercise", rng.randint(25, 100)
+    if roll < 0.55 and hobbies:
+        return rng.choice(hobbies), rng.randint(20, 150)
+    return "Leisure", rng.randint(20, 180)
+
+
+def weighted_choice(rng, choices):
+    # EARLIER CHOICES ARE MORE LIKELY
+    return choices[min(int(rng.expovariate(0.6)), len(choices) - 1)]
+
+
+def energy_level(rng, local, name):
+    level = ENERGY_BY_HOUR.get(local.hour, 2) + (1 if name == "Exercise" else 0) + rng.randint(-2, 2)
+    return max(0, min(10, level))
+
+
+def synthetic_history(rng, author, categories, hobbies, tz, first_day, count):
+    """
+    Yield COUNT back-to-back activities of AUTHOR from FIRST_DAY on, following a daily rhythm
+    in the time zone TZ: sleep, commutes and work on weekdays, meals, exercise, leisure and the
+    HOBBIES among CATEGORIES (name -> category), with unrecorded gaps between some of them.
+    Times are computed in UTC, so activities never overlap, even across DST changes.
+    """
+    zone = ZoneInfo(tz)
+    produced = 0
+    day = first_day
+
+    def local_utc(on, hour, minutes):
+        at = datetime.combine(on, time(hour), tzinfo=zone) + timedelta(minutes=minutes)
+        return at.astimezone(timezone.utc)
+
+    def activity(name, start, end):
+        local = start.astimezone(zone)
+        moods = MOODS.get(name, CUSTOM_MOODS)
+        return Activity(
+            author=author, category=categories[name], start_time=start, end_time=end,
+            mood=weighted_choice(rng, moods), energy_level=energy_level(rng, local, name), notes=rng.choice(NOTES),
+        )
+
+    wake = local_utc(day, 6, rng.randint(0, 150))
+    while produced < count:
+        weekday = day.weekday() < 5
+        bedtime = local_utc(day, 22, rng.randint(0, 150))
+        cursor, name = wake, "Sleep"
+        while cursor < bedtime and produced < count:
+            name, minutes = category_kind(rng, cursor.astimezone(zone), weekday, hobbies, name)
+            end = min(cursor + timedelta(minutes=minutes), bedtime)
+            yield activity(name, cursor, end)
+            produced += 1
+            cursor = end + timedelta(minutes=rng.choice(GAPS))
+
+        day += timedelta(days=1)
+        wake = local_utc(day, 6, rng.randint(0, 150))
+        if produced < count and cursor < wake:
+            yield activity("Sleep", max(cursor, bedtime), wake)
+            produced += 1
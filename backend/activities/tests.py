@@ -1,3 +1,598 @@
-from django.test import TestCase
+# These tests exercise the Activity API endpoints and the overlap rules behind them.
 
-# Create your tests here.
+import csv
+import io
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from activities.async_views import activity_list
+from activities.imports import IMPORT_BATCH_SIZE, ActivityImporter
+from activities.locking import _timeline_lock
+from activities.models import Activity
+from backend.asgi import ASGI_URLCONF
+from categories.index import category_versions
+from categories.models import Category
+from reports.models import HourlyRollup
+
+DAY = datetime(2025, 6, 2, tzinfo=timezone.utc)
+
+
+def make_activity(user, category, start, end, **extra):
+    return Activity.objects.create(
+        author=user, category=category, start_time=start, end_time=end,
+        energy_level=extra.pop("energy_level", 5), mood=extra.pop("mood", "neutral"), **extra
+    )
+
+
+class ActivityOverlapTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Work", color="#123456", user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def payload(self, start, end):
+        return {
+            "category_id": self.category.id,
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+            "energy_level": 5,
+            "mood": "happy",
+        }
+
+    def test_create_activity(self):
+        response = self.client.post("/api/activities/", self.payload(DAY, DAY + timedelta(hours=1)))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["author"], self.user.id)
+
+    def test_overlapping_activity_rejected(self):
+        # Test case: an activity starting inside an existing one is rejected
+        make_activity(self.user, self.category, DAY, DAY + timedelta(hours=2))
+
+        response = self.client.post(
+            "/api/activities/", self.payload(DAY + timedelta(hours=1), DAY + timedelta(hours=3))
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("non_field_errors", response.data)
+
+    def test_activity_covering_earlier_ones_rejected(self):
+        # Test case: overlap is found even when the existing activity started long before
+        make_activity(self.user, self.category, DAY - timedelta(days=1), DAY + timedelta(hours=1))
+        make_activity(self.user, self.category, DAY - timedelta(days=3), DAY - timedelta(days=2))
+
+        response = self.client.post("/api/activities/", self.payload(DAY, DAY + timedelta(hours=2)))
+        self.assertEqual(response.status_code, 400)
+
+    def test_adjacent_activities_allowed(self):
+        make_activity(self.user, self.category, DAY, DAY + timedelta(hours=1))
+
+        response = self.client.post(
+            "/api/activities/", self.payload(DAY + timedelta(hours=1), DAY + timedelta(hours=2))
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_update_does_not_conflict_with_itself(self):
+        activity = make_activity(self.user, self.category, DAY, DAY + timedelta(hours=1))
+
+        response = self.client.put(
+            f"/api/activities/{activity.id}/", self.payload(DAY, DAY + timedelta(hours=2))
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_end_before_start_rejected(self):
+        response = self.client.post("/api/activities/", self.payload(DAY, DAY - timedelta(hours=1)))
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_activities_do_not_conflict(self):
+        other = User.objects.create_user(username="other", password="testpass")
+        make_activity(other, self.category, DAY, DAY + timedelta(hours=1))
+
+        response = self.client.post("/api/activities/", self.payload(DAY, DAY + timedelta(hours=1)))
+        self.assertEqual(response.status_code, 201)
+
+
+class ActivityBulkTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Work", color="#123456", user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def item(self, start_hour, end_hour, **extra):
+        return {
+            "category_id": self.category.id,
+            "start_time": (DAY + timedelta(hours=start_hour)).isoformat(),
+            "end_time": (DAY + timedelta(hours=end_hour)).isoformat(),
+            "energy_level": 5,
+            "mood": "happy",
+            **extra,
+        }
+
+    def test_bulk_create(self):
+        items = [self.item(hour, hour + 1) for hour in range(0, 20, 2)]
+
+        response = self.client.post("/api/activities/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 10)
+        self.assertEqual(Activity.objects.filter(author=self.user).count(), 10)
+        self.assertTrue(all(result["data"]["id"] for result in response.data["results"]))
+
+    def test_bulk_rejects_overlaps_per_item(self):
+        # Test case: overlaps inside the batch and with stored activities fail only those items
+        make_activity(self.user, self.category, DAY + timedelta(hours=10), DAY + timedelta(hours=12))
+        items = [
+            self.item(0, 2),
+            self.item(1, 3),    # overlaps the first item
+            self.item(11, 13),  # overlaps the stored activity
+            self.item(12, 14),
+        ]
+
+        response = self.client.post("/api/activities/bulk/", items, format="json")
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["created", "error", "error", "created"])
+        self.assertEqual(Activity.objects.filter(author=self.user).count(), 3)
+
+    def test_bulk_update_moves_activities(self):
+        # Test case: an update may move into a slot freed by another update in the same batch
+        first = make_activity(self.user, self.category, DAY, DAY + timedelta(hours=1))
+        second = make_activity(self.user, self.category, DAY + timedelta(hours=1), DAY + timedelta(hours=2))
+        items = [
+            {"id": second.id, "start_time": (DAY + timedelta(hours=3)).isoformat(),
+             "end_time": (DAY + timedelta(hours=4)).isoformat()},
+            {"id": first.id, "end_time": (DAY + timedelta(hours=2)).isoformat(), "notes": "longer"},
+        ]
+
+        response = self.client.post("/api/activities/bulk/", items, format="json")
+        self.assertEqual(response.data["updated"], 2)
+        first.refresh_from_db()
+        self.assertEqual(first.end_time, DAY + timedelta(hours=2))
+        self.assertEqual(first.notes, "longer")
+
+    def test_bulk_cannot_update_other_users_activities(self):
+        other = User.objects.create_user(username="other", password="testpass")
+        activity = make_activity(other, self.category, DAY, DAY + timedelta(hours=1))
+
+        response = self.client.post("/api/activities/bulk/", [{"id": activity.id, "notes": "x"}], format="json")
+        self.assertEqual(response.data["results"][0]["status"], "error")
+
+    def test_bulk_rejects_ids_that_are_not_integers(self):
+        activity = make_activity(self.user, self.category, DAY, DAY + timedelta(hours=1))
+        items = [{"id": [activity.id], "notes": "x"}, {"id": {}, "notes": "x"}, {"id": True, "notes": "x"},
+                 {"id": 1.5, "notes": "x"}]
+
+        response = self.client.post("/api/activities/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["errors"] for result in response.data["results"]], [{"id": "A valid integer is required."}] * 4
+        )
+
+    def test_bulk_accepts_string_ids(self):
+        activity = make_activity(self.user, self.category, DAY, DAY + timedelta(hours=1))
+
+        response = self.client.post("/api/activities/bulk/", [{"id": str(activity.id), "notes": "x"}], format="json")
+        self.assertEqual(response.data["updated"], 1)
+        activity.refresh_from_db()
+        self.assertEqual(activity.notes, "x")
+
+    def test_bulk_rejects_repeated_ids(self):
+        activity = make_activity(self.user, self.category, DAY, DAY + timedelta(hours=1))
+        items = [{"id": activity.id, "notes": "first"}, {"id": str(activity.id), "notes": "second"}]
+
+        response = self.client.post("/api/activities/bulk/", items, format="json")
+        self.assertEqual(response.data["updated"], 0)
+        self.assertEqual(
+            [result["errors"] for result in response.data["results"]], [{"id": "Duplicate id in request."}] * 2
+        )
+        activity.refresh_from_db()
+        self.assertEqual(activity.notes, "")
+
+    def test_bulk_uses_constant_queries(self):
+        items = [self.item(hour, hour + 1) for hour in range(0, 24)]
+        category_versions(self.user.id)
+        # CATEGORY VERSIONS AND LOAD, SAVEPOINT, RANGE QUERY, ONE INSERT, THEN THE ROLLUP UPDATE
+        # (SAVEPOINT, FETCH, ONE INSERT, RELEASE), THE REPORT VERSION AND THE FINAL RELEASE
+        with self.assertNumQueries(11):
+            self.client.post("/api/activities/bulk/", items, format="json")
+
+
+class ActivityPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Work", color="#123456", user=self.user)
+        for hour in range(25):
+            make_activity(self.user, self.category, DAY + timedelta(hours=hour), DAY + timedelta(hours=hour, minutes=30))
+
+    def collect(self, url):
+        # FOLLOW NEXT LINKS, RETURNING THE IDS OF EVERY PAGE
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([activity["id"] for activity in response.data["results"]])
+            url = response.data["next"]
+        return pages
+
+    def test_pages_cover_every_activity_in_order(self):
+        self.client.force_authenticate(user=self.user)
+
+        pages = self.collect("/api/activities/?page_size=10")
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        ids = [pk for page in pages for pk in page]
+        expected = list(Activity.objects.order_by("start_time").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        self.client.force_authenticate(user=self.user)
+
+        first = self.client.get("/api/activities/?page_size=10")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_staff_pages_break_ties_and_filter_by_author(self):
+        # Test case: activities of different users starting at the same instant are not skipped
+        other = User.objects.create_user(username="other", password="testpass")
+        for hour in range(25):
+            make_activity(other, self.category, DAY + timedelta(hours=hour), DAY + timedelta(hours=hour, minutes=30))
+        staff = User.objects.create_user(username="staff", password="testpass", is_staff=True)
+        self.client.force_authenticate(user=staff)
+
+        ids = [pk for page in self.collect("/api/activities/?page_size=7") for pk in page]
+        self.assertEqual(sorted(ids), sorted(Activity.objects.values_list("id", flat=True)))
+
+        response = self.client.get(f"/api/activities/?author={other.id}&page_size=500")
+        self.assertEqual({activity["author"] for activity in response.data["results"]}, {other.id})
+
+    def test_page_is_a_single_query(self):
+        self.client.force_authenticate(user=self.user)
+        first = self.client.get("/api/activities/?page_size=10")
+
+        with self.assertNumQueries(1):
+            self.client.get(first.data["next"])
+
+
+class ActivityAsyncListTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Work", color="#123456", user=self.user)
+        for hour in range(25):
+            make_activity(self.user, self.category, DAY + timedelta(hours=hour), DAY + timedelta(hours=hour, minutes=30))
+        self.token = str(AccessToken.for_user(self.user))
+        self.client.cookies["access"] = self.token
+        self.async_client.cookies["access"] = self.token
+
+    def get_async(self, url):
+        # ROUTED LIKE REQUESTS COMING THROUGH BACKEND.ASGI
+        with self.settings(ROOT_URLCONF=ASGI_URLCONF):
+            return async_to_sync(self.async_client.get)(url)
+
+    def test_async_pages_match_the_sync_listing(self):
+        for url in ("/api/activities/?page_size=10", "/api/activities/?start=2025-06-02&end=2025-06-03&tz=Asia/Tokyo"):
+            while url:
+                response = self.get_async(url)
+                expected = self.client.get(url)
+                self.assertEqual(response.json(), expected.json())
+                url = response.json()["next"]
+
+        response = self.get_async("/api/activities/?date=2025-02-30")
+        self.assertEqual((response.status_code, response.json()), (400, {"date": "Invalid date format. Use YYYY-MM-DD."}))
+
+    def test_page_is_a_single_query_once_the_user_is_resolved(self):
+        first = self.get_async("/api/activities/?page_size=10")
+        with self.assertNumQueries(1):
+            self.get_async(first.json()["next"])
+
+    def test_writes_go_to_the_sync_view(self):
+        factory = AsyncRequestFactory()
+        factory.cookies["access"] = self.token
+        request = factory.post("/api/activities/", {
+            "category_id": self.category.id, "start_time": "2025-06-03T09:00:00Z",
+            "end_time": "2025-06-03T10:00:00Z", "energy_level": 5, "mood": "happy",
+        }, content_type="application/json")
+
+        response = async_to_sync(activity_list)(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Activity.objects.count(), 26)
+
+
+class ActivityRangeFilterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.category = Category.objects.create(name="Work", color="#123456", user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def listed(self, query):
+        response = self.client.get(f"/api/activities/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [activity["id"] for activity in response.data["results"]]
+
+    def test_date_includes_activities_crossing_midnight(self):
+        # Test case: sleep from 23:00 the day before is part of the day
+        sleep = make_activity(self.user, self.category, DAY - timedelta(hours=1), DAY + timedelta(hours=7))
+        work = make_activity(self.user, self.category, DAY + timedelta(hours=9), DAY + timedelta(hours=17))
+        make_activity(self.user, self.category, DAY + timedelta(days=1, hours=9), DAY + timedelta(days=1, hours=10))
+
+        self.assertEqual(self.listed("date=2025-06-02"), [sleep.id, work.id])
+
+    def test_date_is_interpreted_in_timezone(self):
+        # 2025-06-02 09:00 UTC is 2025-06-02 18:00 in Tokyo, 23:00 UTC is already 2025-06-03 there
+        morning = make_activity(self.user, self.category, DAY + timedelta(hours=9), DAY + timedelta(hours=10))
+        make_activity(self.user, self.category, DAY + timedelta(hours=23), DAY + timedelta(hours=23, minutes=30))
+
+        self.assertEqual(self.listed("date=2025-06-02&tz=Asia/Tokyo"), [morning.id])
+
+    def test_start_end_range(self):
+        week = [
+            make_activity(self.user, self.category, DAY + timedelta(days=day), DAY + timedelta(days=day, hours=1))
+            for day in range(10)
+        ]
+
+        # END IS EXCLUSIVE
+        self.assertEqual(self.listed("start=2025-06-02&end=2025-06-09"), [a.id for a in week[:7]])
+
+    def test_range_finds_long_activity_overlapped_by_a_later_one(self):
+        # WITHOUT THE DATABASE CONSTRAINT (SQLITE) STORED ACTIVITIES MAY OVERLAP, THE LONG ONE
+        # STILL REACHES INTO A RANGE STARTING AFTER THE SHORT ONE
+        long = make_activity(self.user, self.category, DAY, DAY + timedelta(days=10))
+        make_activity(self.user, self.category, DAY + timedelta(days=2), DAY + timedelta(days=3))
+
+        self.assertEqual(self.listed("start=2025-06-07&end=2025-06-08"), [long.id])
+
+    def test_invalid_range_rejected(self):
+        self.assertEqual(self.client.get("/api/activities/?start=2025-06-09&end=2025-06-02").status_code, 400)
+        self.assertEqual(self.client.get("/api/activities/?date=06/02/2025").status_code, 400)
+        self.assertEqual(self.client.get("/api/activities/?date=2025-06-02&tz=Mars/Base").status_code, 400)
+
+
+class ActivityExportTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#123456", user=self.user)
+        self.gym = Category.objects.create(name="Gym", color="#654321", user=self.user)
+        self.client.force_authenticate(user=self.user)
+        for day in range(3):
+            make_activity(self.user, self.work, DAY + timedelta(days=day, hours=9), DAY + timedelta(days=day, hours=17),
+                          notes='late, "busy" day')
+            make_activity(self.user, self.gym, DAY + timedelta(days=day, hours=18), DAY + timedelta(days=day, hours=19))
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response = self.client.get("/api/activities/export/")
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["category"], "Work")
+        self.assertEqual(rows[0]["notes"], 'late, "busy" day')
+        self.assertEqual(rows[0]["start_time"], (DAY + timedelta(hours=9)).isoformat())
+
+    def test_ndjson_export_with_filters(self):
+        response = self.client.get(
+            f"/api/activities/export/?type=ndjson&start=2025-06-03&end=2025-06-05&categories={self.gym.id}"
+        )
+
+        records = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([record["category"] for record in records], ["Gym", "Gym"])
+        self.assertEqual(records[0]["end_time"], (DAY + timedelta(days=1, hours=19)).isoformat())
+
+    def test_export_only_contains_own_activities(self):
+        other = User.objects.create_user(username="other", password="testpass")
+        make_activity(other, self.work, DAY, DAY + timedelta(hours=1))
+
+        records = self.content(self.client.get("/api/activities/export/?type=ndjson")).splitlines()
+        self.assertEqual(len(records), 6)
+
+    def test_unknown_export_type_rejected(self):
+        self.assertEqual(self.client.get("/api/activities/export/?type=xml").status_code, 400)
+
+
+class ActivityImportTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#123456", user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            "/api/activities/import/",
+            {"file": SimpleUploadedFile(name, content.encode()), **data},
+            format="multipart",
+        )
+
+    def test_csv_import(self):
+        content = (
+            "start_time,end_time,category,energy_level,mood,notes\n"
+            "2025-06-02T09:00:00Z,2025-06-02T12:00:00Z,work,7,Happy,deep work\n"
+            "2025-06-02T13:00:00,2025-06-02T14:00:00,Reading,,,\n"
+        )
+
+        response = self.upload("history.csv", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["imported"], 2)
+
+        first, second = Activity.objects.filter(author=self.user).order_by("start_time")
+        self.assertEqual(first.category, self.work)
+        self.assertEqual(first.mood, "happy")
+        # UNKNOWN CATEGORIES ARE CREATED, TIMES WITHOUT OFFSET USE THE DEFAULT TIMEZONE
+        self.assertEqual(second.category.name, "Reading")
+        self.assertEqual(second.category.user, self.user)
+        self.assertEqual(second.start_time, DAY + timedelta(hours=13))
+        self.assertEqual((second.energy_level, second.mood), (5, "neutral"))
+
+    def test_import_reports_row_errors(self):
+        make_activity(self.user, self.work, DAY, DAY + timedelta(hours=1))
+        content = (
+            "start_time,end_time,category\n"
+            "2025-06-02T00:30:00Z,2025-06-02T02:00:00Z,Work\n"   # overlaps the stored activity
+            "2025-06-02T03:00:00Z,2025-06-02T02:00:00Z,Work\n"   # ends before it starts
+            "not a date,2025-06-02T02:00:00Z,Work\n"
+            "2025-06-02T04:00:00Z,2025-06-02T05:00:00Z,Work\n"
+        )
+
+        response = self.upload("history.csv", content)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(response.data["failed"], 3)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [2, 3, 4])
+
+    def test_ics_import(self):
+        content = (
+            "BEGIN:VCALENDAR\r\n"
+            "BEGIN:VEVENT\r\n"
+            "DTSTART;TZID=Europe/Berlin:20250602T090000\r\n"
+            "DTEND;TZID=Europe/Berlin:20250602T103000\r\n"
+            "SUMMARY:Standup\r\n"
+            "CATEGORIES:Work\r\n"
+            "DESCRIPTION:Daily sync\\, then\r\n"
+            "  planning\r\n"
+            "END:VEVENT\r\n"
+            "BEGIN:VEVENT\r\n"
+            "DTSTART:20250602T180000Z\r\n"
+            "DTEND:20250602T190000Z\r\n"
+            "SUMMARY:Gym\r\n"
+            "END:VEVENT\r\n"
+            "END:VCALENDAR\r\n"
+        )
+
+        response = self.upload("calendar.ics", content)
+        self.assertEqual(response.data["imported"], 2)
+
+        standup, gym = Activity.objects.filter(author=self.user).order_by("start_time")
+        self.assertEqual(standup.start_time, DAY + timedelta(hours=7))
+        self.assertEqual(standup.category, self.work)
+        self.assertEqual(standup.notes, "Daily sync, then planning")
+        self.assertEqual(gym.category.name, "Gym")
+
+    def test_export_round_trips_through_import(self):
+        make_activity(self.user, self.work, DAY, DAY + timedelta(hours=1), notes="a, b")
+        exported = b"".join(self.client.get("/api/activities/export/").streaming_content).decode()
+        Activity.objects.all().delete()
+
+        response = self.upload("export.csv", exported)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(Activity.objects.get().notes, "a, b")
+
+    def test_unknown_type_rejected(self):
+        self.assertEqual(self.upload("history.txt", "x").status_code, 400)
+
+    def test_unknown_timezone_rejected(self):
+        for tz in ("Mars/Olympus", "", "../x", "/etc/passwd"):
+            response = self.upload("history.csv", "start_time,end_time,category\n", tz=tz)
+            self.assertEqual((response.status_code, response.data), (400, {"tz": "Unknown timezone."}), tz)
+
+    def test_file_failing_midway_imports_nothing(self):
+        rows = "".join(
+            f"{(DAY + timedelta(hours=hour)).isoformat()},{(DAY + timedelta(hours=hour, minutes=30)).isoformat()},Reading\n"
+            for hour in range(2 * IMPORT_BATCH_SIZE)
+        )
+        # THE BROKEN BYTES COME AFTER MORE THAN A BATCH OF VALID ROWS
+        content = ("start_time,end_time,category\n" + rows).encode() + b"\xff\xfe,broken\n"
+        response = self.client.post(
+            "/api/activities/import/", {"file": SimpleUploadedFile("history.csv", content)}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("file", response.data)
+        self.assertFalse(Activity.objects.exists())
+        self.assertFalse(Category.objects.filter(name="Reading").exists())
+
+    def test_timeline_is_not_locked_while_parsing(self):
+        def lock_is_free():
+            # TRIED FROM ANOTHER THREAD, THE LOCK IS REENTRANT
+            acquired = []
+
+            def try_lock():
+                if _timeline_lock.acquire(blocking=False):
+                    _timeline_lock.release()
+                    acquired.append(True)
+
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return bool(acquired)
+
+        free = []
+
+        def records():
+            for hour in range(3):
+                free.append(lock_is_free())
+                start, end = DAY + timedelta(hours=hour), DAY + timedelta(hours=hour, minutes=30)
+                yield hour + 2, {"start_time": start.isoformat(), "end_time": end.isoformat(), "category": "Work"}
+
+        report = ActivityImporter(self.user, batch_size=1).run(records())
+        self.assertEqual((report["imported"], free), (3, [True, True, True]))
+
+    def test_categories_of_rejected_rows_are_not_created(self):
+        make_activity(self.user, self.work, DAY, DAY + timedelta(hours=1))
+        content = (
+            "start_time,end_time,category\n"
+            "2025-06-02T00:30:00Z,2025-06-02T02:00:00Z,Overlapping\n"
+            "2025-06-02T03:00:00Z,2025-06-02T04:00:00Z,Reading\n"
+            "2025-06-02T05:00:00Z,2025-06-02T06:00:00Z,reading\n"
+        )
+
+        response = self.upload("history.csv", content)
+        self.assertEqual((response.data["imported"], response.data["failed"]), (2, 1))
+        self.assertFalse(Category.objects.filter(name="Overlapping").exists())
+        self.assertEqual(Category.objects.filter(name__iexact="reading").count(), 1)
+
+
+class SeedSyntheticDataTest(APITestCase):
+    def seed(self, *args):
+        call_command("seed_synthetic_data", "--users", "3", "--activities", "400", *args, stdout=io.StringIO())
+
+    def rollups(self):
+        return sorted(HourlyRollup.objects.values_list("user_id", "category_id", "bucket", "duration"))
+
+    def test_seeded_histories_are_realistic_and_do_not_overlap(self):
+        self.seed()
+
+        users = User.objects.filter(username__startswith="synthetic-")
+        self.assertEqual(users.count(), 3)
+        moods = {value for value, _ in Activity.MOOD_CHOICES}
+        for user in users:
+            activities = list(Activity.objects.filter(author=user).order_by("start_time").select_related("category"))
+            self.assertEqual(len(activities), 400)
+            for previous, activity in zip(activities, activities[1:]):
+                self.assertGreaterEqual(activity.start_time, previous.end_time)
+            self.assertTrue(all(activity.end_time > activity.start_time for activity in activities))
+            self.assertTrue({activity.mood for activity in activities} <= moods)
+            self.assertTrue(all(0 <= activity.energy_level <= 10 for activity in activities))
+
+            # DEFAULT CATEGORIES AND THE USER'S OWN ONES ARE BOTH USED
+            used = {activity.category for activity in activities}
+            self.assertTrue(any(category.is_default for category in used))
+            self.assertEqual({category for category in used if not category.is_default},
+                             set(Category.objects.filter(user=user)))
+            self.assertEqual(Category.objects.filter(user=user).count(), 3)
+
+    def test_rollups_match_a_rebuild(self):
+        self.seed()
+        seeded = self.rollups()
+        call_command("rebuild_rollups", stdout=io.StringIO())
+        self.assertEqual(seeded, self.rollups())
+
+    def test_same_seed_creates_the_same_data_and_users_are_not_reused(self):
+        self.seed("--prefix", "first")
+        self.seed("--prefix", "second")
+        first, second = (
+            list(
+                Activity.objects.filter(author__username__startswith=prefix)
+                .order_by("author_id", "start_time")
+                .values_list("start_time", "end_time", "category__name", "mood", "energy_level")
+            )
+            for prefix in ("first-", "second-")
+        )
+        self.assertEqual(first, second)
+
+        with self.assertRaises(CommandError):
+            self.seed("--prefix", "first")
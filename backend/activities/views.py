@@ -1,57 +1,322 @@
+import csv
+import io
+from collections import Counter
+
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets
+from django.db import IntegrityError
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.views import APIView
 
+from activities.exports import EXPORT_FORMATS, chunked, export_rows
+from activities.imports import PARSERS, ActivityImporter, ImportRowError
+from activities.locking import OVERLAP_CONSTRAINT, author_timeline_lock, defer_overlap_constraint
 from activities.models import Activity
-from .serializers import ActivitySerializer
+from activities.overlaps import sweep_conflicts
+from activities.pagination import ActivityCursorPagination
+from activities.signals import activities_bulk_changed
+from .serializers import ActivitySerializer, overlap_error
 from rest_framework.response import Response
 from datetime import date
+from zoneinfo import ZoneInfoNotFoundError
 from utils.time import get_utc_range_for_local_range
 
+# MAXIMUM NUMBER OF ACTIVITIES ACCEPTED BY ONE BULK REQUEST
+BULK_MAX_ITEMS = 1000
+
+# FIELDS WRITTEN BY BULK UPDATES
+BULK_UPDATE_FIELDS = ["category", "notes", "start_time", "end_time", "energy_level", "mood"]
+
+
+def get_requested_range(query_params):
+    """
+    Return the UTC (start, end) range requested through 'start'/'end' or 'date' and 'tz'
+    query params, or None when no range is requested
+    """
+    # OPTIONAL RANGE (YYYY-mm-dd), END IS EXCLUSIVE AND DEFAULTS TO THE END OF START DATE
+    start_str = query_params.get("start") or query_params.get("date")
+    end_str = query_params.get("end") if query_params.get("start") else None
+    if not start_str:
+        return None
+
+    # GET TIMEZONE FOR ACCURATE LOCAL DAYS, UTC BY DEFAULT
+    tz = query_params.get("tz", "UTC")
+
+    try:
+        start, end = get_utc_range_for_local_range(start_str=start_str, end_str=end_str, timezone_str=tz)
+    except ValueError:
+        raise ValidationError({"date": "Invalid date format. Use YYYY-MM-DD."})
+    except ZoneInfoNotFoundError:
+        raise ValidationError({"tz": "Unknown timezone."})
+
+    if end <= start:
+        raise ValidationError({"end": "End must be after start."})
+    return start, end
+
+
+def bulk_item_ids(items):
+    """
+    Map the index of every bulk item carrying an "id" to that id as an int, None when it is
+    not an integer (ints and digit strings are accepted, like DRF's primary key fields do)
+    """
+    ids = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or "id" not in item:
+            continue
+        value = item["id"]
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        ids[index] = value if isinstance(value, int) and not isinstance(value, bool) else None
+    return ids
+
+
 class ActivityViewSet(viewsets.ModelViewSet):
     serializer_class = ActivitySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ActivityCursorPagination
 
     def get_queryset(self):
         """
         Return activities for the current user, optionally filtered by a given date and timezone.
 
-        - If the user is staff, all activities are returned.
-        - If 'date' and 'tz' are provided in query params, filters activities that occur within
-        the full local day converted to UTC.
-        - If only 'date' is provided, all activities within given in UTC will be returned
+        - If the user is staff, all activities are returned, optionally narrowed to one 'author'.
+        - If 'start' (and optionally 'end', exclusive) are provided in query params, returns
+        activities overlapping that local date range, interpreted in 'tz' (UTC by default).
+        - If only 'date' is provided, returns activities overlapping that local day.
+        Activities crossing the range boundaries are included.
         """
 
         user = self.request.user
 
         # BASE QUERYSET: ALL ACTIVITIES BY USER BY DEFAULT
-        queryset = (
-            Activity.objects.all()
-            # RETURN ALL ACTIVITIES IN DB IS USER IS STAFF
-            if user.is_staff
-            else Activity.objects.filter(author=user)
-        )
+        # RETURN ALL ACTIVITIES IN DB IS USER IS STAFF
+        author_id = None if user.is_staff else user.id
+
+        # STAFF MAY NARROW THE LISTING DOWN TO ONE AUTHOR
+        author = self.request.query_params.get("author")
+        if user.is_staff and author:
+            if not author.isdigit():
+                raise ValidationError({"author": "Expected a user id."})
+            author_id = int(author)
 
-        # OPTIONAL FILTER BY DATE (YYYY-mm-dd)
-        date_str = self.request.query_params.get("date")
+        # OPTIONAL FILTER BY LOCAL DATE RANGE, CONVERTED TO UTC
+        time_range = get_requested_range(self.request.query_params)
 
-        # GET TIMEZONE FOR ACCURATE
-        tz = self.request.query_params.get("tz")
+        if time_range is None:
+            queryset = Activity.objects.all() if author_id is None else Activity.objects.filter(author_id=author_id)
+        elif author_id is None:
+            # OVERLAP PREDICATES ON THE RAW COLUMNS, NO FUNCTION WRAPPED AROUND THEM
+            queryset = Activity.objects.filter(start_time__lt=time_range[1], end_time__gt=time_range[0])
+        else:
+            queryset = Activity.objects.overlapping(author_id, *time_range)
 
-        if date_str:
-            if tz:
-                start,end = get_utc_range_for_local_range(start_str=date_str,end_str=None,timezone_str=tz)
-                queryset = queryset.filter(start_time__gte=start, end_time__lte=end)
-            else:
-                queryset = queryset.filter(start_time__date= date_str)
+        # NESTED CATEGORY IS SERIALIZED FOR EVERY ROW, JOIN IT INSTEAD OF ONE QUERY PER ROW
+        queryset = queryset.select_related("category")
 
-        # SORT BY START TIME
-        return queryset.order_by("start_time")
+        # SORT BY START TIME (PAGINATION KEEPS THIS ORDER, BREAKING TIES BY ID)
+        return queryset.order_by("start_time", "id")
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Stream all activities of the current user as CSV (default) or NDJSON ('type').
+        Accepts the same 'date'/'start'/'end'/'tz' range params as the listing and a
+        comma-separated 'categories' id list. Rows are read in chunks, so memory stays
+        flat however long the history is.
+        """
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in EXPORT_FORMATS:
+            raise ValidationError({"type": f"Expected one of: {', '.join(EXPORT_FORMATS)}."})
+        to_lines, content_type, filename = EXPORT_FORMATS[export_type]
+
+        # SAME RANGE SEMANTICS AS THE LISTING
+        time_range = get_requested_range(request.query_params)
+        queryset = (
+            Activity.objects.filter(author=request.user)
+            if time_range is None
+            else Activity.objects.overlapping(request.user.id, *time_range)
+        )
+
+        # OPTIONAL FILTER BY CATEGORY IDS, E.G. "1,2,3"
+        category_ids_str = request.query_params.get("categories")
+        if category_ids_str:
+            try:
+                category_ids = [int(cid) for cid in category_ids_str.split(",")]
+            except ValueError:
+                raise ValidationError({"categories": "Invalid category ID list."})
+            queryset = queryset.filter(category_id__in=category_ids)
+
+        rows = export_rows(queryset.order_by("start_time"))
+        response = StreamingHttpResponse(chunked(to_lines(rows)), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """
+        Import activities from an uploaded CSV or iCalendar 'file'.
+        The format comes from 'type' or the file extension. Rows are parsed as a stream and
+        written in bounded batches; rows that fail validation or overlap are reported by line.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "No file uploaded."})
+
+        import_type = request.data.get("type") or upload.name.rsplit(".", 1)[-1].lower()
+        if import_type not in PARSERS:
+            raise ValidationError({"type": f"Expected one of: {', '.join(PARSERS)}."})
+
+        try:
+            importer = ActivityImporter(request.user, default_tz=request.data.get("tz", "UTC"))
+        except (ZoneInfoNotFoundError, ValueError):
+            # ZONEINFO RAISES VALUEERROR FOR KEYS THAT ARE NOT ZONE NAMES ("", PATHS)
+            raise ValidationError({"tz": "Unknown timezone."})
+
+        try:
+            stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            report = importer.run(PARSERS[import_type](stream))
+        except (ImportRowError, UnicodeDecodeError, csv.Error) as exc:
+            # THE IMPORT RAN IN ONE TRANSACTION, NOTHING WAS SAVED
+            raise ValidationError({"file": str(exc)})
+
+        return Response(report)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create or update many activities of the current user in one request.
+
+        The body is a list of activities; items carrying an "id" partially update that
+        activity, the others are created. Items overlapping each other or stored activities
+        are rejected individually, all others are written in one transaction.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"error": "Expected a list of activities."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {BULK_MAX_ITEMS} activities per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = request.user
+        results = [None] * len(items)
+
+        # LOAD EVERY REFERENCED ACTIVITY ONCE, CATEGORIES RESOLVE FROM THE USER'S CATEGORY INDEX
+        ids = bulk_item_ids(items)
+        # ITEMS SHARING AN ID WOULD SHARE ONE INSTANCE, ONLY THE LAST CHANGE BEING WRITTEN
+        repeated = {activity_id for activity_id, count in Counter(ids.values()).items() if count > 1}
+        instances = (
+            Activity.objects.filter(author=user).select_related("category")
+            .in_bulk({activity_id for activity_id in ids.values() if activity_id is not None})
+        )
+        context = self.get_serializer_context()
+
+        # VALIDATE EACH ITEM ON ITS OWN, WITHOUT TOUCHING THE DATABASE
+        pending = {}
+        previous = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {"index": index, "status": "error", "errors": {"detail": "Expected an object."}}
+                continue
+
+            instance = None
+            if index in ids:
+                activity_id = ids[index]
+                if activity_id is None:
+                    error = "A valid integer is required."
+                elif activity_id in repeated:
+                    error = "Duplicate id in request."
+                else:
+                    instance = instances.get(activity_id)
+                    error = "Activity not found." if instance is None else None
+                if error:
+                    results[index] = {"index": index, "status": "error", "errors": {"id": error}}
+                    continue
+
+            serializer = ActivitySerializer(instance, data=item, partial=instance is not None, context=context)
+            if not serializer.is_valid():
+                results[index] = {"index": index, "status": "error", "errors": serializer.errors}
+                continue
+
+            if instance is not None:
+                previous[index] = (instance.category_id, instance.start_time, instance.end_time)
+            activity = instance or Activity(author=user)
+            for field, value in serializer.validated_data.items():
+                setattr(activity, field, value)
+            pending[index] = activity
+
+        try:
+            with author_timeline_lock(user.id):
+                defer_overlap_constraint()
+                for index in self.find_batch_conflicts(user, pending):
+                    del pending[index]
+                    results[index] = {"index": index, "status": "error", "errors": overlap_error().detail}
+
+                Activity.objects.bulk_create(
+                    [activity for activity in pending.values() if activity.id is None]
+                )
+                Activity.objects.bulk_update(
+                    [activity for activity in pending.values() if activity.id in instances],
+                    BULK_UPDATE_FIELDS,
+                )
+                activities_bulk_changed.send(
+                    sender=Activity,
+                    author_id=user.id,
+                    removed=[previous[index] for index in pending if index in previous],
+                    added=[
+                        (activity.category_id, activity.start_time, activity.end_time)
+                        for activity in pending.values()
+                    ],
+                )
+        except IntegrityError as exc:
+            # THE POSTGRESQL EXCLUSION CONSTRAINT REJECTED THE BATCH, NOTHING WAS WRITTEN
+            if OVERLAP_CONSTRAINT not in str(exc):
+                raise
+            raise overlap_error()
+
+        for index, activity in pending.items():
+            results[index] = {
+                "index": index,
+                "status": "updated" if activity.id in instances else "created",
+                "data": ActivitySerializer(activity, context=context).data,
+            }
+
+        return Response({
+            "created": sum(result["status"] == "created" for result in results),
+            "updated": sum(result["status"] == "updated" for result in results),
+            "failed": sum(result["status"] == "error" for result in results),
+            "results": results,
+        })
+
+    @staticmethod
+    def find_batch_conflicts(user, pending):
+        """
+        Return the keys of PENDING activities overlapping each other or stored activities,
+        using one range query around the whole batch and an in-memory sweep
+        """
+        if not pending:
+            return set()
+
+        batch = [(activity.start_time, activity.end_time, key) for key, activity in pending.items()]
+        existing = (
+            Activity.objects.overlapping(
+                user.id, min(start for start, _, _ in batch), max(end for _, end, _ in batch)
+            )
+            # ACTIVITIES BEING UPDATED ARE CHECKED AT THEIR NEW TIMES
+            .exclude(id__in=[activity.id for activity in pending.values() if activity.id])
+            .order_by("start_time")
+            .values_list("start_time", "end_time")
+        )
+        return sweep_conflicts(batch, existing)
+
 
 class MoodChoicesView(APIView):
     """
@@ -2,15 +2,40 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed with backend.asgi_urls, which serves the report, trend and activity
+list reads with async views. Run it with e.g. ``uvicorn backend.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+# URLCONF OF ASGI REQUESTS, WSGI REQUESTS KEEP ROOT_URLCONF
+ASGI_URLCONF = 'backend.asgi_urls'
+
+
+class AsyncReadsHandler(ASGIHandler):
+    def __init__(self):
+        super().__init__()
+        self.requests = asyncio.Semaphore(settings.ASGI_CONCURRENCY)
+
+    async def handle(self, scope, receive, send):
+        # REQUESTS OVER THE LIMIT WAIT HERE INSTEAD OF OPENING ONE MORE DATABASE CONNECTION
+        async with self.requests:
+            await super().handle(scope, receive, send)
+
+    async def get_response_async(self, request):
+        request.urlconf = ASGI_URLCONF
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+application = AsyncReadsHandler()
@@ -0,0 +1,21 @@
+"""
+URL configuration of requests served through ASGI (backend/asgi.py).
+
+The read paths dashboards poll are served by async views, so a slow query waits without
+holding a worker. Every other path, and every other method of these paths, is served by
+the sync views of backend.urls.
+"""
+from django.urls import path
+
+from activities.async_views import activity_list
+from backend.urls import urlpatterns as sync_urlpatterns
+from reports.async_views import category_trend, daily_report, monthly_report, weekly_report
+
+urlpatterns = [
+    path('api/activities/', activity_list, name='activities-list'),
+    path('api/reports/daily/', daily_report, name='daily-report'),
+    path('api/reports/weekly/', weekly_report, name='weekly-report'),
+    path('api/reports/monthly/', monthly_report, name='monthly-report'),
+    path('api/reports/trends/category/', category_trend, name='category-trend'),
+    *sync_urlpatterns,
+]
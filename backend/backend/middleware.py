@@ -0,0 +1,124 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.contrib.auth import middleware as auth
+from django.db import connection
+from django.middleware import clickjacking, common, csrf, security
+from whitenoise import middleware
+
+from utils.metrics import QueryTimer, current_timer, install_query_timing, request_metrics
+
+
+class WhiteNoiseMiddleware(middleware.WhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that also runs in async mode. WhiteNoise's own is sync only, so
+    Django would pass every ASGI request through a thread to call it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class EventLoopHooksMixin:
+    """
+    In async mode, call a Django middleware's request and response hooks on the event loop.
+    Django passes each call through a thread, which costs more than hooks that only look at
+    headers and cookies. Middleware that may query the database (sessions, messages) keeps it.
+    """
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, "process_request"):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, "process_response"):
+            response = self.process_response(request, response)
+        return response
+
+
+class SecurityMiddleware(EventLoopHooksMixin, security.SecurityMiddleware):
+    pass
+
+
+class CommonMiddleware(EventLoopHooksMixin, common.CommonMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(EventLoopHooksMixin, csrf.CsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(EventLoopHooksMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(EventLoopHooksMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
+
+
+class RequestMetricsMiddleware:
+    """
+    Time each request and its database queries, report them in a Server-Timing header and
+    record them, with the response size, in the process's request metrics by URL name.
+    Keep it first so the time of the other middleware is included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        install_query_timing(connection)
+        started, timer = time.perf_counter(), QueryTimer()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.record(request, response, started, timer)
+
+    async def __acall__(self, request):
+        started, timer = time.perf_counter(), QueryTimer()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.record(request, response, started, timer)
+
+    def record(self, request, response, started, timer):
+        duration = time.perf_counter() - started
+        # UNMATCHED PATHS ARE COUNTED TOGETHER, NOT ONE SERIES PER PATH
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        size = None if response.streaming else len(response.content)
+        request_metrics.record(view, request.method, duration, timer.duration, timer.queries, size)
+
+        response["Server-Timing"] = (
+            f'app;dur={duration * 1000:.1f}, db;dur={timer.duration * 1000:.1f};desc="{timer.queries} queries"'
+        )
+        return response
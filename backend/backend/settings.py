@@ -60,21 +60,24 @@ INSTALLED_APPS = [
     'users',
     'reports',
     'activities',
+    'utils',
 
     'corsheaders',
     'django_extensions'
 ]
 
+# DJANGO'S MIDDLEWARE, THE ONES IN BACKEND.MIDDLEWARE RUN WITHOUT A THREAD PER CALL UNDER ASGI
 MIDDLEWARE = [
+    'backend.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.middleware.SecurityMiddleware',
+    'backend.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.middleware.CommonMiddleware',
+    'backend.middleware.CsrfViewMiddleware',
+    'backend.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.middleware.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -96,6 +99,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# REQUESTS EACH ASGI WORKER (BACKEND.ASGI) HANDLES AT ONCE. WITHOUT A CONNECTION POOL EACH HOLDS
+# ITS OWN DATABASE CONNECTION, SO WORKERS * ASGI_CONCURRENCY MUST STAY BELOW THE DATABASE'S LIMIT
+ASGI_CONCURRENCY = int(os.getenv("ASGI_CONCURRENCY", 20))
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -109,8 +116,32 @@ if DJANGO_ENV == "prod":
             'PASSWORD': os.getenv("POSTGRES_PASSWORD"),
             'HOST': os.getenv("DB_HOST"),
             'PORT': os.getenv("DB_PORT"),
+            # CHECK A REUSED CONNECTION BEFORE HANDING IT TO A REQUEST
+            'CONN_HEALTH_CHECKS': os.getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
         }
     }
+
+    # CONNECTIONS ARE POOLED PER PROCESS WITH PSYCOPG 3 (PSYCOPG[POOL]), UNLESS DB_POOL=0
+    try:
+        import psycopg_pool
+    except ImportError:
+        psycopg_pool = None
+
+    if psycopg_pool and os.getenv("DB_POOL", "1") == "1":
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+                'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 20)),
+                # SECONDS A REQUEST WAITS FOR A FREE CONNECTION BEFORE FAILING
+                'timeout': float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            },
+        }
+    else:
+        # WITHOUT A POOL (E.G. PSYCOPG2) EVERY REQUEST OPENS ITS OWN CONNECTION AND CLOSES IT WHEN DONE.
+        # UNDER ASGI (BACKEND.ASGI, AS DEPLOYED) REQUESTS DO NOT RUN ON REUSABLE THREADS, SO KEPT
+        # CONNECTIONS WOULD PILE UP UNTIL THE DATABASE REFUSES NEW ONES. ONLY A WSGI SERVER, WHOSE
+        # WORKER THREADS SERVE REQUEST AFTER REQUEST, MAY KEEP THEM FOR DB_CONN_MAX_AGE SECONDS
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv("DB_CONN_MAX_AGE", 0))
 else:
     DATABASES = {
         'default': {
@@ -120,6 +151,49 @@ else:
     }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# REPORT RESPONSES ARE CACHED PER USER AND INVALIDATED BY VERSION ON EVERY WRITE.
+# WITH REDIS_URL SET THEY ARE SHARED BY ALL WORKERS (EVICTION FOLLOWS THE SERVER'S
+# MAXMEMORY POLICY), OTHERWISE EACH PROCESS KEEPS ITS OWN BOUNDED LRU CACHE
+if os.getenv("REDIS_URL"):
+    REPORT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("REDIS_URL"),
+        'TIMEOUT': 60 * 60,
+    }
+else:
+    REPORT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'reports',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("REPORT_CACHE_MAX_ENTRIES", 5000)),
+        },
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reports': REPORT_CACHE,
+}
+
+# VERSION TOKENS RETIRING CACHED REPORTS AND CATEGORY INDEXES ON WRITES MUST BE SHARED BY
+# EVERY PROCESS THAT WRITES (WEB WORKERS, THE REPORT WORKER, MANAGEMENT COMMANDS): IN REDIS
+# WHEN SET, OTHERWISE IN A DATABASE TABLE (SEE UTILS.VERSIONS)
+if os.getenv("REDIS_URL"):
+    CACHES['versions'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("REDIS_URL"),
+        'TIMEOUT': None,
+    }
+
+# PROCESSES COMPUTING PLATFORM-WIDE STATISTICS IN THE REPORT WORKER (0 MEANS ONE PER CORE)
+PLATFORM_STATS_WORKERS = int(os.getenv("PLATFORM_STATS_WORKERS", 0))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
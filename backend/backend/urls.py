@@ -17,10 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from backend.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/categories/', include('categories.urls')),
     path('api/users/', include('users.urls')),
     path('api/activities/', include('activities.urls')),
     path('api/reports/', include('reports.urls')),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,15 @@
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from utils.metrics import request_metrics
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of the serving process, in the Prometheus text format. Staff only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(request_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'categories'
+
+    def ready(self):
+        # KEEP THE PER-USER CATEGORY INDEX IN STEP WITH WRITES
+        from categories import signals  # noqa: F401
@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from categories.models import Category
+from utils.versions import bump_version, get_versions
+
+# USERS WHOSE OWN CATEGORIES ARE KEPT IN EACH PROCESS, THE LEAST RECENTLY USED ARE DROPPED
+CATEGORY_INDEX_SIZE = 1024
+
+# VERSION OWNER OF THE DEFAULT CATEGORIES
+DEFAULTS = "defaults"
+
+_lock = threading.Lock()
+_defaults = (None, MappingProxyType({}))
+_own = OrderedDict()
+
+
+def version_key(owner):
+    return f"categories:version:{owner}"
+
+
+def category_versions(user_id):
+    """
+    Current (own, defaults) category versions of a user
+    """
+    return tuple(get_versions([version_key(user_id), version_key(DEFAULTS)]))
+
+
+def bump_category_version(user_id=None):
+    """
+    Retire the indexed categories of a user, or the default categories when USER_ID is None
+    """
+    bump_version(version_key(DEFAULTS if user_id is None else user_id))
+
+
+class UserCategories:
+    """
+    Read-only view of the categories a user may use (the defaults and their own) by id.
+    The instances are shared between requests and must not be modified.
+    """
+    __slots__ = ("defaults", "own")
+
+    def __init__(self, defaults, own):
+        self.defaults = defaults
+        self.own = own
+
+    def get(self, category_id, default=None):
+        return self.own.get(category_id) or self.defaults.get(category_id, default)
+
+    def __contains__(self, category_id):
+        return category_id in self.own or category_id in self.defaults
+
+    def __len__(self):
+        return len(self.own) + len(self.defaults)
+
+    def values(self):
+        """
+        Every category, ordered by id
+        """
+        return sorted([*self.defaults.values(), *self.own.values()], key=lambda category: category.id)
+
+
+def indexed_parts(user_id, own_version, defaults_version):
+    """
+    The (defaults, own) categories of a user still current in this process, None for each part
+    that must be read again
+    """
+    with _lock:
+        defaults = _defaults[1] if _defaults[0] == defaults_version else None
+        own = _own.get(user_id)
+        if own and own[0] == own_version:
+            _own.move_to_end(user_id)
+            return defaults, own[1]
+        return defaults, None
+
+
+def missing_categories(user_id, defaults, own):
+    """
+    Categories to read for whichever parts are missing, in one query
+    """
+    parts = Q(pk__in=[])
+    if defaults is None:
+        parts |= Q(is_default=True)
+    if own is None:
+        parts |= Q(user_id=user_id, is_default=False)
+    return Category.objects.filter(parts)
+
+
+def index_categories(user_id, own_version, defaults_version, defaults, own, loaded):
+    """
+    Keep the LOADED categories of the missing parts and return every category of the user
+    """
+    global _defaults
+
+    if defaults is None:
+        defaults = MappingProxyType({category.id: category for category in loaded if category.is_default})
+        with _lock:
+            _defaults = (defaults_version, defaults)
+
+    if own is None:
+        own = MappingProxyType({category.id: category for category in loaded if not category.is_default})
+        with _lock:
+            _own[user_id] = (own_version, own)
+            _own.move_to_end(user_id)
+            while len(_own) > CATEGORY_INDEX_SIZE:
+                _own.popitem(last=False)
+
+    return UserCategories(defaults, own)
+
+
+def user_categories(user_id):
+    """
+    Categories of a user, read from the database only when their version changed
+    """
+    versions = category_versions(user_id)
+    defaults, own = indexed_parts(user_id, *versions)
+
+    loaded = []
+    if defaults is None or own is None:
+        loaded = list(missing_categories(user_id, defaults, own))
+    return index_categories(user_id, *versions, defaults, own, loaded)
+
+
+async def auser_categories(user_id):
+    """
+    Async version of user_categories
+    """
+    # THE CACHE BACKENDS' ASYNC METHODS RUN EACH KEY IN A THREAD, READ BOTH VERSIONS IN ONE
+    versions = await sync_to_async(category_versions)(user_id)
+    defaults, own = indexed_parts(user_id, *versions)
+
+    loaded = []
+    if defaults is None or own is None:
+        loaded = [category async for category in missing_categories(user_id, defaults, own)]
+    return index_categories(user_id, *versions, defaults, own, loaded)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from categories.index import bump_category_version
+from categories.models import Category
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_index(sender, instance, **kwargs):
+    if instance.user_id is not None:
+        bump_category_version(instance.user_id)
+    # DEFAULT CATEGORIES ARE INDEXED FOR EVERY USER
+    if instance.is_default or instance.user_id is None:
+        bump_category_version()
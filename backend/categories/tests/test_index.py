@@ -0,0 +1,90 @@
+# This test checks the per-user category index used by listings, activity validation and trends.
+# It ensures categories are read once, stay in step with writes and belong to the user.
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+
+from categories import index
+from categories.index import bump_category_version, user_categories
+from categories.models import Category
+from utils.models import DataVersion
+
+
+class CategoryIndexTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.other = User.objects.create_user(username="otheruser", password="testpass")
+        self.sleep = Category.objects.create(name="Sleep", color="#000000", is_default=True)
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        self.foreign = Category.objects.create(name="Secret", color="#222222", user=self.other)
+        self.client.force_authenticate(user=self.user)
+
+    def names(self):
+        return [category["name"] for category in self.client.get("/api/categories/").data]
+
+    def test_listing_is_read_once(self):
+        self.assertEqual(self.names(), ["Sleep", "Work"])
+        # ONLY THE VERSIONS
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(), ["Sleep", "Work"])
+
+    def test_versions_bumped_by_another_process_invalidate(self):
+        self.names()
+        # A CATEGORY IMPORTED BY A MANAGEMENT COMMAND ONLY CHANGES THE STORED VERSION
+        Category.objects.bulk_create([Category(name="Imported", color="#333333", user=self.user)])
+        DataVersion.objects.filter(key=index.version_key(self.user.id)).update(version="imported")
+        self.assertEqual(self.names(), ["Sleep", "Work", "Imported"])
+
+    def test_writes_invalidate(self):
+        self.names()
+        self.client.patch(f"/api/categories/{self.work.id}/", {"name": "Deep work"})
+        self.client.post("/api/categories/", {"name": "Gym", "color": "#333333"})
+        self.assertEqual(self.names(), ["Sleep", "Deep work", "Gym"])
+
+        self.client.delete(f"/api/categories/{self.work.id}/")
+        self.assertEqual(self.names(), ["Sleep", "Gym"])
+
+    def test_default_category_writes_invalidate_every_user(self):
+        user_categories(self.other.id)
+        self.sleep.name = "Rest"
+        self.sleep.save()
+        self.assertEqual(user_categories(self.other.id).get(self.sleep.id).name, "Rest")
+
+    def test_version_bumped_elsewhere_retires_entries(self):
+        # A WRITE IN ANOTHER PROCESS ONLY LEAVES ITS VERSION BUMP IN THE SHARED CACHE
+        user_categories(self.user.id)
+        Category.objects.filter(pk=self.work.pk).update(name="Renamed")
+        self.assertEqual(user_categories(self.user.id).get(self.work.id).name, "Work")
+        bump_category_version(self.user.id)
+        self.assertEqual(user_categories(self.user.id).get(self.work.id).name, "Renamed")
+
+    def test_least_recently_used_users_are_dropped(self):
+        with mock.patch.object(index, "CATEGORY_INDEX_SIZE", 1):
+            user_categories(self.user.id)
+            user_categories(self.other.id)
+            self.assertEqual(list(index._own), [self.other.id])
+
+    def test_activities_only_accept_own_and_default_categories(self):
+        activity = {
+            "start_time": "2025-06-02T09:00:00Z", "end_time": "2025-06-02T10:00:00Z",
+            "energy_level": 5, "mood": "happy",
+        }
+        response = self.client.post("/api/activities/", {**activity, "category_id": self.foreign.id}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("category_id", response.data)
+
+        response = self.client.post("/api/activities/", {**activity, "category_id": self.sleep.id}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["category"]["name"], "Sleep")
+
+    def test_bulk_rejects_foreign_categories_per_item(self):
+        response = self.client.post("/api/activities/bulk/", [
+            {"start_time": "2025-06-02T09:00:00Z", "end_time": "2025-06-02T10:00:00Z",
+             "energy_level": 5, "mood": "happy", "category_id": self.foreign.id},
+            {"start_time": "2025-06-02T10:00:00Z", "end_time": "2025-06-02T11:00:00Z",
+             "energy_level": 5, "mood": "happy", "category_id": self.work.id},
+        ], format="json")
+        self.assertEqual([result["status"] for result in response.data["results"]], ["error", "created"])
@@ -1,6 +1,8 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from categories.index import user_categories
 from categories.serializers import CategorySerializer
 from .models import Category
 from django.contrib.auth.models import User
@@ -28,3 +30,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
         # Q IS USED FOR COMPLEX QUERIES 
         return Category.objects.filter(Q(user=user) | Q(is_default=True))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Same categories as get_queryset, served from the user's category index
+        """
+        categories = user_categories(request.user.id).values()
+        return Response(self.get_serializer(categories, many=True).data)
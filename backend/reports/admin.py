@@ -1,3 +1,6 @@
 from django.contrib import admin
 
+from reports.models import ReportJob
+
 # Register your models here.
+admin.site.register(ReportJob)
@@ -0,0 +1,123 @@
+from collections import defaultdict
+from datetime import datetime, time, timezone
+
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from activities.models import Activity
+from reports.cache import cache_report
+from reports.ranges import parse_local_range
+
+MOODS = [value for value, _ in Activity.MOOD_CHOICES]
+
+
+class MoodEnergyStats:
+    """
+    Running energy and mood statistics of a group, merged from the database's finer groups
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.energy_sum = 0
+        self.energy_min = None
+        self.energy_max = None
+        self.moods = dict.fromkeys(MOODS, 0)
+
+    def add(self, row):
+        self.count += row["count"]
+        self.energy_sum += row["energy_sum"]
+        self.energy_min = row["energy_min"] if self.energy_min is None else min(self.energy_min, row["energy_min"])
+        self.energy_max = row["energy_max"] if self.energy_max is None else max(self.energy_max, row["energy_max"])
+        for mood in MOODS:
+            self.moods[mood] += row[f"mood_{mood}"]
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "energy": {
+                "avg": round(self.energy_sum / self.count, 2) if self.count else None,
+                "min": self.energy_min,
+                "max": self.energy_max,
+            },
+            "moods": self.moods,
+        }
+
+
+def mood_energy_analytics(user, start, end, tz):
+    """
+    Energy level statistics and mood distribution of the activities user started from start to end,
+    by category, by local hour of day and by local weekday
+    """
+    # ONE GROUP PER CATEGORY, HOUR AND WEEKDAY, AT MOST CATEGORIES x 24 x 7 ROWS WHATEVER THE HISTORY
+    rows = (
+        Activity.objects.filter(author=user, start_time__gte=start, start_time__lt=end)
+        .annotate(
+            hour=ExtractHour("start_time", tzinfo=tz),
+            weekday=ExtractIsoWeekDay("start_time", tzinfo=tz),
+        )
+        .values("category_id", "category__name", "hour", "weekday")
+        .annotate(
+            count=Count("id"),
+            energy_sum=Sum("energy_level"),
+            energy_min=Min("energy_level"),
+            energy_max=Max("energy_level"),
+            **{f"mood_{mood}": Count("id", filter=Q(mood=mood)) for mood in MOODS},
+        )
+        .order_by()
+    )
+
+    categories = defaultdict(MoodEnergyStats)
+    names = {}
+    hours = {hour: MoodEnergyStats() for hour in range(24)}
+    weekdays = {weekday: MoodEnergyStats() for weekday in range(1, 8)}
+    for row in rows:
+        names[row["category_id"]] = row["category__name"]
+        categories[row["category_id"]].add(row)
+        hours[row["hour"]].add(row)
+        weekdays[row["weekday"]].add(row)
+
+    return {
+        "moods": MOODS,
+        "by_category": sorted(
+            (
+                {"category_id": category_id, "category_name": names[category_id], **stats.as_dict()}
+                for category_id, stats in categories.items()
+            ),
+            key=lambda entry: entry["count"], reverse=True,
+        ),
+        "by_hour": [{"hour": hour, **stats.as_dict()} for hour, stats in hours.items()],
+        "by_weekday": [{"weekday": weekday, **stats.as_dict()} for weekday, stats in weekdays.items()],
+    }
+
+
+def mood_energy_report(user, start_date, end_date, tz):
+    """
+    Mood and energy analytics of the local dates from start_date to end_date (exclusive)
+    """
+    start = datetime.combine(start_date, time.min, tzinfo=tz).astimezone(timezone.utc)
+    end = datetime.combine(end_date, time.min, tzinfo=tz).astimezone(timezone.utc)
+
+    return {
+        "start": str(start_date),
+        "end": str(end_date),
+        **mood_energy_analytics(user, start, end, tz),
+    }
+
+
+class MoodEnergyView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @cache_report
+    def get(self, request):
+        """
+        Returns energy and mood analytics of the activities started in a local date range
+        """
+        try:
+            start_date, end_date, tz = parse_local_range(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        return Response(mood_energy_report(request.user, start_date, end_date, tz))
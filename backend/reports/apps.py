@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
+
+    def ready(self):
+        # CONNECT ROLLUP MAINTENANCE AND REPORT CACHE INVALIDATION TO WRITES
+        from reports import signals  # noqa: F401
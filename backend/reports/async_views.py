@@ -0,0 +1,56 @@
+from rest_framework.response import Response
+
+from reports.cache import acache_report
+from reports.trends import CategoryTrendView, atrend_categories, format_trend, parse_trend_params, trend_source
+from reports.views import (
+    DailyReportView, MonthlyReportView, WeeklyReportView, duration_rows, format_report, get_selected_date,
+    report_window,
+)
+from utils.async_views import async_read
+
+
+def period_report_view(view_class):
+    """
+    Async version of a PeriodReportView, sharing its cached reports
+    """
+    @async_read
+    @acache_report(view_class.__name__)
+    async def period_report(request):
+        selected = get_selected_date(request)
+        if not selected:
+            return Response({"error": "Invalid date or timezone. Use YYYY-MM-DD and an IANA timezone."}, status=400)
+
+        start, end, label = report_window(view_class.period, *selected)
+        durations = [row async for row in duration_rows(request.user, start, end)]
+        return Response(format_report(durations, start, end, label))
+    return period_report
+
+
+daily_report = period_report_view(DailyReportView)
+weekly_report = period_report_view(WeeklyReportView)
+monthly_report = period_report_view(MonthlyReportView)
+
+
+@async_read
+@acache_report(CategoryTrendView.__name__)
+async def category_trend(request):
+    """
+    Async version of CategoryTrendView
+    """
+    try:
+        trend_type, end_date, tz, category_ids = parse_trend_params(request.query_params)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=400)
+
+    # LOAD CATEGORIES TO PRESERVE EVEN EMPTY ONES
+    category_map = await atrend_categories(request.user, category_ids)
+
+    start_date, x_axis, rows, fold = trend_source(request.user, trend_type, end_date, tz, category_ids)
+    trend_data = fold([row async for row in rows])
+
+    return Response({
+        "type": trend_type,
+        "start": str(start_date),
+        "end": str(end_date),
+        "data": format_trend(category_map, trend_data, x_axis),
+    })
@@ -0,0 +1,108 @@
+import functools
+import hashlib
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from utils.versions import bump_version, get_versions
+
+# CACHE ALIAS HOLDING REPORT RESPONSES, BOUNDED IN SETTINGS
+REPORT_CACHE = "reports"
+
+# VERSION OF DATA SHARED BY EVERY USER (DEFAULT CATEGORIES)
+SHARED_VERSION = "shared"
+
+
+def version_key(owner):
+    return f"reports:version:{owner}"
+
+
+def get_data_version(user_id):
+    """
+    Current version of the data a user's reports are computed from
+    """
+    return ".".join(get_versions([version_key(user_id), version_key(SHARED_VERSION)]))
+
+
+def bump_data_version(user_id=None):
+    """
+    Invalidate the cached reports of a user, or of every user when USER_ID is None
+    """
+    bump_version(version_key(SHARED_VERSION if user_id is None else user_id))
+
+
+def timezone_key(user_id):
+    return f"reports:tz:{user_id}"
+
+
+def recent_timezones(user_ids):
+    """
+    Map user ids to the time zone of their latest computed report, where one is known
+    """
+    found = caches[REPORT_CACHE].get_many([timezone_key(user_id) for user_id in user_ids])
+    return {user_id: found[timezone_key(user_id)] for user_id in user_ids if timezone_key(user_id) in found}
+
+
+def report_cache_key(user_id, endpoint, query_params):
+    params = {key: query_params.getlist(key) for key in sorted(query_params)}
+    # NO DATE MEANS TODAY, WHICH CHANGES AT MIDNIGHT
+    params.setdefault("date", [datetime.now(timezone.utc).date().isoformat()])
+    digest = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()
+    return f"reports:{user_id}:{get_data_version(user_id)}:{endpoint}:{digest}"
+
+
+def cached_report(user_id, endpoint, query_params):
+    """
+    Return the cache key of a report and its cached data, None when missing
+    """
+    key = report_cache_key(user_id, endpoint, query_params)
+    return key, caches[REPORT_CACHE].get(key)
+
+
+def store_report(user_id, query_params, key, data):
+    cache = caches[REPORT_CACHE]
+    cache.set(key, data)
+    # REMEMBERED FOR CACHE WARMING (MANAGE.PY WARM_REPORT_CACHE)
+    if "tz" in query_params:
+        cache.set(timezone_key(user_id), query_params["tz"], timeout=None)
+
+
+def cache_report(get):
+    """
+    Serve a report view's successful responses from the report cache, keyed by the user,
+    the view, query parameters and the user's data version
+    """
+    @functools.wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        key, data = cached_report(request.user.id, type(self).__name__, request.query_params)
+        if data is not None:
+            return Response(data)
+
+        response = get(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            store_report(request.user.id, request.query_params, key, response.data)
+        return response
+    return wrapper
+
+
+def acache_report(endpoint):
+    """
+    Async version of cache_report for async report views, sharing the entries of the sync
+    view named ENDPOINT
+    """
+    def decorator(get):
+        @functools.wraps(get)
+        async def wrapper(request, *args, **kwargs):
+            # THE CACHE BACKENDS' ASYNC METHODS RUN EACH CALL IN A THREAD, MAKE ONE CALL PER STEP
+            key, data = await sync_to_async(cached_report)(request.user.id, endpoint, request.query_params)
+            if data is not None:
+                return Response(data)
+
+            response = await get(request, *args, **kwargs)
+            if response.status_code == 200:
+                await sync_to_async(store_report)(request.user.id, request.query_params, key, response.data)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+
+from django.db.models import DateField, Sum
+from django.db.models.functions import TruncDay
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from activities.models import Activity
+from reports.cache import cache_report
+from reports.models import HourlyRollup
+from reports.rollups import is_hour_aligned
+from reports.trends import format_trend, parse_category_ids, trend_axis, trend_categories
+from reports.views import format_report, get_selected_date, report_window
+
+REPORT_PERIODS = ("daily", "weekly", "monthly")
+
+
+def local_midnight(day, tz):
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc)
+
+
+def daily_durations(user, start_date, end_date, tz):
+    """
+    Return (category id, category name, local day, duration) rows of the time user recorded
+    from start_date to end_date, in one query.
+    """
+    # HOUR-ALIGNED TIME FRAMES ARE GROUPED BY LOCAL DAY FROM THE HOURLY ROLLUP
+    if is_hour_aligned(start_date) and is_hour_aligned(end_date):
+        rows = (
+            HourlyRollup.objects.filter(user=user, bucket__gte=start_date, bucket__lt=end_date)
+            .annotate(day=TruncDay("bucket", tzinfo=tz, output_field=DateField()))
+            .values_list("category_id", "category__name", "day")
+            .annotate(total=Sum("duration"))
+            .order_by()
+        )
+        return list(rows)
+
+    # OTHERWISE SPLIT EACH OVERLAPPING ACTIVITY AT THE LOCAL MIDNIGHTS IT CROSSES
+    totals = defaultdict(timedelta)
+    activities = (
+        Activity.objects.overlapping(user.id, start_date, end_date)
+        .values_list("category_id", "category__name", "start_time", "end_time")
+    )
+    for category_id, name, start, end in activities:
+        start, end = max(start, start_date), min(end, end_date)
+        day = start.astimezone(tz).date()
+        while start < end:
+            following = min(local_midnight(day + timedelta(days=1), tz), end)
+            totals[(category_id, name, day)] += following - start
+            start, day = following, day + timedelta(days=1)
+
+    return [(*key, total) for key, total in totals.items()]
+
+
+class DashboardView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @cache_report
+    def get(self, request):
+        """
+        Returns the daily, weekly and monthly reports and the category trend of the selected date at once
+        """
+        selected = get_selected_date(request)
+        if not selected:
+            return Response({"error": "Invalid date or timezone. Use YYYY-MM-DD and an IANA timezone."}, status=400)
+        selected_date, tz = selected
+
+        try:
+            category_ids = parse_category_ids(request.query_params.get("categories"))
+        except ValueError:
+            return Response({"error": "Invalid category ID list."}, status=400)
+
+        # TIME FRAMES OF EVERY PAYLOAD, THE TREND ENDS WITH THE SELECTED DAY
+        trend_type = request.query_params.get("trend_type", "daily")
+        trend_start, _, group_func, x_axis = trend_axis(trend_type, selected_date)
+        windows = {period: report_window(period, selected_date, tz) for period in REPORT_PERIODS}
+        trend_window = (local_midnight(trend_start, tz), local_midnight(selected_date + timedelta(days=1), tz))
+
+        # READ THE WIDEST TIME FRAME ONCE, THEN DEAL EACH DAY TO THE PAYLOADS IT BELONGS TO
+        widest_start = min(trend_window[0], *(start for start, _, _ in windows.values()))
+        widest_end = max(trend_window[1], *(end for _, end, _ in windows.values()))
+
+        category_map = trend_categories(request.user, category_ids)
+        report_durations = defaultdict(list)
+        trend_durations = defaultdict(lambda: defaultdict(timedelta))
+        for category_id, name, day, duration in daily_durations(request.user, widest_start, widest_end, tz):
+            midnight = local_midnight(day, tz)
+            for period, (start, end, _) in windows.items():
+                if start <= midnight < end:
+                    report_durations[period].append((name, duration))
+            if trend_window[0] <= midnight < trend_window[1] and category_id in category_map:
+                trend_durations[category_id][group_func(day)] += duration
+
+        trend_data = {
+            category_id: {label: duration.total_seconds() / 3600 for label, duration in buckets.items()}
+            for category_id, buckets in trend_durations.items()
+        }
+
+        dashboard = {
+            period: format_report(report_durations[period], start, end, label)
+            for period, (start, end, label) in windows.items()
+        }
+        dashboard["trends"] = {
+            "type": trend_type,
+            "start": str(trend_start),
+            "end": str(selected_date),
+            "data": format_trend(category_map, trend_data, x_axis),
+        }
+        return Response(dashboard)
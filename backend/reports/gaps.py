@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import Lag, Lead
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from activities.models import Activity
+from reports.cache import cache_report
+from reports.dashboard import local_midnight
+from reports.ranges import parse_local_range
+
+# LONGEST RANGE SEARCHED FOR GAPS, IN DAYS
+MAX_GAP_DAYS = 366
+
+
+def find_gaps(user, start, end, min_gap=timedelta(0)):
+    """
+    Return the (start, end) intervals of [start, end) not covered by any activity of user,
+    at least MIN_GAP long and ordered by start.
+
+    The database pairs every activity with the end of the previous one and the start of the
+    next one in the same index-ordered scan, and only activities following a gap (or first
+    or last in the range) are returned.
+    """
+    by_start = {"partition_by": [F("author_id")], "order_by": F("start_time").asc()}
+    gap_before = Q(start_time__gte=F("previous_end") + min_gap) if min_gap else Q(start_time__gt=F("previous_end"))
+    rows = (
+        Activity.objects.overlapping(user.id, start, end)
+        .annotate(
+            previous_end=Window(Lag("end_time"), **by_start),
+            next_start=Window(Lead("start_time"), **by_start),
+        )
+        .filter(gap_before | Q(previous_end__isnull=True) | Q(next_start__isnull=True))
+        .order_by("start_time")
+        .values_list("start_time", "end_time", "previous_end", "next_start")
+    )
+
+    gaps = []
+    last_end = None
+    for started, ended, previous_end, next_start in rows:
+        # THE FIRST ACTIVITY'S GAP STARTS WITH THE RANGE
+        gaps.append((start if previous_end is None else previous_end, started))
+        if next_start is None:
+            last_end = ended
+    gaps.append((start if last_end is None else last_end, end))
+
+    # CUT TO THE RANGE, THE FIRST ACTIVITY MAY START BEFORE IT
+    clipped = [(max(gap_start, start), min(gap_end, end)) for gap_start, gap_end in gaps]
+    return [(gap_start, gap_end) for gap_start, gap_end in clipped if gap_end > gap_start and gap_end - gap_start >= min_gap]
+
+
+class GapsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @cache_report
+    def get(self, request):
+        """
+        Returns the unrecorded intervals of a local date range, for backfilling
+        """
+        try:
+            start_date, end_date, tz = parse_local_range(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        if (end_date - start_date).days > MAX_GAP_DAYS:
+            return Response({"error": f"Range too long, at most {MAX_GAP_DAYS} days are allowed."}, status=400)
+
+        try:
+            min_minutes = int(request.query_params.get("min_minutes", 0))
+        except ValueError:
+            return Response({"error": "Invalid min_minutes."}, status=400)
+        if min_minutes < 0:
+            return Response({"error": "Invalid min_minutes."}, status=400)
+
+        gaps = find_gaps(
+            request.user, local_midnight(start_date, tz), local_midnight(end_date, tz), timedelta(minutes=min_minutes)
+        )
+        unrecorded = sum((gap_end - gap_start for gap_start, gap_end in gaps), timedelta())
+        return Response({
+            "start": str(start_date),
+            "end": str(end_date),
+            "min_minutes": min_minutes,
+            "total_hours": round(unrecorded.total_seconds() / 3600, 2),
+            "gaps": [
+                {
+                    "start": gap_start.astimezone(tz).isoformat(),
+                    "end": gap_end.astimezone(tz).isoformat(),
+                    "minutes": round((gap_end - gap_start).total_seconds() / 60, 2),
+                }
+                for gap_start, gap_end in gaps
+            ],
+        })
@@ -0,0 +1,104 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from categories.models import Category
+from reports.cache import cache_report
+from reports.dashboard import local_midnight
+from reports.ranges import category_intervals, covered_time, parse_local_range, to_micros
+from reports.trends import parse_category_ids
+
+# LONGEST RANGE OF ONE HEATMAP, IN DAYS
+MAX_HEATMAP_DAYS = 2 * 366
+
+HOUR_MICROS = 3600 * 10**6
+CELLS = 7 * 24
+
+
+def hour_cells(start_date, end_date, tz):
+    """
+    Return the UTC edges (int64 microseconds) of the local hours from start_date to end_date
+    (exclusive) and the weekday × hour cell of each, 0 to 167 starting on Monday 0:00
+    """
+    starts, cells = [], []
+    for offset in range((end_date - start_date).days):
+        day = start_date + timedelta(days=offset)
+        midnight, following = local_midnight(day, tz), local_midnight(day + timedelta(days=1), tz)
+        if following - midnight == timedelta(hours=24):
+            hours = np.arange(24)
+            starts.append(to_micros(midnight) + HOUR_MICROS * hours)
+        else:
+            # DST CHANGE: 23 OR 25 HOURS, EACH IN THE CELL OF ITS LOCAL HOUR
+            length = math.ceil((following - midnight) / timedelta(hours=1))
+            moments = [midnight + timedelta(hours=hour) for hour in range(length)]
+            hours = np.array([moment.astimezone(tz).hour for moment in moments])
+            starts.append(np.array([to_micros(moment) for moment in moments], dtype=np.int64))
+        cells.append(day.weekday() * 24 + hours)
+
+    edges = np.append(np.concatenate(starts), to_micros(local_midnight(end_date, tz)))
+    return edges, np.concatenate(cells)
+
+
+def heatmap_report(user, start_date, end_date, tz, category_ids=None):
+    """
+    Hours per category in each weekday × hour cell of the local range from start_date to end_date,
+    as 7 rows (Monday first) of 24 hours. Activities are split exactly across the hours they cover.
+    """
+    edges, cells = hour_cells(start_date, end_date, tz)
+    start, end = local_midnight(start_date, tz), local_midnight(end_date, tz)
+
+    intervals = category_intervals(user, start, end)
+    if category_ids:
+        intervals = {category_id: intervals[category_id] for category_id in category_ids if category_id in intervals}
+    names = dict(Category.objects.filter(id__in=list(intervals)).values_list("id", "name"))
+
+    def per_cell(micros):
+        return np.bincount(cells, weights=micros, minlength=CELLS).reshape(7, 24) / 3.6e9
+
+    recorded = np.zeros((7, 24))
+    data = []
+    for category_id, (starts, ends) in intervals.items():
+        hours = per_cell(covered_time(starts, ends, edges))
+        recorded += hours
+        data.append({
+            "category_id": category_id,
+            "category_name": names.get(category_id),
+            "total": round(float(hours.sum()), 2),
+            "hours": np.round(hours, 2).tolist(),
+        })
+
+    return {
+        "start": str(start_date),
+        "end": str(end_date),
+        "data": sorted(data, key=lambda entry: entry["total"], reverse=True),
+        "recorded": np.round(recorded, 2).tolist(),
+        "available": np.round(per_cell(np.diff(edges)), 2).tolist(),
+    }
+
+
+class HeatmapView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @cache_report
+    def get(self, request):
+        """
+        Returns a weekday × hour heatmap of the hours spent per category in a local date range
+        """
+        try:
+            start_date, end_date, tz = parse_local_range(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        if (end_date - start_date).days > MAX_HEATMAP_DAYS:
+            return Response({"error": f"Range too long, at most {MAX_HEATMAP_DAYS} days are allowed."}, status=400)
+
+        try:
+            category_ids = parse_category_ids(request.query_params.get("categories"))
+        except ValueError:
+            return Response({"error": "Invalid category ID list."}, status=400)
+
+        return Response(heatmap_report(request.user, start_date, end_date, tz, category_ids))
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone as django_timezone
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from reports.analytics import mood_energy_report
+from reports.cache import get_data_version
+from reports.models import ReportJob
+from reports.platform import parse_platform_params, platform_stats
+from reports.ranges import parse_local_range, parse_range_params, range_report
+from reports.views import generate_report
+
+logger = logging.getLogger(__name__)
+
+# PENDING JOBS LOOKED AT PER CLAIM ATTEMPT
+CLAIM_BATCH_SIZE = 10
+
+
+def summary_report(user, start_date, end_date, tz):
+    """
+    Time usage report of the local dates from start_date to end_date (exclusive), e.g. a year in review
+    """
+    start = datetime.combine(start_date, time.min, tzinfo=tz).astimezone(timezone.utc)
+    end = datetime.combine(end_date, time.min, tzinfo=tz).astimezone(timezone.utc)
+    return generate_report(user, start, end, f"{start_date} to {end_date - timedelta(days=1)}")
+
+
+def platform_report(user, start, end):
+    return platform_stats(start, end, workers=settings.PLATFORM_STATS_WORKERS or None)
+
+
+def user_data_version(user):
+    return get_data_version(user.id)
+
+
+def hourly_version(user):
+    # PLATFORM DATA CHANGES WITH EVERY WRITE OF ANY USER, SNAPSHOTS ARE REUSED FOR AN HOUR
+    return django_timezone.now().strftime("%Y-%m-%dT%H")
+
+
+# PARAMS: ACCEPTED PARAMETER NAMES
+# PARSE: VALIDATES PARAMETERS INTO ARGUMENTS, RAISING VALUEERROR WITH A MESSAGE FOR THE CLIENT
+# RUN: COMPUTES THE JSON RESULT FROM THE USER AND THE PARSED ARGUMENTS
+# VERSION: VERSION OF THE DATA THE RESULT IS COMPUTED FROM, FINISHED JOBS ARE REUSED WHILE IT HOLDS
+# STAFF_ONLY: WHETHER ONLY STAFF USERS MAY SUBMIT THE KIND
+JobKind = namedtuple("JobKind", ["params", "parse", "run", "version", "staff_only"], defaults=(user_data_version, False))
+
+JOB_KINDS = {
+    "summary": JobKind(("start", "end", "tz"), parse_local_range, summary_report),
+    "range": JobKind(("start", "end", "tz", "granularity"), parse_range_params, range_report),
+    "mood_energy": JobKind(("start", "end", "tz"), parse_local_range, mood_energy_report),
+    "platform": JobKind(("start", "end"), parse_platform_params, platform_report, hourly_version, True),
+}
+
+
+def submit_job(user, kind, params):
+    """
+    Queue a report of KIND for user, or return the job already answering the same request
+    over the same data. Returns (job, created). Raises ValueError for invalid requests.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind. Use one of: {', '.join(JOB_KINDS)}.")
+
+    if not isinstance(params, dict):
+        raise ValueError("Params must be an object.")
+
+    job_kind = JOB_KINDS[kind]
+    if job_kind.staff_only and not user.is_staff:
+        raise PermissionDenied(f"Only staff can run {kind} jobs.")
+
+    params = {name: str(params[name]) for name in job_kind.params if params.get(name) not in (None, "")}
+    job_kind.parse(params)
+
+    key = hashlib.sha1(json.dumps([kind, params], sort_keys=True).encode()).hexdigest()
+    data_version = job_kind.version(user)
+    same_request = ReportJob.objects.filter(user=user, key=key, data_version=data_version).exclude(
+        status=ReportJob.FAILED
+    )
+
+    job = same_request.first()
+    if job:
+        return job, False
+
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(user=user, kind=kind, params=params, key=key, data_version=data_version)
+    except IntegrityError:
+        # AN IDENTICAL REQUEST WAS QUEUED CONCURRENTLY
+        return same_request.get(), False
+    return job, True
+
+
+def claim_job():
+    """
+    Mark the oldest pending job running and return it, None when there is nothing to do.
+    The conditional update lets any number of workers race for the same job safely.
+    """
+    pending = ReportJob.objects.filter(status=ReportJob.PENDING).order_by("created_at", "id")
+    for job_id in pending.values_list("id", flat=True)[:CLAIM_BATCH_SIZE]:
+        claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.PENDING).update(
+            status=ReportJob.RUNNING, started_at=django_timezone.now()
+        )
+        if claimed:
+            return ReportJob.objects.select_related("user").get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """
+    Compute a claimed job and store its result or error
+    """
+    job_kind = JOB_KINDS.get(job.kind)
+    try:
+        if job_kind is None:
+            raise ValueError(f"Unknown job kind: {job.kind}.")
+        job.result = job_kind.run(job.user, *job_kind.parse(job.params))
+        job.status = ReportJob.DONE
+    except Exception as exc:
+        logger.exception("Report job %s failed", job.pk)
+        job.error = str(exc)
+        job.status = ReportJob.FAILED
+
+    job.finished_at = django_timezone.now()
+    job.save(update_fields=["result", "error", "status", "finished_at"])
+    return job
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Put jobs left running longer than OLDER_THAN (e.g. by a killed worker) back in the queue
+    """
+    return ReportJob.objects.filter(
+        status=ReportJob.RUNNING, started_at__lt=django_timezone.now() - older_than
+    ).update(status=ReportJob.PENDING, started_at=None)
+
+
+def job_status(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class ReportJobListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Queue a long-running report, identical requests share one job
+        """
+        try:
+            job, created = submit_job(request.user, request.data.get("kind"), request.data.get("params") or {})
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        return Response(job_status(job), status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+
+class ReportJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = get_object_or_404(ReportJob, pk=pk, user=request.user)
+        return Response(job_status(job))
+
+
+class ReportJobResultView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """
+        Returns the result of a finished job, or its status while it is still pending or running
+        """
+        job = get_object_or_404(ReportJob, pk=pk, user=request.user)
+        if job.status == ReportJob.DONE:
+            return Response(job.result)
+        if job.status == ReportJob.FAILED:
+            return Response(job_status(job), status=status.HTTP_409_CONFLICT)
+        return Response(job_status(job), status=status.HTTP_202_ACCEPTED)
+
+
+class PlatformStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Returns platform-wide category and hours statistics of all users, computed by the
+        report worker. Answers 202 with the job's status until the snapshot is ready.
+        """
+        params = {name: request.query_params.get(name) for name in ("start", "end")}
+        try:
+            job, _ = submit_job(request.user, "platform", params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        if job.status == ReportJob.DONE:
+            return Response(job.result)
+        return Response(job_status(job), status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+from random import Random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+from rest_framework_simplejwt.tokens import AccessToken
+
+from activities.models import Activity
+
+# SERVER COMMANDS, BOTH SERVING THE CONFIGURED SETTINGS AND DATABASE
+SERVERS = {
+    "wsgi": ["-m", "gunicorn", "backend.wsgi:application", "--workers", "{workers}", "--bind", "127.0.0.1:{port}"],
+    "asgi": [
+        "-m", "uvicorn", "backend.asgi:application", "--workers", "{workers}", "--port", "{port}",
+        "--log-level", "warning",
+    ],
+}
+
+# READS OF ONE DASHBOARD LOAD
+DASHBOARD_READS = (
+    "/api/reports/daily/?date={date}&tz={tz}",
+    "/api/reports/trends/category/?type=daily&date={date}&tz={tz}",
+    "/api/activities/?date={date}&tz={tz}",
+)
+
+# SECONDS TO WAIT FOR A SERVER TO ACCEPT CONNECTIONS
+STARTUP_TIMEOUT = 30
+
+
+async def fetch(port, path, cookie):
+    """
+    GET PATH from the local server on PORT, returning the response status (0 when the
+    connection failed)
+    """
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nCookie: {cookie}\r\nConnection: close\r\n\r\n".encode()
+        )
+        response = await reader.read()
+        writer.close()
+        return int(response.split(b" ", 2)[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+class Command(BaseCommand):
+    help = "Compare sync (WSGI) and async (ASGI) throughput of dashboard reads under many concurrent clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200, help="Concurrent dashboard clients")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds of load per server")
+        parser.add_argument("--workers", type=int, default=4, help="Server worker processes")
+        parser.add_argument("--users", type=int, default=50, help="Users with activities to load dashboards of")
+        parser.add_argument("--days", type=int, default=90,
+                            help="Dashboards show a random day of the last DAYS days, so most miss the report cache")
+        parser.add_argument("--tz", default="UTC", help="Timezone of the dashboards")
+        parser.add_argument("--servers", default="wsgi,asgi", help=f"Comma-separated, of {', '.join(SERVERS)}")
+        parser.add_argument("--port", type=int, default=8790)
+
+    def handle(self, *args, **options):
+        servers = options["servers"].split(",")
+        unknown = set(servers) - set(SERVERS)
+        if unknown:
+            raise CommandError(f"Unknown servers: {', '.join(sorted(unknown))}.")
+
+        cookies = self.user_cookies(options["users"], options["duration"] * len(servers))
+
+        self.stdout.write(
+            f"{'server':>6} {'clients':>7} {'requests':>8} {'req/s':>8} {'dash/s':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+        )
+        for name in servers:
+            timings, statuses, dashboards = self.run_server(name, cookies, options)
+            requests = len(timings)
+            p50, p95, p99 = (statistics.quantiles(timings, n=100)[i] for i in (49, 94, 98)) if requests > 1 else (0, 0, 0)
+            errors = sum(count for status, count in statuses.items() if status != 200)
+            self.stdout.write(
+                f"{name:>6} {options['clients']:>7} {requests:>8} {requests / options['duration']:>8.1f} "
+                f"{dashboards / options['duration']:>7.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {errors:>6}"
+            )
+
+    def user_cookies(self, count, seconds):
+        """
+        Access token cookies of up to COUNT users with activities, valid for the whole benchmark
+        """
+        users = User.objects.filter(Exists(Activity.objects.filter(author=OuterRef("pk")))).order_by("pk")[:count]
+        cookies = []
+        for user in users:
+            token = AccessToken.for_user(user)
+            token.set_exp(lifetime=timedelta(seconds=seconds + 5 * 60))
+            cookies.append(f"{settings.SIMPLE_JWT['AUTH_COOKIE']}={token}")
+        if not cookies:
+            raise CommandError("No users with activities to load dashboards for.")
+        return cookies
+
+    def run_server(self, name, cookies, options, env=None):
+        """
+        Start server NAME, with ENV added to its environment, load it with clients for the
+        benchmark duration and stop it
+        """
+        command = [arg.format(**options) for arg in SERVERS[name]]
+        server = subprocess.Popen(
+            [sys.executable, *command], cwd=settings.BASE_DIR, env={**os.environ, **(env or {})},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_until_listening(options["port"], server)
+            return asyncio.run(self.load(cookies, options))
+        finally:
+            server.terminate()
+            server.wait()
+
+    def wait_until_listening(self, port, server):
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with status {server.returncode}.")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server did not listen on port {port} within {STARTUP_TIMEOUT} seconds.")
+
+    async def load(self, cookies, options):
+        """
+        Run the dashboard clients, returning request latencies in ms, status counts and the
+        number of complete dashboard loads
+        """
+        timings, statuses = [], Counter()
+        deadline = time.monotonic() + options["duration"]
+        today = date.today()
+
+        async def client(seed):
+            rng = Random(seed)
+            loads = 0
+            while time.monotonic() < deadline:
+                cookie = rng.choice(cookies)
+                day = today - timedelta(days=rng.randrange(options["days"]))
+                for read in DASHBOARD_READS:
+                    started = time.perf_counter()
+                    statuses[await fetch(options["port"], read.format(date=day, tz=options["tz"]), cookie)] += 1
+                    timings.append((time.perf_counter() - started) * 1000)
+                loads += 1
+            return loads
+
+        loads = await asyncio.gather(*(client(seed) for seed in range(options["clients"])))
+        return timings, statuses, sum(loads)
@@ -0,0 +1,91 @@
+import asyncio
+import statistics
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from random import Random
+
+from django.core.management.base import CommandError
+from django.db import connection
+
+from reports.management.commands.bench_dashboard_load import SERVERS, fetch
+from reports.management.commands.bench_dashboard_load import Command as DashboardLoadCommand
+
+# SERVER ENVIRONMENT OF EACH CONNECTION HANDLING MODE (SEE THE PROD DATABASES SETTINGS)
+MODES = {
+    "close": {"DB_POOL": "0", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "0", "DB_CONN_MAX_AGE": "600"},
+    "pool": {"DB_POOL": "1"},
+}
+
+# CHEAP READS, WHERE CONNECTION SETUP IS A LARGE PART OF THE LATENCY
+READS = {
+    "me": "/api/users/me/",
+    "moods": "/api/activities/moods/",
+    "activities": "/api/activities/?date={date}&tz=UTC",
+    "daily": "/api/reports/daily/?date={date}&tz=UTC",
+}
+
+
+class Command(DashboardLoadCommand):
+    help = "Compare per-request latency of cheap reads without persistent connections, with them and with a connection pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+        parser.add_argument("--duration", type=float, default=20, help="Seconds of load per mode")
+        parser.add_argument("--workers", type=int, default=4, help="Server worker processes")
+        parser.add_argument("--users", type=int, default=50, help="Users with activities to send requests as")
+        parser.add_argument("--days", type=int, default=90,
+                            help="Reads are of a random day of the last DAYS days, so most miss the report cache")
+        parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated, of {', '.join(MODES)}")
+        parser.add_argument("--server", default="wsgi", choices=SERVERS)
+        parser.add_argument("--port", type=int, default=8791)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Connection handling is only configurable for PostgreSQL (DJANGO_ENV=prod).")
+
+        modes = options["modes"].split(",")
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}.")
+
+        cookies = self.user_cookies(options["users"], options["duration"] * len(modes))
+
+        self.stdout.write(
+            f"{'mode':>10} {'read':>10} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+        )
+        for mode in modes:
+            timings, statuses = self.run_server(options["server"], cookies, options, env=MODES[mode])
+            for read in READS:
+                requests = len(timings[read])
+                p50, p95, p99 = (
+                    (statistics.quantiles(timings[read], n=100)[i] for i in (49, 94, 98)) if requests > 1 else (0, 0, 0)
+                )
+                errors = sum(count for status, count in statuses[read].items() if status != 200)
+                self.stdout.write(
+                    f"{mode:>10} {read:>10} {requests:>8} {requests / options['duration']:>8.1f} "
+                    f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {errors:>6}"
+                )
+
+    async def load(self, cookies, options):
+        """
+        Run the clients, each sending the reads in turn, returning request latencies in ms and
+        status counts by read
+        """
+        timings, statuses = defaultdict(list), defaultdict(Counter)
+        deadline = time.monotonic() + options["duration"]
+        today = date.today()
+
+        async def client(seed):
+            rng = Random(seed)
+            while time.monotonic() < deadline:
+                cookie = rng.choice(cookies)
+                day = today - timedelta(days=rng.randrange(options["days"]))
+                for read, path in READS.items():
+                    started = time.perf_counter()
+                    statuses[read][await fetch(options["port"], path.format(date=day), cookie)] += 1
+                    timings[read].append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(client(seed) for seed in range(options["clients"])))
+        return timings, statuses
@@ -0,0 +1,313 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from random import Random
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.test import Client, override_settings
+from django.urls import URLResolver, get_resolver
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from activities.models import Activity
+from activities.synthetic import TIMEZONES
+from categories.models import Category
+from reports.cache import bump_data_version
+
+# PASSWORD OF THE STAFF USER CREATED FOR THE RUN
+STAFF_PASSWORD = "bench-endpoints"
+
+# LIFETIME OF THE TOKENS OF THE RUN, THE DEFAULT ACCESS LIFETIME IS MINUTES
+TOKEN_LIFETIME = timedelta(hours=12)
+
+# METHODS OF THE ROUTES TO BENCHMARK, HEAD AND OPTIONS ARE ANSWERED BY THE FRAMEWORK
+METHODS = ("get", "post", "put", "patch", "delete")
+
+
+def activity_body(values, offset=0):
+    start = values["free"] + timedelta(minutes=30 * offset)
+    return {
+        "category_id": values["default_category"],
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=25)).isoformat(),
+        "energy_level": 6,
+        "mood": "content",
+        "notes": "Benchmark",
+    }
+
+
+def import_body(values):
+    rows = ["start_time,end_time,category,energy_level,mood"]
+    for offset in range(20):
+        start = values["free"] + timedelta(minutes=30 * offset)
+        rows.append(f"{start.isoformat()},{(start + timedelta(minutes=25)).isoformat()},Benchmark,5,neutral")
+    return {"file": SimpleUploadedFile("activities.csv", "\n".join(rows).encode(), content_type="text/csv")}
+
+
+# (URL NAME, METHOD, PATH, BODY) OF EVERY BENCHMARKED REQUEST. PATHS ARE FORMATTED AND BODIES
+# CALLED WITH THE VALUES OF A RANDOM USER AND DAY (SEE Command.request_values). READS OF RANGES
+# COVER THE 30 DAYS ENDING WITH THE DAY.
+ENDPOINTS = (
+    ("me", "GET", "/api/users/me/", None),
+    ("mood-choices", "GET", "/api/activities/moods/", None),
+    ("category-list", "GET", "/api/categories/", None),
+    ("category-detail", "GET", "/api/categories/{category}/", None),
+    ("activities-list", "GET", "/api/activities/?date={date}&tz={tz}", None),
+    ("activities-detail", "GET", "/api/activities/{activity}/", None),
+    ("activities-export", "GET", "/api/activities/export/?start={start}&end={end}&tz={tz}", None),
+    ("daily-report", "GET", "/api/reports/daily/?date={date}&tz={tz}", None),
+    ("weekly-report", "GET", "/api/reports/weekly/?date={date}&tz={tz}", None),
+    ("monthly-report", "GET", "/api/reports/monthly/?date={date}&tz={tz}", None),
+    ("category-trend", "GET", "/api/reports/trends/category/?type=daily&date={date}&tz={tz}", None),
+    ("dashboard", "GET", "/api/reports/dashboard/?date={date}&tz={tz}", None),
+    ("range-report", "GET", "/api/reports/range/?start={start}&end={end}&tz={tz}", None),
+    ("mood-energy", "GET", "/api/reports/analytics/mood-energy/?start={start}&end={end}&tz={tz}", None),
+    ("heatmap", "GET", "/api/reports/heatmap/?start={start}&end={end}&tz={tz}", None),
+    ("gaps", "GET", "/api/reports/gaps/?start={start}&end={end}&tz={tz}&min_minutes=30", None),
+    ("report-job", "GET", "/api/reports/jobs/{job}/", None),
+    ("report-job-result", "GET", "/api/reports/jobs/{job}/result/", None),
+    ("platform-stats", "GET", "/api/reports/platform/", None),
+    ("metrics", "GET", "/api/metrics/", None),
+    ("register", "POST", "/api/users/register/", lambda values: {
+        "username": f"bench-{uuid.uuid4().hex[:12]}", "email": "bench@example.com", "password": "Bench-password-1",
+    }),
+    ("token_obtain_pair", "POST", "/api/users/token/", lambda values: {
+        "username": values["staff"], "password": STAFF_PASSWORD,
+    }),
+    ("token_refresh", "POST", "/api/users/token/refresh/", None),
+    ("logout", "POST", "/api/users/logout/", None),
+    ("category-list", "POST", "/api/categories/", lambda values: {"name": "Benchmark", "color": "#123456"}),
+    ("category-detail", "PUT", "/api/categories/{category}/", lambda values: {"name": "Benchmark", "color": "#123456"}),
+    ("category-detail", "PATCH", "/api/categories/{category}/", lambda values: {"color": "#654321"}),
+    ("category-detail", "DELETE", "/api/categories/{category}/", None),
+    ("activities-list", "POST", "/api/activities/", activity_body),
+    ("activities-detail", "PUT", "/api/activities/{activity}/", activity_body),
+    ("activities-detail", "PATCH", "/api/activities/{activity}/", lambda values: {"notes": "Benchmark"}),
+    ("activities-detail", "DELETE", "/api/activities/{activity}/", None),
+    ("activities-bulk", "POST", "/api/activities/bulk/", lambda values: [
+        activity_body(values, offset) for offset in range(20)
+    ]),
+    ("activities-import-file", "POST", "/api/activities/import/", import_body),
+    ("report-jobs", "POST", "/api/reports/jobs/", lambda values: {
+        "kind": "summary", "params": {"start": values["start"], "end": values["end"], "tz": values["tz"]},
+    }),
+)
+
+# REQUESTS SENT AS THE STAFF USER, THE OTHERS AS A RANDOM SEEDED USER
+STAFF_ONLY = {"platform-stats", "metrics", "token_obtain_pair"}
+
+# REQUESTS WITH MULTIPART BODIES, THE OTHERS SEND JSON
+MULTIPART = {"activities-import-file"}
+
+
+def api_routes(patterns):
+    """
+    Yield (URL name, method) of every API route, leaving out the admin and API root views
+    """
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace != "admin":
+                yield from api_routes(pattern.url_patterns)
+        elif pattern.name and pattern.name != "api-root":
+            view = pattern.callback
+            methods = getattr(view, "actions", None) or [
+                method for method in METHODS if hasattr(view.view_class, method)
+            ]
+            # VIEWSETS ADD HEAD TO THEIR ACTIONS ONCE THEY SERVED A REQUEST
+            for method in methods:
+                if method in METHODS:
+                    yield pattern.name, method.upper()
+
+
+class Command(BaseCommand):
+    help = "Benchmark every API endpoint through the test client, reporting latency percentiles and query counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30, help="Timed requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per endpoint before timing")
+        parser.add_argument("--users", type=int, default=20, help="Users with activities to send requests as")
+        parser.add_argument("--only", help="Comma-separated URL names to benchmark (default: all)")
+        parser.add_argument("--cached", action="store_true",
+                            help="Keep cached reports between requests, by default every report is computed")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON, e.g. to compare runs")
+
+    def handle(self, *args, **options):
+        endpoints = ENDPOINTS
+        if options["only"]:
+            names = set(options["only"].split(","))
+            unknown = names - {name for name, *_ in ENDPOINTS}
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}.")
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in names]
+
+        missing = set(api_routes(get_resolver().url_patterns)) - {(name, method) for name, method, *_ in ENDPOINTS}
+        for name, method in sorted(missing):
+            self.stderr.write(f"Not benchmarked: {method} {name}")
+
+        # ACCEPT THE TEST CLIENT'S HOST, AND DO NOT LOG QUERIES LIKE IN PRODUCTION
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], DEBUG=False):
+            # EVERYTHING THE RUN WRITES IS ROLLED BACK
+            with transaction.atomic():
+                results = self.run(endpoints, options)
+                transaction.set_rollback(True)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "vendor": connection.vendor,
+                "results": [dict(zip(("name", "method", "p50", "p95", "p99", "queries", "errors"), row)) for row in results],
+            }, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'endpoint':<24} {'method':<6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7} {'errors':>6}"
+        )
+        for name, method, p50, p95, p99, queries, errors in results:
+            self.stdout.write(f"{name:<24} {method:<6} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {queries:>7} {errors:>6}")
+
+    def run(self, endpoints, options):
+        rng = Random(options["seed"])
+        users = self.user_states(rng, options["users"])
+        staff = User.objects.create_user(username=f"bench-staff-{uuid.uuid4().hex[:8]}", password=STAFF_PASSWORD, is_staff=True)
+        staff_state = {"user": staff, "cookies": self.cookies(staff), "tz": "UTC"}
+        client = Client()
+
+        results = []
+        for name, method, path, body in endpoints:
+            timings, query_counts, errors = [], [], 0
+            for iteration in range(options["warmup"] + options["iterations"]):
+                state = staff_state if name in STAFF_ONLY else rng.choice(users)
+                values = self.request_values(rng, state, staff)
+                if method == "GET" and not options["cached"]:
+                    bump_data_version(state["user"].id)
+
+                elapsed, queries, response = self.send(client, state, name, method, path.format(**values), body, values)
+                if iteration < options["warmup"]:
+                    continue
+                timings.append(elapsed)
+                query_counts.append(queries)
+                if response.status_code >= 400:
+                    if not errors:
+                        self.stderr.write(f"{method} {name}: {response.status_code} {response.content[:200]!r}")
+                    errors += 1
+
+            p50, p95, p99 = (
+                (statistics.quantiles(timings, n=100)[i] for i in (49, 94, 98)) if len(timings) > 1 else (timings or [0]) * 3
+            )
+            results.append((name, method, p50, p95, p99, int(statistics.median(query_counts or [0])), errors))
+        return results
+
+    def send(self, client, state, name, method, path, body, values):
+        """
+        Send one request, returning its time in ms, the number of queries it ran and the response.
+        Writes are rolled back, so every request sees the same data.
+        """
+        client.cookies.load(state["cookies"])
+        # LIKE THE FRONTEND, REQUESTS WITHOUT A BODY ARE SENT AS JSON TOO
+        kwargs = {"content_type": "application/json"}
+        if name in MULTIPART:
+            kwargs = {"data": body(values)}
+        elif body:
+            kwargs["data"] = json.dumps(body(values), cls=DjangoJSONEncoder)
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                response = getattr(client, method.lower())(path, **kwargs)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(method != "GET")
+        return elapsed, queries, response
+
+    def user_states(self, rng, count):
+        """
+        Per user: cookies, a home time zone, the local days with activities, their categories and
+        a report job, for up to COUNT users with activities
+        """
+        users = list(
+            User.objects.filter(Exists(Activity.objects.filter(author=OuterRef("pk"))))
+            .annotate(first=Min("activity__start_time"), last=Max("activity__end_time"))
+            .order_by("pk")[:count]
+        )
+        if not users:
+            raise CommandError("No users with activities, create some with manage.py seed_synthetic_data.")
+
+        default_category = Category.objects.filter(is_default=True).values_list("id", flat=True).first()
+        client = Client()
+        states = []
+        for user in users:
+            tz = rng.choice(TIMEZONES)
+            state = {
+                "user": user,
+                "cookies": self.cookies(user),
+                "tz": tz,
+                "days": (user.first.astimezone(ZoneInfo(tz)).date(), user.last.astimezone(ZoneInfo(tz)).date()),
+                "last": user.last,
+                "categories": list(Category.objects.filter(user=user).values_list("id", flat=True)),
+                "default_category": default_category,
+            }
+            client.cookies.load(state["cookies"])
+            response = client.post(
+                "/api/reports/jobs/",
+                json.dumps({"kind": "summary", "params": {"start": str(state["days"][0]), "end": str(state["days"][1])}}),
+                content_type="application/json",
+            )
+            state["job"] = response.json()["id"]
+            if not state["categories"]:
+                # CATEGORY WRITES GO TO AN OWN CATEGORY, WRITES TO A DEFAULT ONE CASCADE OVER EVERY USER
+                state["categories"] = [Category.objects.create(name="Benchmark", color="#000000", user=user).id]
+            states.append(state)
+        return states
+
+    def cookies(self, user):
+        access, refresh = AccessToken.for_user(user), RefreshToken.for_user(user)
+        access.set_exp(lifetime=TOKEN_LIFETIME)
+        refresh.set_exp(lifetime=TOKEN_LIFETIME)
+        return {
+            settings.SIMPLE_JWT["AUTH_COOKIE"]: str(access),
+            settings.SIMPLE_JWT["AUTH_COOKIE_REFRESH"]: str(refresh),
+        }
+
+    def request_values(self, rng, state, staff):
+        """
+        Path and body values of a request as the user of STATE about a random day of their history
+        """
+        values = {"tz": state["tz"], "staff": staff.username}
+        if "days" not in state:
+            return values
+
+        first, last = state["days"]
+        day = first + timedelta(days=rng.randrange(max((last - first).days, 1)))
+        user = state["user"]
+        moment = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+        activity = (
+            Activity.objects.filter(author=user, start_time__gte=moment).order_by("start_time").values_list("id", flat=True).first()
+        )
+        return {
+            **values,
+            "date": day,
+            "start": day - timedelta(days=29),
+            "end": day + timedelta(days=1),
+            "activity": activity,
+            "category": rng.choice(state["categories"]),
+            "default_category": state["default_category"],
+            "job": state["job"],
+            # AN HOUR AFTER THE LAST ACTIVITY, WHERE NEW ONES DO NOT OVERLAP
+            "free": state["last"] + timedelta(hours=1),
+        }
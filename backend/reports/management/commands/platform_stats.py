@@ -0,0 +1,42 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.platform import parse_platform_params, platform_stats
+
+
+class Command(BaseCommand):
+    help = "Compute platform-wide category and hours statistics of all users"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First UTC date included (YYYY-MM-DD, default: all time)")
+        parser.add_argument("--end", help="UTC date the statistics stop at, exclusive (YYYY-MM-DD)")
+        parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+        parser.add_argument("--json", action="store_true", help="Print the statistics as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            start, end = parse_platform_params(options)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+        stats = platform_stats(start, end, workers=options["workers"])
+        elapsed = time.perf_counter() - started
+
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+
+        per_user = stats["hours_per_user"]
+        self.stdout.write(
+            f"{stats['users']} users, {stats['activities']} activities, {stats['hours']} hours "
+            f"(per user: avg {per_user['avg']}, median {per_user['median']}, p90 {per_user['p90']})."
+        )
+        for category in stats["categories"]:
+            self.stdout.write(
+                f"  {category['name']}: {category['hours']} hours, "
+                f"{category['activities']} activities, {category['users']} users"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Computed in {elapsed:.1f}s."))
@@ -0,0 +1,35 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from activities.models import Activity
+from reports.cache import bump_data_version
+from reports.models import HourlyRollup
+from reports.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly report rollups from activities"
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="*", help="Only rebuild these users (default: everyone)")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["usernames"]:
+            users = dict(User.objects.filter(username__in=options["usernames"]).values_list("username", "id"))
+            missing = set(options["usernames"]) - set(users)
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}.")
+            user_ids = list(users.values())
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            written = rebuild(Activity, HourlyRollup, user_ids)
+            for user_id in user_ids or [None]:
+                bump_data_version(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} rollup rows in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,83 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from reports.jobs import claim_job, requeue_stale_jobs, run_job
+
+# SECONDS BETWEEN CHECKS FOR JOBS ABANDONED BY A WORKER THAT DIED
+REQUEUE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Run queued report jobs until interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Jobs run at the same time")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument(
+            "--stale-after", type=int, default=30,
+            help="Minutes after which a running job is considered abandoned and queued again",
+        )
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        workers = max(1, options["workers"])
+        stale_after = timedelta(minutes=options["stale_after"])
+        self.stdout.write(f"Running report jobs with {workers} workers.")
+
+        # A SINGLE WORKER RUNS IN THIS THREAD, MORE RUN IN THREADS OF THEIR OWN
+        threads = [
+            threading.Thread(target=self.work, args=(stop, options["poll"], options["once"], stale_after))
+            for _ in range(workers if workers > 1 else 0)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            if not threads:
+                self.work(stop, options["poll"], options["once"], stale_after)
+            # JOIN WITH A TIMEOUT SO CTRL+C IS NOT BLOCKED
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the running jobs finish.")
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def work(self, stop, poll, once, stale_after):
+        """
+        Claim and run jobs one at a time until STOP is set (or the queue is empty with ONCE),
+        queueing jobs running for longer than STALE_AFTER again every REQUEUE_INTERVAL seconds
+        """
+        next_requeue = 0
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                # NOT ONLY AT STARTUP, A WORKER MAY DIE WHILE THIS ONE KEEPS RUNNING
+                if time.monotonic() >= next_requeue:
+                    requeued = requeue_stale_jobs(stale_after)
+                    if requeued:
+                        self.stdout.write(f"Queued {requeued} abandoned jobs again.")
+                    next_requeue = time.monotonic() + REQUEUE_INTERVAL
+
+                job = claim_job()
+                if job is None:
+                    if once:
+                        return
+                    stop.wait(poll)
+                    continue
+
+                started = time.perf_counter()
+                job = run_job(job)
+                self.stdout.write(
+                    f"{job.kind} job {job.pk} {job.status} in {time.perf_counter() - started:.1f}s."
+                )
+        finally:
+            # EACH THREAD HAS ITS OWN CONNECTION
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reports.cache import REPORT_CACHE, recent_timezones
+from reports.warming import recently_active_users, warm_dates, warm_user_reports
+
+# KEEPS OVERLAPPING CRON RUNS FROM WARMING THE SAME CACHE TWICE
+LOCK_KEY = "reports:warming"
+
+
+class Command(BaseCommand):
+    help = "Precompute the dashboard reports of recently active users into the report cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Warm users with activities in the last DAYS days")
+        parser.add_argument("--limit", type=int, help="Warm at most this many users, most recently active first")
+        parser.add_argument("--concurrency", type=int, default=4, help="Users warmed at the same time")
+        parser.add_argument("--tz", default="UTC", help="Time zone of users with no report requested yet")
+        parser.add_argument(
+            "--lock-timeout", type=int, default=60 * 60,
+            help="Seconds after which a lock left by an earlier run is ignored",
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[REPORT_CACHE]
+        if isinstance(cache, (LocMemCache, DummyCache)):
+            # ENTRIES WARMED HERE WOULD DIE WITH THIS PROCESS, UNSEEN BY THE WEB SERVER
+            raise CommandError("The report cache is not shared between processes. Set REDIS_URL to warm it.")
+
+        if not cache.add(LOCK_KEY, datetime.now(timezone.utc).isoformat(), timeout=options["lock_timeout"]):
+            self.stdout.write(f"Another warming run started at {cache.get(LOCK_KEY)} is still going, skipping.")
+            return
+
+        try:
+            self.warm(options)
+        finally:
+            cache.delete(LOCK_KEY)
+
+    def warm(self, options):
+        started = time.perf_counter()
+        user_ids = recently_active_users(datetime.now(timezone.utc) - timedelta(days=options["days"]), options["limit"])
+        users = User.objects.in_bulk(user_ids)
+        timezones = recent_timezones(user_ids)
+
+        warmed = cached = failed = 0
+        concurrency = max(1, options["concurrency"])
+        jobs = [(users[user_id], timezones.get(user_id, options["tz"])) for user_id in user_ids]
+
+        # A CONCURRENCY OF ONE RUNS IN THIS THREAD, MORE IN A BOUNDED POOL
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(lambda job: self.warm_user(*job), jobs))
+        else:
+            results = [self.warm_user(*job) for job in jobs]
+
+        for (user, _), (user_warmed, user_cached, error) in zip(jobs, results):
+            if error:
+                # ONE USER'S FAILURE DOES NOT STOP THE RUN
+                failed += 1
+                self.stderr.write(f"Warming the reports of {user.username} failed: {error}")
+            warmed += user_warmed
+            cached += user_cached
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {warmed} reports of {len(user_ids)} users ({cached} already cached, {failed} users failed) "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def warm_user(self, user, tz_name):
+        """
+        Returns (warmed, already cached, error) for one user
+        """
+        try:
+            return (*warm_user_reports(user, tz_name, warm_dates(tz_name)), None)
+        except Exception as exc:
+            return 0, 0, exc
+        finally:
+            # EACH POOL THREAD HAS ITS OWN CONNECTION
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:09
+
+from collections import defaultdict
+from datetime import timedelta, timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# A COPY OF REPORTS.ROLLUPS AS OF THIS MIGRATION, WHICH MUST KEEP WORKING HOWEVER THAT MODULE CHANGES
+HOUR = timedelta(hours=1)
+CHUNK_SIZE = 5000
+
+
+def split_by_hour(start, end):
+    bucket = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    while bucket < end:
+        next_bucket = bucket + HOUR
+        yield bucket, min(end, next_bucket) - max(start, bucket)
+        bucket = next_bucket
+
+
+def backfill_rollups(apps, schema_editor):
+    Activity = apps.get_model('activities', 'Activity')
+    HourlyRollup = apps.get_model('reports', 'HourlyRollup')
+
+    pending = defaultdict(timedelta)
+    current_user = None
+
+    def flush():
+        HourlyRollup.objects.bulk_create(
+            HourlyRollup(user_id=current_user, category_id=category_id, bucket=bucket, duration=duration)
+            for (category_id, bucket), duration in pending.items()
+        )
+        pending.clear()
+
+    # ONE USER'S ROWS AT A TIME, SO MEMORY IS BOUNDED BY THE LARGEST HISTORY
+    rows = (
+        Activity.objects.order_by('author_id')
+        .values_list('author_id', 'category_id', 'start_time', 'end_time')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for author_id, category_id, start, end in rows:
+        if author_id != current_user:
+            flush()
+            current_user = author_id
+        for bucket, duration in split_by_hour(start, end):
+            pending[(category_id, bucket)] += duration
+    flush()
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('activities', '0002_activity_overlap_guards'),
+        ('categories', '0003_category_description_alter_category_color'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('duration', models.DurationField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='categories.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'bucket', 'category'), name='hourly_rollup_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
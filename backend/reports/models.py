@@ -1,3 +1,68 @@
+from django.contrib.auth.models import User
 from django.db import models
 
-# Create your models here.
+from categories.models import Category
+
+
+class HourlyRollup(models.Model):
+    """
+    Time a user spent on a category within one UTC hour.
+    Kept up to date from activity writes by reports.signals.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    bucket = models.DateTimeField()  # START OF THE UTC HOUR
+    duration = models.DurationField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "bucket", "category"], name="hourly_rollup_unique_bucket"),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.category_id} {self.bucket:%Y-%m-%d %H:00} {self.duration}'
+
+
+class ReportJob(models.Model):
+    """
+    Report computed off the request path by the report worker (manage.py run_report_worker).
+    Identical requests of a user share one job while their data is unchanged.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    key = models.CharField(max_length=40)  # HASH OF KIND AND PARAMS
+    data_version = models.CharField(max_length=80)  # USER'S DATA VERSION WHEN SUBMITTED
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="report_job_queue_idx"),
+        ]
+        constraints = [
+            # ONE LIVE OR REUSABLE JOB PER REQUEST AND DATA VERSION, FAILED ONES CAN BE RETRIED
+            models.UniqueConstraint(
+                fields=["user", "key", "data_version"],
+                condition=~models.Q(status="failed"),
+                name="report_job_unique_request",
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} job {self.pk} of {self.user_id} ({self.status})'
@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timezone
+from statistics import median
+
+from django.db import connections
+from django.db.models import Count, Value
+from django.db.models.functions import Greatest, Least
+
+from activities.models import Activity
+from categories.models import Category
+from reports.platform_workers import run_partition, setup_worker
+from reports.ranges import EpochMicroseconds, to_micros
+
+# ROWS FETCHED PER ROUND TRIP WHILE STREAMING A PARTITION
+STREAM_CHUNK_SIZE = 10000
+
+# PARTITIONS PER WORKER, SMALLER PIECES EVEN OUT UNEQUAL USERS
+PARTITIONS_PER_WORKER = 4
+
+
+def parse_platform_params(params):
+    """
+    Return the optional UTC (start, end) dates of platform statistics params.
+    Raises ValueError with a message for the client when they are invalid.
+    """
+    try:
+        start = date.fromisoformat(params["start"]) if params.get("start") else None
+        end = date.fromisoformat(params["end"]) if params.get("end") else None
+    except ValueError:
+        raise ValueError("Invalid start/end. Use YYYY-MM-DD.")
+    if start and end and end <= start:
+        raise ValueError("End must be after start.")
+    return start, end
+
+
+def partition_authors(parts):
+    """
+    Split the authors of all activities into at most PARTS contiguous (first id, last id) ranges
+    holding about the same number of activities
+    """
+    counts = list(
+        Activity.objects.values_list("author_id").annotate(activities=Count("id")).order_by("author_id")
+    )
+    target = sum(activities for _, activities in counts) / max(parts, 1)
+
+    ranges, first, filled = [], None, 0
+    for author_id, activities in counts:
+        first = author_id if first is None else first
+        filled += activities
+        if filled >= target * (len(ranges) + 1):
+            ranges.append((first, author_id))
+            first = None
+    if first is not None:
+        ranges.append((first, counts[-1][0]))
+    return ranges
+
+
+def partition_stats(first_author, last_author, start=None, end=None):
+    """
+    Statistics per category id of the activities of authors first_author to last_author,
+    streamed in chunks. Authors never span partitions, so partition counts simply add up.
+    """
+    activities = Activity.objects.filter(author_id__gte=first_author, author_id__lte=last_author)
+    # DURATIONS AS PLAIN MICROSECONDS, NO TIMEDELTAS TO BUILD PER ROW
+    started, ended = EpochMicroseconds("start_time"), EpochMicroseconds("end_time")
+    if start or end:
+        start = datetime.combine(start or date.min, time.min, tzinfo=timezone.utc)
+        end = datetime.combine(end or date.max, time.min, tzinfo=timezone.utc)
+        activities = activities.filter(start_time__lt=end, end_time__gt=start)
+        started, ended = Greatest(started, Value(to_micros(start))), Least(ended, Value(to_micros(end)))
+
+    category_micros = Counter()
+    category_activities = Counter()
+    category_users = defaultdict(set)
+    user_micros = Counter()
+
+    rows = activities.values_list("author_id", "category_id", started, ended).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for author_id, category_id, started_at, ended_at in rows:
+        category_micros[category_id] += ended_at - started_at
+        category_activities[category_id] += 1
+        category_users[category_id].add(author_id)
+        user_micros[author_id] += ended_at - started_at
+
+    return {
+        "category_micros": category_micros,
+        "category_activities": category_activities,
+        "category_users": {category_id: list(users) for category_id, users in category_users.items()},
+        "user_micros": list(user_micros.values()),
+    }
+
+
+def platform_stats(start=None, end=None, workers=None):
+    """
+    Platform-wide activity statistics, optionally of the UTC dates from start to end (exclusive).
+    Author id ranges are computed in parallel by WORKERS processes (all cores by default).
+    """
+    workers = workers or os.cpu_count() or 1
+    partitions = [(first, last, start, end) for first, last in partition_authors(workers * PARTITIONS_PER_WORKER)]
+
+    if workers == 1 or len(partitions) <= 1:
+        partials = [run_partition(partition) for partition in partitions]
+    else:
+        # SPAWNED, NOT FORKED: A FORK WOULD COPY THIS PROCESS'S CONNECTIONS, POOLS AND LOCKS HELD BY
+        # ITS OTHER THREADS (THE REPORT WORKER RUNS SEVERAL JOBS AT ONCE)
+        database_names = {connection.alias: connection.settings_dict["NAME"] for connection in connections.all()}
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_worker,
+            initargs=(database_names,),
+        ) as pool:
+            partials = list(pool.map(run_partition, partitions))
+
+    # MERGE BY CATEGORY NAME, USERS WITH CATEGORIES OF THE SAME NAME ARE COUNTED TOGETHER
+    category_ids = set().union(*(partial["category_micros"] for partial in partials))
+    names = dict(Category.objects.filter(id__in=category_ids).values_list("id", "name"))
+    category_micros, category_activities, category_users = Counter(), Counter(), defaultdict(set)
+    user_micros = []
+    for partial in partials:
+        for category_id, micros in partial["category_micros"].items():
+            name = names.get(category_id)
+            category_micros[name] += micros
+            category_activities[name] += partial["category_activities"][category_id]
+            category_users[name].update(partial["category_users"][category_id])
+        user_micros.extend(partial["user_micros"])
+
+    user_hours = sorted(micros / 3.6e9 for micros in user_micros)
+    return {
+        "start": str(start) if start else None,
+        "end": str(end) if end else None,
+        "users": len(user_hours),
+        "activities": sum(category_activities.values()),
+        "hours": round(sum(user_hours), 2),
+        "hours_per_user": {
+            "avg": round(sum(user_hours) / len(user_hours), 2) if user_hours else None,
+            "median": round(median(user_hours), 2) if user_hours else None,
+            "p90": round(user_hours[int(0.9 * (len(user_hours) - 1))], 2) if user_hours else None,
+        },
+        "categories": [
+            {
+                "name": name,
+                "hours": round(micros / 3.6e9, 2),
+                "activities": category_activities[name],
+                "users": len(category_users[name]),
+            }
+            for name, micros in category_micros.most_common()
+        ],
+    }
@@ -0,0 +1,21 @@
+import django
+from django.db import connections
+
+# SPAWNED WORKER PROCESSES IMPORT THIS MODULE BEFORE DJANGO IS SET UP, SO IT MUST NOT IMPORT
+# MODELS AT THE TOP
+
+
+def setup_worker(database_names):
+    """
+    Set Django up in a spawned worker process, on the databases the parent process uses
+    (a test database included)
+    """
+    django.setup()
+    for alias, name in database_names.items():
+        connections[alias].settings_dict["NAME"] = name
+
+
+def run_partition(args):
+    from reports.platform import partition_stats
+
+    return partition_stats(*args)
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import timedelta, timezone
+
+from activities.locking import author_timeline_lock
+
+HOUR = timedelta(hours=1)
+
+# ACTIVITIES READ PER ROUND TRIP WHEN REBUILDING
+REBUILD_CHUNK_SIZE = 5000
+
+
+def floor_hour(moment):
+    """
+    Start of the UTC hour containing MOMENT
+    """
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def is_hour_aligned(moment):
+    return moment == floor_hour(moment)
+
+
+def split_by_hour(start, end):
+    """
+    Yield (bucket, duration) for every UTC hour the interval [start, end) touches
+    """
+    bucket = floor_hour(start)
+    while bucket < end:
+        next_bucket = bucket + HOUR
+        yield bucket, min(end, next_bucket) - max(start, bucket)
+        bucket = next_bucket
+
+
+def interval_deltas(removed=(), added=()):
+    """
+    Net change per (category_id, bucket) of removing and adding (category_id, start, end) intervals
+    """
+    deltas = defaultdict(timedelta)
+    for intervals, sign in ((removed, -1), (added, 1)):
+        for category_id, start, end in intervals:
+            for bucket, duration in split_by_hour(start, end):
+                deltas[(category_id, bucket)] += duration * sign
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def apply_changes(user_id, removed=(), added=()):
+    """
+    Move a user's rollup rows by the intervals removed from and added to their timeline.
+    Reads and writes all touched rows in a constant number of queries.
+    """
+    from reports.models import HourlyRollup
+
+    deltas = interval_deltas(removed, added)
+    if not deltas:
+        return
+
+    buckets = [bucket for _, bucket in deltas]
+    with author_timeline_lock(user_id):
+        existing = {
+            (row.category_id, row.bucket): row
+            for row in HourlyRollup.objects.filter(
+                user_id=user_id,
+                bucket__gte=min(buckets),
+                bucket__lte=max(buckets),
+                category_id__in={category_id for category_id, _ in deltas},
+            )
+        }
+
+        to_create, to_update, to_delete = [], [], []
+        for (category_id, bucket), delta in deltas.items():
+            row = existing.get((category_id, bucket))
+            if row is None:
+                # NOTHING TO SUBTRACT FROM, E.G. THE CATEGORY IS BEING DELETED WITH ITS ROLLUPS
+                if delta > timedelta(0):
+                    to_create.append(HourlyRollup(user_id=user_id, category_id=category_id, bucket=bucket, duration=delta))
+                continue
+
+            row.duration += delta
+            if row.duration > timedelta(0):
+                to_update.append(row)
+            else:
+                to_delete.append(row.pk)
+
+        HourlyRollup.objects.bulk_create(to_create)
+        HourlyRollup.objects.bulk_update(to_update, ["duration"])
+        HourlyRollup.objects.filter(pk__in=to_delete).delete()
+
+
+def rebuild(activity_model, rollup_model, user_ids=None):
+    """
+    Recompute rollups from scratch, for the given users or everyone.
+    Returns the number of rollup rows written.
+    """
+    activities = activity_model.objects.all()
+    rollups = rollup_model.objects.all()
+    if user_ids is not None:
+        activities = activities.filter(author_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+    rollups.delete()
+
+    written = 0
+    pending = defaultdict(timedelta)
+    current_user = None
+
+    def flush():
+        rollup_model.objects.bulk_create(
+            rollup_model(user_id=current_user, category_id=category_id, bucket=bucket, duration=duration)
+            for (category_id, bucket), duration in pending.items()
+        )
+        return len(pending)
+
+    # ONE USER'S ROWS AT A TIME, SO MEMORY IS BOUNDED BY THE LARGEST HISTORY
+    rows = (
+        activities.order_by("author_id")
+        .values_list("author_id", "category_id", "start_time", "end_time")
+        .iterator(chunk_size=REBUILD_CHUNK_SIZE)
+    )
+    for author_id, category_id, start, end in rows:
+        if author_id != current_user:
+            written += flush()
+            pending.clear()
+            current_user = author_id
+        for bucket, duration in split_by_hour(start, end):
+            pending[(category_id, bucket)] += duration
+
+    written += flush()
+    return written
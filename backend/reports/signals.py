@@ -0,0 +1,63 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from activities.models import Activity
+from activities.signals import activities_bulk_changed
+from categories.models import Category
+from reports.cache import bump_data_version
+from reports.rollups import apply_changes
+
+
+@receiver(pre_save, sender=Activity)
+def remember_previous_interval(sender, instance, raw=False, **kwargs):
+    """
+    Keep the stored interval of an activity about to be updated, so its rollup can be moved
+    """
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = (
+            Activity.objects.filter(pk=instance.pk)
+            .values_list("author_id", "category_id", "start_time", "end_time")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Activity)
+def rollup_saved_activity(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = getattr(instance, "_rollup_previous", None)
+    added = [(instance.category_id, instance.start_time, instance.end_time)]
+
+    if previous is None:
+        apply_changes(instance.author_id, added=added)
+    elif previous[0] == instance.author_id:
+        apply_changes(instance.author_id, removed=[previous[1:]], added=added)
+    else:
+        # THE ACTIVITY CHANGED HANDS
+        apply_changes(previous[0], removed=[previous[1:]])
+        apply_changes(instance.author_id, added=added)
+        bump_data_version(previous[0])
+
+    bump_data_version(instance.author_id)
+
+
+@receiver(post_delete, sender=Activity)
+def rollup_deleted_activity(sender, instance, **kwargs):
+    apply_changes(instance.author_id, removed=[(instance.category_id, instance.start_time, instance.end_time)])
+    bump_data_version(instance.author_id)
+
+
+@receiver(activities_bulk_changed)
+def rollup_bulk_changes(sender, author_id, removed=(), added=(), **kwargs):
+    apply_changes(author_id, removed=removed, added=added)
+    bump_data_version(author_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_reports(sender, instance, raw=False, **kwargs):
+    # DEFAULT CATEGORIES APPEAR IN EVERYONE'S REPORTS
+    if not raw:
+        bump_data_version(instance.user_id)
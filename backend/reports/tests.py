@@ -1,3 +1,1138 @@
-from django.test import TestCase
+# These tests check report generation against a straightforward per-activity Python
+# implementation, and that the hourly rollups it reads stay in sync with activity writes.
 
-# Create your tests here.
+import io
+import json
+import os
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from random import Random
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from activities.models import Activity
+from backend.asgi import ASGI_URLCONF
+from categories.index import category_versions
+from categories.models import Category
+from reports.analytics import MOODS
+from reports.async_views import daily_report
+from reports.cache import REPORT_CACHE, bump_data_version, get_data_version, timezone_key, version_key
+from reports.gaps import find_gaps
+from reports.heatmap import hour_cells
+from reports.jobs import ReportJobListView, run_job
+from reports.management.commands import run_report_worker
+from reports.management.commands.bench_endpoints import ENDPOINTS
+from reports.models import HourlyRollup, ReportJob
+from reports.platform import partition_authors, platform_stats
+from reports.ranges import EpochMicroseconds, bucket_edges, covered_time, to_micros
+from reports.rollups import apply_changes
+from reports.views import generate_report
+from utils.metrics import request_metrics
+from utils.models import DataVersion
+
+DAY = datetime(2025, 6, 2, tzinfo=timezone.utc)
+
+
+def reference_report(user, start_date, end_date, period_label):
+    """
+    Load every activity and sum durations in Python, clipped to the time frame
+    """
+    durations = defaultdict(timedelta)
+    for act in Activity.objects.filter(author=user, start_time__lt=end_date, end_time__gt=start_date):
+        durations[act.category.name] += min(act.end_time, end_date) - max(act.start_time, start_date)
+    activity_summary = {name: duration.total_seconds() / 3600 for name, duration in durations.items()}
+    total_hours = sum(activity_summary.values())
+
+    total_period_hours = (end_date - start_date).total_seconds() / 3600
+    undefined_hours = total_period_hours - total_hours
+    if undefined_hours > 0:
+        activity_summary["undefined"] = undefined_hours
+
+    activities_list = [
+        {
+            "name": name,
+            "hours": round(hours, 2),
+            "percentage": round((hours / total_period_hours) * 100, 2)
+        }
+        for name, hours in activity_summary.items()
+    ]
+    return {
+        "period": period_label,
+        "activities": sorted(activities_list, key=lambda a: a["hours"], reverse=True)
+    }
+
+
+def seed_activities(user, categories, start, days, seed=7):
+    """
+    Create back-to-back activities of random length and category over DAYS days
+    """
+    rng = Random(seed)
+    cursor = start
+    while cursor < start + timedelta(days=days):
+        end = cursor + timedelta(minutes=rng.randint(5, 300), seconds=rng.randint(0, 59))
+        Activity.objects.create(
+            author=user, category=rng.choice(categories), start_time=cursor, end_time=end,
+            energy_level=rng.randint(0, 10), mood="neutral",
+        )
+        # LEAVE SOME UNRECORDED TIME BETWEEN ACTIVITIES
+        cursor = end + timedelta(minutes=rng.choice([0, 0, 15, 90]))
+
+
+def by_name(report):
+    return {activity["name"]: activity for activity in report["activities"]}
+
+
+def start_versions(user):
+    """
+    Create the report and category versions of USER like their first request does, so query
+    counts are those of every later request
+    """
+    get_data_version(user.id)
+    category_versions(user.id)
+
+
+class GenerateReportTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.categories = [
+            Category.objects.create(name="Sleep", color="#000000", is_default=True),
+            Category.objects.create(name="Work", color="#111111", user=self.user),
+            Category.objects.create(name="Gym", color="#222222", user=self.user),
+            # SAME NAME AS A DEFAULT CATEGORY, REPORTED TOGETHER WITH IT
+            Category.objects.create(name="Sleep", color="#333333", user=self.user),
+        ]
+        seed_activities(self.user, self.categories, DAY - timedelta(days=40), days=60)
+        self.client.force_authenticate(user=self.user)
+
+    def assertMatchesReference(self, start, end):
+        report = generate_report(self.user, start, end, "label")
+        expected = reference_report(self.user, start, end, "label")
+        self.assertEqual(by_name(report), by_name(expected))
+        self.assertEqual(
+            [activity["hours"] for activity in report["activities"]],
+            [activity["hours"] for activity in expected["activities"]],
+        )
+
+    def test_matches_reference_for_daily_weekly_monthly_windows(self):
+        self.assertMatchesReference(DAY, DAY + timedelta(days=1))
+        self.assertMatchesReference(DAY, DAY + timedelta(days=7))
+        self.assertMatchesReference(DAY - timedelta(days=30), DAY)
+
+    def test_matches_reference_for_empty_window(self):
+        self.assertMatchesReference(DAY + timedelta(days=100), DAY + timedelta(days=101))
+
+    def test_query_count_does_not_depend_on_activity_count(self):
+        with self.assertNumQueries(1):
+            generate_report(self.user, DAY - timedelta(days=30), DAY, "label")
+
+    def test_report_endpoints(self):
+        for period in ("daily", "weekly", "monthly"):
+            response = self.client.get(f"/api/reports/{period}/?date=2025-06-02&tz=UTC")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("undefined", by_name(response.data))
+
+    def test_matches_reference_for_half_hour_timezone_windows(self):
+        # Test case: windows not on UTC hours (e.g. Asia/Kolkata days) are computed from activities
+        offset = timedelta(hours=5, minutes=30)
+        self.assertMatchesReference(DAY - offset, DAY + timedelta(days=1) - offset)
+        self.assertMatchesReference(DAY - timedelta(days=20) - offset, DAY - offset)
+
+    def test_daily_report_counts_activity_crossing_midnight(self):
+        Activity.objects.filter(author=self.user).delete()
+        Activity.objects.create(
+            author=self.user, category=self.categories[0], energy_level=3, mood="tired",
+            start_time=DAY - timedelta(hours=2), end_time=DAY + timedelta(hours=6),
+        )
+
+        response = self.client.get("/api/reports/daily/?date=2025-06-02&tz=UTC")
+        self.assertEqual(by_name(response.data)["Sleep"]["hours"], 6.0)
+        self.assertEqual(by_name(response.data)["undefined"]["hours"], 18.0)
+
+
+class HourlyRollupTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        self.gym = Category.objects.create(name="Gym", color="#222222", user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def rollups(self):
+        return {
+            (row.category_id, row.bucket): row.duration
+            for row in HourlyRollup.objects.filter(user=self.user)
+        }
+
+    def payload(self, category, start, end):
+        return {
+            "category_id": category.id, "start_time": start.isoformat(), "end_time": end.isoformat(),
+            "energy_level": 5, "mood": "happy",
+        }
+
+    def test_activity_is_split_across_hours(self):
+        self.client.post("/api/activities/", self.payload(
+            self.work, DAY + timedelta(hours=9, minutes=45), DAY + timedelta(hours=11, minutes=15)
+        ))
+
+        self.assertEqual(self.rollups(), {
+            (self.work.id, DAY + timedelta(hours=9)): timedelta(minutes=15),
+            (self.work.id, DAY + timedelta(hours=10)): timedelta(hours=1),
+            (self.work.id, DAY + timedelta(hours=11)): timedelta(minutes=15),
+        })
+
+    def test_update_and_delete_move_rollups(self):
+        response = self.client.post("/api/activities/", self.payload(
+            self.work, DAY + timedelta(hours=9), DAY + timedelta(hours=10, minutes=30)
+        ))
+        activity_id = response.data["id"]
+
+        self.client.put(f"/api/activities/{activity_id}/", self.payload(
+            self.gym, DAY + timedelta(hours=10), DAY + timedelta(hours=11)
+        ))
+        self.assertEqual(self.rollups(), {(self.gym.id, DAY + timedelta(hours=10)): timedelta(hours=1)})
+
+        self.client.delete(f"/api/activities/{activity_id}/")
+        self.assertEqual(self.rollups(), {})
+
+    def test_bulk_writes_update_rollups(self):
+        response = self.client.post("/api/activities/", self.payload(self.work, DAY, DAY + timedelta(minutes=30)))
+        items = [
+            self.payload(self.gym, DAY + timedelta(minutes=30), DAY + timedelta(hours=1)),
+            {"id": response.data["id"], "category_id": self.gym.id},
+        ]
+        self.client.post("/api/activities/bulk/", items, format="json")
+
+        self.assertEqual(self.rollups(), {(self.gym.id, DAY): timedelta(hours=1)})
+
+    def test_rebuild_matches_incremental_rollups(self):
+        seed_activities(self.user, [self.work, self.gym], DAY, days=5)
+        incremental = self.rollups()
+
+        call_command("rebuild_rollups", stdout=io.StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_trend_reads_rollups(self):
+        seed_activities(self.user, [self.work, self.gym], DAY, days=7)
+
+        response = self.client.get("/api/reports/trends/category/?type=daily&date=2025-06-08")
+        work = next(entry for entry in response.data["data"] if entry["category_id"] == self.work.id)
+        expected = generate_report(self.user, DAY + timedelta(days=6), DAY + timedelta(days=7), "")
+        self.assertEqual(work["trend"][-1]["hours"], by_name(expected)["Work"]["hours"])
+
+
+class CategoryTrendTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        self.gym = Category.objects.create(name="Gym", color="#222222", user=self.user)
+        seed_activities(self.user, [self.work, self.gym], DAY - timedelta(days=70), days=80)
+        self.client.force_authenticate(user=self.user)
+
+    def trend(self, query):
+        response = self.client.get(f"/api/reports/trends/category/?{query}")
+        self.assertEqual(response.status_code, 200)
+        work = next(entry for entry in response.data["data"] if entry["category_id"] == self.work.id)
+        return {point["label"]: point["hours"] for point in work["trend"]}
+
+    def expected_hours(self, start, end):
+        return by_name(generate_report(self.user, start, end, "")).get("Work", {"hours": 0.0})["hours"]
+
+    def test_daily_buckets_follow_the_timezone(self):
+        tokyo = ZoneInfo("Asia/Tokyo")
+        trend = self.trend("type=daily&date=2025-06-08&tz=Asia/Tokyo")
+
+        self.assertEqual(len(trend), 7)
+        for label, hours in trend.items():
+            day = datetime.combine(date.fromisoformat(label), datetime.min.time(), tzinfo=tokyo)
+            self.assertAlmostEqual(hours, self.expected_hours(day, day + timedelta(days=1)), delta=0.011)
+
+    def test_weekly_buckets_start_on_monday(self):
+        trend = self.trend("type=weekly&date=2025-06-08")
+
+        # 2025-06-02 IS THE MONDAY OF WEEK 23
+        self.assertAlmostEqual(
+            trend["2025-W23"], self.expected_hours(DAY, DAY + timedelta(days=7)), delta=0.011
+        )
+
+    def test_monthly_buckets(self):
+        trend = self.trend("type=monthly&date=2025-06-08")
+        may = datetime(2025, 5, 1, tzinfo=timezone.utc)
+
+        self.assertAlmostEqual(trend["2025-05"], self.expected_hours(may, DAY - timedelta(days=1)), delta=0.011)
+
+    def test_buckets_are_summed_in_one_query(self):
+        start_versions(self.user)
+        # REPORT AND CATEGORY VERSIONS, CATEGORIES AND ONE GROUPED ROLLUP QUERY
+        with self.assertNumQueries(4):
+            self.client.get("/api/reports/trends/category/?type=monthly&date=2025-06-08&tz=Europe/Berlin")
+
+    def test_half_hour_timezone_buckets_are_exact(self):
+        kolkata = ZoneInfo("Asia/Kolkata")
+        for trend_type, granularity in (("daily", "day"), ("weekly", "week"), ("monthly", "month")):
+            trend = self.trend(f"type={trend_type}&date=2025-06-08&tz=Asia/Kolkata")
+            labels, edges = bucket_edges(date(2025, 4, 1), date(2025, 6, 9), granularity, kolkata)
+            for label, start, end in zip(labels, edges, edges[1:]):
+                # BUCKETS CUT BY THE START OF THE CHECKED RANGE ARE NOT COMPARABLE
+                if label in trend and start > edges[0]:
+                    self.assertEqual(trend[label], self.expected_hours(start, end), label)
+
+    def test_half_hour_timezone_reads_activities_once(self):
+        start_versions(self.user)
+        # REPORT AND CATEGORY VERSIONS, CATEGORIES AND ONE QUERY WITH A CLIPPED SUM PER BUCKET
+        with self.assertNumQueries(4):
+            self.client.get("/api/reports/trends/category/?type=monthly&date=2025-06-08&tz=Asia/Kolkata")
+
+    def test_activity_crossing_local_midnight_is_split(self):
+        Activity.objects.filter(author=self.user).delete()
+        kolkata = ZoneInfo("Asia/Kolkata")
+        Activity.objects.create(
+            author=self.user, category=self.work, energy_level=5, mood="happy",
+            start_time=datetime(2025, 6, 7, 22, tzinfo=kolkata), end_time=datetime(2025, 6, 8, 1, tzinfo=kolkata),
+        )
+
+        trend = self.trend("type=daily&date=2025-06-08&tz=Asia/Kolkata")
+        self.assertEqual((trend["2025-06-07"], trend["2025-06-08"]), (2.0, 1.0))
+
+    def test_invalid_timezone(self):
+        response = self.client.get("/api/reports/trends/category/?tz=Mars/Olympus")
+        self.assertEqual(response.status_code, 400)
+
+
+class DashboardTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.categories = [
+            Category.objects.create(name="Sleep", color="#000000", is_default=True),
+            Category.objects.create(name="Work", color="#111111", user=self.user),
+            Category.objects.create(name="Gym", color="#222222", user=self.user),
+        ]
+        seed_activities(self.user, self.categories, DAY - timedelta(days=70), days=80)
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertMatchesSeparateEndpoints(self, query, trend_type="daily"):
+        dashboard = self.get(f"/api/reports/dashboard/?{query}&trend_type={trend_type}")
+
+        for period in ("daily", "weekly", "monthly"):
+            self.assertEqual(dashboard[period], self.get(f"/api/reports/{period}/?{query}"))
+        trend = self.get(f"/api/reports/trends/category/?{query}&type={trend_type}")
+        self.assertEqual(dashboard["trends"], trend)
+
+    def test_matches_separate_endpoints(self):
+        self.assertMatchesSeparateEndpoints("date=2025-06-04&tz=UTC")
+        self.assertMatchesSeparateEndpoints("date=2025-06-04&tz=Asia/Tokyo", trend_type="weekly")
+        self.assertMatchesSeparateEndpoints("date=2025-06-04&tz=America/New_York", trend_type="monthly")
+
+    def test_half_hour_timezone_matches_separate_endpoints(self):
+        self.assertMatchesSeparateEndpoints("date=2025-06-04&tz=Asia/Kolkata", trend_type="weekly")
+
+    def test_reads_activities_once(self):
+        start_versions(self.user)
+        # REPORT AND CATEGORY VERSIONS, CATEGORIES OF THE TREND AND ONE GROUPED ROLLUP QUERY
+        with self.assertNumQueries(4):
+            self.get("/api/reports/dashboard/?date=2025-06-04&tz=Europe/Berlin&trend_type=monthly")
+
+    def test_invalid_parameters(self):
+        for query in ("date=June", "tz=Mars/Olympus", "categories=a,b"):
+            response = self.client.get(f"/api/reports/dashboard/?{query}")
+            self.assertEqual(response.status_code, 400)
+
+
+class RangeReportTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.categories = [
+            Category.objects.create(name="Sleep", color="#000000", is_default=True),
+            Category.objects.create(name="Work", color="#111111", user=self.user),
+            Category.objects.create(name="Gym", color="#222222", user=self.user),
+        ]
+        seed_activities(self.user, self.categories, DAY - timedelta(days=70), days=80)
+        self.client.force_authenticate(user=self.user)
+
+    def range(self, query):
+        response = self.client.get(f"/api/reports/range/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertMatchesReports(self, data, tz):
+        # EVERY BUCKET HOLDS WHAT A REPORT OF THE SAME LOCAL DATES HOLDS
+        hours = {entry["category_name"]: entry["hours"] for entry in data["data"]}
+        labels, edges = bucket_edges(
+            date.fromisoformat(data["start"]), date.fromisoformat(data["end"]), data["granularity"], tz
+        )
+        self.assertEqual(data["labels"], labels)
+        for i, (start, end) in enumerate(zip(edges, edges[1:])):
+            expected = by_name(generate_report(self.user, start, end, ""))
+            for name, series in hours.items():
+                self.assertAlmostEqual(series[i], expected.get(name, {"hours": 0.0})["hours"], delta=0.011)
+            self.assertAlmostEqual(data["undefined"][i], expected.get("undefined", {"hours": 0.0})["hours"], delta=0.011)
+
+    def test_daily_weekly_monthly_buckets_match_reports(self):
+        self.assertMatchesReports(self.range("start=2025-05-20&end=2025-06-05&granularity=day"), timezone.utc)
+        self.assertMatchesReports(
+            self.range("start=2025-04-02&end=2025-06-10&granularity=week&tz=Asia/Kolkata"), ZoneInfo("Asia/Kolkata")
+        )
+        self.assertMatchesReports(
+            self.range("start=2025-03-15&end=2025-06-20&granularity=month&tz=America/New_York"),
+            ZoneInfo("America/New_York"),
+        )
+
+    def test_hourly_buckets_across_dst_change(self):
+        berlin = ZoneInfo("Europe/Berlin")
+        data = self.range("start=2025-03-30&end=2025-03-31&granularity=hour&tz=Europe/Berlin")
+
+        # THE CLOCKS SKIP 02:00 ON THAT DAY
+        self.assertEqual(len(data["labels"]), 23)
+        self.assertNotIn("2025-03-30T02:00", data["labels"])
+        self.assertMatchesReports(data, berlin)
+
+    def test_week_labels_and_cut_edges(self):
+        labels, edges = bucket_edges(date(2025, 6, 4), date(2025, 6, 20), "week", timezone.utc)
+
+        self.assertEqual(labels, ["2025-W23", "2025-W24", "2025-W25"])
+        self.assertEqual(edges[1], datetime(2025, 6, 9, tzinfo=timezone.utc))
+        self.assertEqual(edges[-1], datetime(2025, 6, 20, tzinfo=timezone.utc))
+
+    def test_covered_time_splits_intervals_across_edges(self):
+        starts = np.array([0, 10, 30])
+        ends = np.array([5, 25, 40])
+        edges = np.array([-10, 3, 20, 35, 50])
+
+        self.assertEqual(covered_time(starts, ends, edges).tolist(), [3, 12, 10, 5])
+
+    def test_epoch_microseconds_is_exact(self):
+        moment = datetime(2030, 6, 2, 9, 30, 15, 123456, tzinfo=timezone.utc)
+        activity = Activity.objects.create(
+            author=self.user, category=self.categories[1], energy_level=5, mood="happy",
+            start_time=moment, end_time=moment + timedelta(minutes=5),
+        )
+
+        value = Activity.objects.filter(pk=activity.pk).values_list(EpochMicroseconds("start_time"), flat=True)
+        self.assertEqual(value.get(), to_micros(moment))
+
+    def test_empty_range(self):
+        data = self.range("start=2030-01-01&end=2030-01-08&granularity=day")
+        self.assertEqual(data["data"], [])
+        self.assertEqual(data["undefined"], [24.0] * 7)
+
+    def test_invalid_parameters(self):
+        for query in (
+            "end=2025-06-01",
+            "start=2025-06-02&end=2025-06-01",
+            "start=2025-06-01&end=2025-06-02&granularity=year",
+            "start=2025-06-01&end=2025-06-02&tz=Mars/Olympus",
+            "start=2000-01-01&end=2025-06-02&granularity=hour",
+        ):
+            response = self.client.get(f"/api/reports/range/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+class MoodEnergyTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        self.gym = Category.objects.create(name="Gym", color="#222222", user=self.user)
+        seed_activities(self.user, [self.work, self.gym], DAY - timedelta(days=10), days=20)
+        rng = Random(3)
+        for activity in Activity.objects.filter(author=self.user):
+            activity.mood = rng.choice(["happy", "tired", "stressed", "neutral"])
+            activity.save()
+        self.client.force_authenticate(user=self.user)
+
+    def analytics(self, query):
+        response = self.client.get(f"/api/reports/analytics/mood-energy/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def reference(self, start, end, tz, group):
+        groups = defaultdict(list)
+        for activity in Activity.objects.filter(author=self.user, start_time__gte=start, start_time__lt=end):
+            groups[group(activity, activity.start_time.astimezone(tz))].append(activity)
+        return {
+            key: {
+                "count": len(activities),
+                "energy": {
+                    "avg": round(sum(a.energy_level for a in activities) / len(activities), 2),
+                    "min": min(a.energy_level for a in activities),
+                    "max": max(a.energy_level for a in activities),
+                },
+                "moods": {mood: sum(a.mood == mood for a in activities) for mood in MOODS},
+            }
+            for key, activities in groups.items()
+        }
+
+    def test_matches_reference(self):
+        tokyo = ZoneInfo("Asia/Tokyo")
+        data = self.analytics("start=2025-05-25&end=2025-06-08&tz=Asia/Tokyo")
+        start, end = datetime(2025, 5, 25, tzinfo=tokyo), datetime(2025, 6, 8, tzinfo=tokyo)
+
+        by_category = {entry.pop("category_id"): entry for entry in data["by_category"]}
+        for entry in by_category.values():
+            entry.pop("category_name")
+        self.assertEqual(by_category, self.reference(start, end, tokyo, lambda a, local: a.category_id))
+
+        by_hour = {entry.pop("hour"): entry for entry in data["by_hour"] if entry["count"]}
+        self.assertEqual(by_hour, self.reference(start, end, tokyo, lambda a, local: local.hour))
+
+        by_weekday = {entry.pop("weekday"): entry for entry in data["by_weekday"] if entry["count"]}
+        self.assertEqual(by_weekday, self.reference(start, end, tokyo, lambda a, local: local.isoweekday()))
+
+    def test_all_hours_and_weekdays_are_listed(self):
+        data = self.analytics("start=2030-01-01&end=2030-01-02")
+
+        self.assertEqual([entry["hour"] for entry in data["by_hour"]], list(range(24)))
+        self.assertEqual([entry["weekday"] for entry in data["by_weekday"]], list(range(1, 8)))
+        self.assertEqual(data["by_hour"][0]["energy"], {"avg": None, "min": None, "max": None})
+        self.assertEqual(data["by_category"], [])
+
+    def test_one_query(self):
+        start_versions(self.user)
+        # THE REPORT VERSION AND ONE AGGREGATE QUERY
+        with self.assertNumQueries(2):
+            self.analytics("start=2025-01-01&end=2026-01-01&tz=Europe/Berlin")
+
+    def test_invalid_range(self):
+        response = self.client.get("/api/reports/analytics/mood-energy/?start=2025-06-02&end=2025-06-01")
+        self.assertEqual(response.status_code, 400)
+
+
+class HeatmapTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.sleep = Category.objects.create(name="Sleep", color="#000000", is_default=True)
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        # ACROSS THE EUROPEAN DST CHANGE OF 2025-03-30
+        seed_activities(self.user, [self.sleep, self.work], datetime(2025, 3, 20, tzinfo=timezone.utc), days=20)
+        self.client.force_authenticate(user=self.user)
+
+    def reference(self, start_date, end_date, tz):
+        """
+        Walk every activity hour by hour in local time
+        """
+        start = datetime.combine(start_date, datetime.min.time(), tzinfo=tz)
+        end = datetime.combine(end_date, datetime.min.time(), tzinfo=tz)
+        cells = defaultdict(lambda: np.zeros((7, 24)))
+        for act in Activity.objects.filter(author=self.user).select_related("category"):
+            cursor, stop = max(act.start_time, start), min(act.end_time, end)
+            while cursor < stop:
+                local = cursor.astimezone(tz)
+                boundary = local.replace(minute=0, second=0, microsecond=0).astimezone(timezone.utc) + timedelta(hours=1)
+                piece = min(boundary, stop) - cursor
+                cells[act.category.name][local.weekday(), local.hour] += piece.total_seconds() / 3600
+                cursor = min(boundary, stop)
+        return cells
+
+    def heatmap(self, query):
+        response = self.client.get(f"/api/reports/heatmap/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertMatchesReference(self, start, end, tz_name):
+        data = self.heatmap(f"start={start}&end={end}&tz={tz_name}")
+        expected = self.reference(date.fromisoformat(start), date.fromisoformat(end), ZoneInfo(tz_name))
+        self.assertEqual({entry["category_name"] for entry in data["data"]}, set(expected))
+        for entry in data["data"]:
+            np.testing.assert_allclose(entry["hours"], expected[entry["category_name"]], atol=0.006)
+        return data
+
+    def test_matches_reference_across_dst_change(self):
+        data = self.assertMatchesReference("2025-03-24", "2025-04-07", "Europe/Berlin")
+        # THE CHANGE SKIPS 2:00 ON SUNDAY
+        self.assertEqual(np.sum(data["available"]), 14 * 24 - 1)
+        self.assertEqual(data["available"][6][2], 1.0)
+        self.assertEqual(data["available"][0][2], 2.0)
+
+    def test_matches_reference_in_half_hour_timezone(self):
+        self.assertMatchesReference("2025-03-21", "2025-04-08", "Asia/Kolkata")
+
+    def test_recorded_is_the_sum_of_categories(self):
+        data = self.heatmap("start=2025-03-24&end=2025-04-07&tz=UTC")
+        np.testing.assert_allclose(data["recorded"], np.sum([entry["hours"] for entry in data["data"]], axis=0), atol=0.02)
+        self.assertTrue(np.all(np.array(data["recorded"]) <= np.array(data["available"]) + 1e-9))
+
+    def test_hour_cells_split_dst_days(self):
+        edges, cells = hour_cells(date(2025, 10, 26), date(2025, 10, 27), ZoneInfo("Europe/Berlin"))
+        # 25 HOURS, 2:00 TWICE
+        self.assertEqual((len(edges), len(cells)), (26, 25))
+        self.assertEqual(list(cells[:4] - 6 * 24), [0, 1, 2, 2])
+
+    def test_category_filter(self):
+        data = self.heatmap(f"start=2025-03-24&end=2025-04-07&categories={self.work.id}")
+        self.assertEqual([entry["category_name"] for entry in data["data"]], ["Work"])
+
+    def test_two_queries(self):
+        start_versions(self.user)
+        # THE REPORT VERSION, THEN TWO QUERIES
+        with self.assertNumQueries(3):
+            self.heatmap("start=2024-04-01&end=2025-04-01&tz=Europe/Berlin")
+
+    def test_invalid_parameters(self):
+        for query in ("start=2025-04-07&end=2025-03-24", "start=2025-03-24", "start=2020-01-01&end=2025-01-01",
+                      "start=2025-03-24&end=2025-04-07&tz=Mars/Base", "start=2025-03-24&end=2025-04-07&categories=a"):
+            self.assertEqual(self.client.get(f"/api/reports/heatmap/?{query}").status_code, 400)
+
+
+class GapsTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        seed_activities(self.user, [self.work], DAY - timedelta(days=3), days=6)
+        self.client.force_authenticate(user=self.user)
+
+    def reference(self, start, end, min_gap=timedelta(0)):
+        gaps, cursor = [], start
+        for act in Activity.objects.filter(author=self.user, end_time__gt=start, start_time__lt=end).order_by("start_time"):
+            if act.start_time > cursor:
+                gaps.append((cursor, act.start_time))
+            cursor = max(cursor, act.end_time)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return [(gap_start, gap_end) for gap_start, gap_end in gaps if gap_end - gap_start >= min_gap]
+
+    def test_matches_reference(self):
+        for start, end in ((DAY, DAY + timedelta(days=1)), (DAY - timedelta(days=2), DAY + timedelta(days=2))):
+            for minutes in (0, 15, 60, 91):
+                min_gap = timedelta(minutes=minutes)
+                self.assertEqual(find_gaps(self.user, start, end, min_gap), self.reference(start, end, min_gap))
+
+    def test_range_starting_inside_an_activity(self):
+        activity = Activity.objects.filter(author=self.user, start_time__gt=DAY).order_by("start_time").first()
+        start = activity.start_time + timedelta(minutes=1)
+        gaps = find_gaps(self.user, start, DAY + timedelta(days=1))
+        self.assertGreaterEqual(gaps[0][0], activity.end_time)
+        self.assertEqual(gaps, self.reference(start, DAY + timedelta(days=1)))
+
+    def test_empty_range_is_one_gap(self):
+        start = DAY + timedelta(days=30)
+        self.assertEqual(find_gaps(self.user, start, start + timedelta(days=1)), [(start, start + timedelta(days=1))])
+
+    def test_endpoint_in_local_time(self):
+        response = self.client.get("/api/reports/gaps/?start=2025-06-02&end=2025-06-03&tz=Europe/Berlin&min_minutes=30")
+        self.assertEqual(response.status_code, 200)
+        berlin = ZoneInfo("Europe/Berlin")
+        expected = self.reference(
+            datetime(2025, 6, 2, tzinfo=berlin), datetime(2025, 6, 3, tzinfo=berlin), timedelta(minutes=30)
+        )
+        self.assertEqual(
+            [(gap["start"], gap["end"]) for gap in response.data["gaps"]],
+            [(gap_start.astimezone(berlin).isoformat(), gap_end.astimezone(berlin).isoformat()) for gap_start, gap_end in expected],
+        )
+        self.assertTrue(all(gap["minutes"] >= 30 for gap in response.data["gaps"]))
+        self.assertTrue(response.data["gaps"][0]["start"].endswith("+02:00"))
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            find_gaps(self.user, DAY - timedelta(days=3), DAY + timedelta(days=3), timedelta(minutes=30))
+
+    def test_invalid_parameters(self):
+        for query in ("start=2025-06-03&end=2025-06-02", "start=2024-01-01&end=2025-06-02",
+                      "start=2025-06-02&end=2025-06-03&min_minutes=-5", "start=2025-06-02&end=2025-06-03&min_minutes=x"):
+            self.assertEqual(self.client.get(f"/api/reports/gaps/?{query}").status_code, 400)
+
+
+class ReportJobTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        seed_activities(self.user, [self.work], DAY - timedelta(days=10), days=20)
+        self.client.force_authenticate(user=self.user)
+
+    def submit(self, kind="summary", **params):
+        params = {"start": "2025-05-01", "end": "2025-06-10", "tz": "Europe/Berlin", **params}
+        return self.client.post("/api/reports/jobs/", {"kind": kind, "params": params}, format="json")
+
+    def run_worker(self):
+        call_command("run_report_worker", "--once", "--workers", "1", stdout=io.StringIO())
+
+    def test_job_runs_off_the_request_path(self):
+        response = self.submit()
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data["id"]
+
+        result = self.client.get(f"/api/reports/jobs/{job_id}/result/")
+        self.assertEqual((result.status_code, result.data["status"]), (202, "pending"))
+
+        self.run_worker()
+
+        self.assertEqual(self.client.get(f"/api/reports/jobs/{job_id}/").data["status"], "done")
+        berlin = ZoneInfo("Europe/Berlin")
+        expected = generate_report(
+            self.user, datetime(2025, 5, 1, tzinfo=berlin), datetime(2025, 6, 10, tzinfo=berlin),
+            "2025-05-01 to 2025-06-09",
+        )
+        self.assertEqual(self.client.get(f"/api/reports/jobs/{job_id}/result/").data, expected)
+
+    def test_every_kind_matches_its_endpoint(self):
+        ids = {
+            "range": self.submit("range", granularity="week").data["id"],
+            "mood_energy": self.submit("mood_energy").data["id"],
+        }
+        self.run_worker()
+
+        query = "start=2025-05-01&end=2025-06-10&tz=Europe/Berlin"
+        self.assertEqual(
+            self.client.get(f"/api/reports/jobs/{ids['range']}/result/").data,
+            self.client.get(f"/api/reports/range/?{query}&granularity=week").data,
+        )
+        self.assertEqual(
+            self.client.get(f"/api/reports/jobs/{ids['mood_energy']}/result/").data,
+            self.client.get(f"/api/reports/analytics/mood-energy/?{query}").data,
+        )
+
+    def test_identical_requests_share_a_job(self):
+        first = self.submit()
+        second = self.submit()
+        self.assertEqual((second.status_code, second.data["id"]), (200, first.data["id"]))
+
+        # FINISHED RESULTS ARE REUSED TOO
+        self.run_worker()
+        self.assertEqual(self.submit().data["id"], first.data["id"])
+        self.assertNotEqual(self.submit(end="2025-06-11").data["id"], first.data["id"])
+
+    def test_data_changes_start_a_new_job(self):
+        first = self.submit().data["id"]
+        self.run_worker()
+
+        Activity.objects.filter(author=self.user).first().delete()
+        self.assertNotEqual(self.submit().data["id"], first)
+
+    def test_failed_job_reports_error_and_can_be_retried(self):
+        job_id = self.submit().data["id"]
+        ReportJob.objects.filter(pk=job_id).update(params={"start": "never"})
+        self.run_worker()
+
+        response = self.client.get(f"/api/reports/jobs/{job_id}/result/")
+        self.assertEqual((response.status_code, response.data["status"]), (409, "failed"))
+        self.assertIn("start", response.data["error"])
+
+        self.assertNotEqual(self.submit().data["id"], job_id)
+
+    def test_abandoned_jobs_are_queued_again(self):
+        job_id = self.submit().data["id"]
+        ReportJob.objects.filter(pk=job_id).update(status="running", started_at=DAY)
+        self.run_worker()
+
+        self.assertEqual(ReportJob.objects.get(pk=job_id).status, "done")
+
+    def test_jobs_abandoned_while_the_worker_runs_are_queued_again(self):
+        first = self.submit().data["id"]
+        abandoned = self.submit(end="2025-06-11").data["id"]
+
+        def run_and_abandon(job):
+            # ANOTHER WORKER DIES HOLDING A JOB WHILE THIS ONE IS BUSY
+            ReportJob.objects.filter(pk=abandoned).update(status="running", started_at=DAY)
+            return run_job(job)
+
+        with mock.patch.object(run_report_worker, "REQUEUE_INTERVAL", 0), \
+                mock.patch.object(run_report_worker, "run_job", side_effect=run_and_abandon):
+            self.run_worker()
+
+        self.assertEqual(ReportJob.objects.get(pk=first).status, "done")
+        self.assertEqual(ReportJob.objects.get(pk=abandoned).status, "done")
+
+    def test_jobs_of_other_users_are_hidden(self):
+        job_id = self.submit().data["id"]
+        other = User.objects.create_user(username="other", password="testpass")
+        self.client.force_authenticate(user=other)
+
+        self.assertEqual(self.client.get(f"/api/reports/jobs/{job_id}/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/reports/jobs/{job_id}/result/").status_code, 404)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.submit("everything").status_code, 400)
+        self.assertEqual(self.submit(end="2025-04-01").status_code, 400)
+        self.assertEqual(self.submit("range", granularity="decade").status_code, 400)
+        response = self.client.post("/api/reports/jobs/", {"kind": "summary", "params": "all"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class PlatformStatsTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.sleep = Category.objects.create(name="Sleep", color="#000000", is_default=True)
+        self.users = []
+        for number in range(5):
+            user = User.objects.create_user(username=f"user{number}", password="testpass")
+            work = Category.objects.create(name="Work", color="#111111", user=user)
+            seed_activities(user, [work, self.sleep], DAY, days=1 + number, seed=number)
+            self.users.append(user)
+        self.staff = User.objects.create_user(username="staff", password="testpass", is_staff=True)
+
+    def reference(self, start, end):
+        hours, users = defaultdict(float), defaultdict(set)
+        for act in Activity.objects.filter(start_time__lt=end, end_time__gt=start).select_related("category"):
+            hours[act.category.name] += (min(act.end_time, end) - max(act.start_time, start)).total_seconds() / 3600
+            users[act.category.name].add(act.author_id)
+        return {name: (round(hours[name], 2), len(users[name])) for name in hours}
+
+    def test_matches_reference(self):
+        stats = platform_stats(workers=1)
+        self.assertEqual(
+            {category["name"]: (category["hours"], category["users"]) for category in stats["categories"]},
+            self.reference(DAY - timedelta(days=1), DAY + timedelta(days=30)),
+        )
+        self.assertEqual((stats["users"], stats["activities"]), (5, Activity.objects.count()))
+
+    def test_range_is_clipped(self):
+        stats = platform_stats(date(2025, 6, 3), date(2025, 6, 5), workers=1)
+        self.assertEqual(
+            {category["name"]: (category["hours"], category["users"]) for category in stats["categories"]},
+            self.reference(DAY + timedelta(days=1), DAY + timedelta(days=3)),
+        )
+
+    def test_partitions_cover_every_author_once(self):
+        for parts in (1, 2, 3, 8):
+            ranges = partition_authors(parts)
+            self.assertLessEqual(len(ranges), parts)
+            covered = [user.id for user in self.users if any(first <= user.id <= last for first, last in ranges)]
+            self.assertEqual(covered, [user.id for user in self.users])
+            self.assertTrue(all(last < first for (_, last), (first, _) in zip(ranges, ranges[1:])))
+
+    def test_partitions_stream_in_one_query_each(self):
+        # PARTITIONING, ONE STREAM PER PARTITION, CATEGORY NAMES
+        with self.assertNumQueries(2 + len(partition_authors(4))):
+            platform_stats(workers=1)
+
+    @override_settings(PLATFORM_STATS_WORKERS=1)
+    def test_endpoint_serves_worker_snapshot(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get("/api/reports/platform/?start=2025-06-03")
+        self.assertEqual((response.status_code, response.data["status"]), (202, "pending"))
+
+        call_command("run_report_worker", "--once", "--workers", "1", stdout=io.StringIO())
+
+        response = self.client.get("/api/reports/platform/?start=2025-06-03")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, platform_stats(date(2025, 6, 3), workers=1))
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.users[0])
+        self.assertEqual(self.client.get("/api/reports/platform/").status_code, 403)
+        response = self.client.post("/api/reports/jobs/", {"kind": "platform", "params": {}}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_range(self):
+        self.client.force_authenticate(user=self.staff)
+        self.assertEqual(self.client.get("/api/reports/platform/?start=2025-06-05&end=2025-06-05").status_code, 400)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("platform_stats", "--workers", "1", stdout=out)
+        self.assertIn(f"5 users, {Activity.objects.count()} activities", out.getvalue())
+
+
+class ReportCacheTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.work = Category.objects.create(name="Work", color="#111111", user=self.user)
+        self.sleep = Category.objects.create(name="Sleep", color="#000000", is_default=True)
+        Activity.objects.create(
+            author=self.user, category=self.work, energy_level=5, mood="happy",
+            start_time=DAY + timedelta(hours=9), end_time=DAY + timedelta(hours=12),
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def daily(self):
+        return by_name(self.client.get("/api/reports/daily/?date=2025-06-02&tz=UTC").data)
+
+    def test_repeated_requests_are_served_from_cache(self):
+        urls = [
+            "/api/reports/daily/?date=2025-06-02&tz=UTC",
+            "/api/reports/weekly/?date=2025-06-02&tz=UTC",
+            "/api/reports/monthly/?date=2025-06-02&tz=UTC",
+            "/api/reports/trends/category/?type=daily&date=2025-06-02",
+        ]
+        first = [self.client.get(url).data for url in urls]
+
+        # ONLY THE REPORT VERSION OF EACH
+        with self.assertNumQueries(len(urls)):
+            again = [self.client.get(url).data for url in urls]
+        self.assertEqual(again, first)
+
+    def test_parameters_are_part_of_the_key(self):
+        self.daily()
+        # THE UTC+14 DAY ENDS AT 10:00 UTC, ONE HOUR INTO THE ACTIVITY
+        response = self.client.get("/api/reports/daily/?date=2025-06-02&tz=Pacific/Kiritimati")
+        self.assertEqual(by_name(response.data)["Work"]["hours"], 1.0)
+
+    def test_activity_writes_invalidate(self):
+        self.assertEqual(self.daily()["Work"]["hours"], 3.0)
+
+        response = self.client.post("/api/activities/", {
+            "category_id": self.work.id, "energy_level": 5, "mood": "happy",
+            "start_time": (DAY + timedelta(hours=13)).isoformat(),
+            "end_time": (DAY + timedelta(hours=14)).isoformat(),
+        })
+        self.assertEqual(self.daily()["Work"]["hours"], 4.0)
+
+        self.client.delete(f"/api/activities/{response.data['id']}/")
+        self.assertEqual(self.daily()["Work"]["hours"], 3.0)
+
+    def test_versions_bumped_by_another_process_invalidate(self):
+        self.assertEqual(self.daily()["Work"]["hours"], 3.0)
+
+        # AN IMPORT IN ANOTHER PROCESS WRITES ACTIVITIES, ROLLUPS AND THE STORED VERSION ONLY
+        activity = Activity(
+            author=self.user, category=self.work, energy_level=5, mood="happy",
+            start_time=DAY + timedelta(hours=13), end_time=DAY + timedelta(hours=14),
+        )
+        Activity.objects.bulk_create([activity])
+        apply_changes(self.user.id, added=[(self.work.id, activity.start_time, activity.end_time)])
+        DataVersion.objects.filter(key=version_key(self.user.id)).update(version="imported")
+        self.assertEqual(self.daily()["Work"]["hours"], 4.0)
+
+    def test_bulk_writes_invalidate(self):
+        self.daily()
+        self.client.post("/api/activities/bulk/", [{
+            "category_id": self.work.id, "energy_level": 5, "mood": "happy",
+            "start_time": (DAY + timedelta(hours=13)).isoformat(),
+            "end_time": (DAY + timedelta(hours=15)).isoformat(),
+        }], format="json")
+        self.assertEqual(self.daily()["Work"]["hours"], 5.0)
+
+    def test_category_writes_invalidate(self):
+        self.daily()
+        self.work.name = "Deep work"
+        self.work.save()
+        self.assertIn("Deep work", self.daily())
+
+    def test_default_category_writes_invalidate_every_user(self):
+        Activity.objects.create(
+            author=self.user, category=self.sleep, energy_level=5, mood="tired",
+            start_time=DAY, end_time=DAY + timedelta(hours=8),
+        )
+        self.daily()
+        self.sleep.name = "Rest"
+        self.sleep.save()
+        self.assertIn("Rest", self.daily())
+
+
+# A CACHE SHARED BETWEEN PROCESSES, WARMING REFUSES PROCESS-LOCAL ONES
+SHARED_REPORT_CACHE = {
+    **settings.CACHES,
+    REPORT_CACHE: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), "warm_report_cache_test"),
+    },
+}
+
+
+@override_settings(CACHES=SHARED_REPORT_CACHE)
+class WarmReportCacheTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.work = Category.objects.create(name="Work", color="#111111", is_default=True)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.active = User.objects.create_user(username="active", password="testpass")
+        self.idle = User.objects.create_user(username="idle", password="testpass")
+        for user, ended in ((self.active, now - timedelta(hours=2)), (self.idle, now - timedelta(days=30))):
+            Activity.objects.create(
+                author=user, category=self.work, energy_level=5, mood="happy",
+                start_time=ended - timedelta(hours=1), end_time=ended,
+            )
+        self.today = now.date().isoformat()
+
+    def warm(self):
+        out, err = io.StringIO(), io.StringIO()
+        call_command("warm_report_cache", "--concurrency", "1", stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def dashboard_requests(self, user, tz):
+        self.client.force_authenticate(user=user)
+        for endpoint in ("daily", "weekly", "monthly", "trends/category"):
+            self.assertEqual(self.client.get(f"/api/reports/{endpoint}/?date={self.today}&tz={tz}").status_code, 200)
+
+    def test_active_users_are_warmed_in_their_latest_timezone(self):
+        self.dashboard_requests(self.active, "Pacific/Kiritimati")
+        # DROP THE CACHED REPORTS, THE TIME ZONE STAYS
+        bump_data_version(self.active.id)
+
+        out, err = self.warm()
+        self.assertIn("of 1 users", out)
+        self.assertEqual(err, "")
+        # EVERY REPORT THE DASHBOARD OPENS WITH IS SERVED FROM THE CACHE, READING ONLY ITS VERSION
+        with self.assertNumQueries(4):
+            self.dashboard_requests(self.active, "Pacific/Kiritimati")
+        with self.assertNumQueries(2):
+            self.client.get(f"/api/reports/daily/?date={self.today}&tz=UTC")
+
+    def test_default_timezone_and_idle_users(self):
+        self.warm()
+        with self.assertNumQueries(4):
+            self.dashboard_requests(self.active, "UTC")
+        self.assertIsNone(caches[REPORT_CACHE].get(timezone_key(self.idle.id)))
+        start_versions(self.idle)
+        with self.assertNumQueries(2):
+            self.client.force_authenticate(user=self.idle)
+            self.client.get(f"/api/reports/daily/?date={self.today}&tz=UTC")
+
+    def test_rerun_skips_cached_entries(self):
+        self.warm()
+        out, _ = self.warm()
+        self.assertRegex(out, r"Warmed 0 reports of 1 users \(\d+ already cached, 0 users failed\)")
+
+    def test_overlapping_runs_are_skipped(self):
+        caches[REPORT_CACHE].set("reports:warming", "2026-01-05T06:00:00+00:00")
+        out, _ = self.warm()
+        self.assertIn("still going, skipping", out)
+
+    def test_process_local_cache_is_refused(self):
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reports'}
+        with override_settings(CACHES={**settings.CACHES, REPORT_CACHE: local}):
+            with self.assertRaisesMessage(CommandError, "REDIS_URL"):
+                self.warm()
+
+
+
+class AsyncReadsTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.categories = [
+            Category.objects.create(name="Sleep", color="#000000", is_default=True),
+            Category.objects.create(name="Work", color="#111111", user=self.user),
+        ]
+        seed_activities(self.user, self.categories, DAY - timedelta(days=70), days=80)
+        token = str(AccessToken.for_user(self.user))
+        self.client.cookies["access"] = token
+        self.async_client.cookies["access"] = token
+
+    def get_async(self, url):
+        # ROUTED LIKE REQUESTS COMING THROUGH BACKEND.ASGI
+        with self.settings(ROOT_URLCONF=ASGI_URLCONF):
+            return async_to_sync(self.async_client.get)(url)
+
+    def test_async_reads_match_the_sync_views(self):
+        for url in (
+            "/api/reports/daily/?date=2025-06-03&tz=Europe/Berlin",
+            "/api/reports/weekly/?date=2025-06-03&tz=Asia/Kolkata",
+            "/api/reports/monthly/?date=2025-05-20",
+            "/api/reports/trends/category/?type=daily&date=2025-06-08&tz=Asia/Tokyo",
+            "/api/reports/trends/category/?type=weekly&date=2025-06-08&tz=Asia/Kolkata&categories=2",
+            "/api/reports/daily/?date=2025-13-01",
+            "/api/reports/trends/category/?categories=x",
+        ):
+            response = self.get_async(url)
+            caches[REPORT_CACHE].clear()
+            expected = self.client.get(url)
+            self.assertEqual((response.status_code, response.json()), (expected.status_code, expected.json()), url)
+
+    def test_async_reads_share_the_report_cache_and_resolved_users(self):
+        url = "/api/reports/trends/category/?type=monthly&date=2025-06-08&tz=Europe/Berlin"
+        self.assertEqual(self.get_async(url).status_code, 200)
+        # ONLY THE REPORT VERSION
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_missing_token_is_rejected(self):
+        self.async_client.cookies.clear()
+        response = self.get_async("/api/reports/daily/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response.headers)
+
+    def test_asgi_urlconf_routes_reads_to_async_views(self):
+        self.assertIs(resolve("/api/reports/daily/", urlconf=ASGI_URLCONF).func, daily_report)
+        self.assertIs(resolve("/api/reports/jobs/", urlconf=ASGI_URLCONF).func.cls, ReportJobListView)
+
+
+class RequestMetricsTest(APITestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        request_metrics.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        category = Category.objects.create(name="Work", color="#111111", user=self.user)
+        seed_activities(self.user, [category], DAY, days=3)
+        token = str(AccessToken.for_user(self.user))
+        self.client.cookies["access"] = token
+        self.async_client.cookies["access"] = token
+
+    def test_server_timing_counts_the_queries_of_sync_and_async_views(self):
+        url = "/api/activities/?date=2025-06-03&tz=UTC"
+        # RESOLVE THE USER ONCE, SO BOTH VIEWS RUN THE SAME QUERIES
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertRegex(response["Server-Timing"], rf'^app;dur=[\d.]+, db;dur=[\d.]+;desc="{len(queries)} queries"$')
+
+        with self.settings(ROOT_URLCONF=ASGI_URLCONF):
+            async_response = async_to_sync(self.async_client.get)(url)
+        self.assertEqual(
+            async_response["Server-Timing"].split(";desc=")[1], response["Server-Timing"].split(";desc=")[1]
+        )
+
+    def test_metrics_are_recorded_by_url_name(self):
+        url = "/api/reports/daily/?date=2025-06-03&tz=UTC"
+        self.client.get(url)
+        # SERVED FROM THE REPORT CACHE
+        self.client.get(url)
+        self.client.get("/api/no-such-path/")
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+        lines = response.content.decode().splitlines()
+        self.assertIn("# TYPE timely_request_duration_seconds histogram", lines)
+        self.assertIn('timely_request_duration_seconds_count{view="daily-report",method="GET"} 2', lines)
+        self.assertIn('timely_request_duration_seconds_bucket{view="daily-report",method="GET",le="+Inf"} 2', lines)
+        # THE CACHED RESPONSE ONLY READS THE REPORT VERSION
+        self.assertIn('timely_request_db_queries_bucket{view="daily-report",method="GET",le="1"} 1', lines)
+        self.assertIn('timely_response_size_bytes_count{view="daily-report",method="GET"} 2', lines)
+        self.assertIn('timely_request_duration_seconds_count{view="unmatched",method="GET"} 1', lines)
+
+    def test_unknown_methods_share_one_series(self):
+        for method in ("PROPFIND", "BREW", "X" * 100):
+            self.client.generic(method, "/api/no-such-path/")
+
+        lines = request_metrics.render().splitlines()
+        self.assertIn('timely_request_duration_seconds_count{view="unmatched",method="other"} 3', lines)
+        self.assertFalse(any("BREW" in line for line in lines))
+
+    def test_metrics_are_staff_only(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+
+class BenchEndpointsTest(APITestCase):
+    def test_every_endpoint_is_benchmarked_without_errors(self):
+        call_command("seed_synthetic_data", "--users", "2", "--activities", "300", stdout=io.StringIO())
+        activities = Activity.objects.count()
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command("bench_endpoints", "--iterations", "1", "--warmup", "0", "--json", stdout=out, stderr=err)
+
+        # NO ROUTE IS LEFT OUT AND NO REQUEST FAILED
+        self.assertEqual(err.getvalue(), "")
+        results = json.loads(out.getvalue())["results"]
+        self.assertEqual(len(results), len(ENDPOINTS))
+        self.assertTrue(all(result["errors"] == 0 for result in results))
+        # WRITES ARE ROLLED BACK
+        self.assertEqual(Activity.objects.count(), activities)
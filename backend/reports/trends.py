@@ -1,110 +1,236 @@
 from collections import defaultdict
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
 from calendar import monthrange
+from functools import partial
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from categories.index import auser_categories, user_categories
+from django.db.models import DateField, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from reports.cache import cache_report
 from activities.models import Activity
-from categories.models import Category
-from django.db.models import Q
+from reports.models import HourlyRollup
+from reports.ranges import bucket_edges
+from reports.rollups import is_hour_aligned
+from reports.views import clipped_duration
+
+# BUCKETS OF EACH TREND TYPE, AS RANGE REPORT GRANULARITIES
+GRANULARITIES = {"daily": "day", "weekly": "week", "monthly": "month"}
+
+
+def trend_axis(trend_type, end_date):
+    """
+    Return the first date, database truncation, label function and labels of a trend ending at end_date
+    """
+    if trend_type == "weekly":
+        # Get start date from end date
+        start_date = end_date - timedelta(weeks=8)
+        trunc = TruncWeek
+
+        # Function that takes an end date and create a label of type
+        group_func = lambda d: f"{d.isocalendar().year}-W{d.isocalendar().week}"
+
+        # Create pairs of year and week
+        date_labels = [(end_date - timedelta(weeks=i)).isocalendar() for i in reversed(range(8))]
+
+        # From each pair of year and week, create a label
+        x_axis = [f"{y}-W{w}" for (y, w, _) in date_labels]
+    elif trend_type == "monthly":
+        start_date = (end_date.replace(day=1) - timedelta(days=365))
+        trunc = TruncMonth
+        group_func = lambda d: d.strftime("%Y-%m")
+        x_axis = [(end_date.replace(day=1) - timedelta(days=30 * i)).strftime("%Y-%m") for i in reversed(range(12))]
+    else:  # default to daily
+        start_date = end_date - timedelta(days=6)
+        trunc = TruncDay
+        group_func = lambda d: d.strftime("%Y-%m-%d")
+        x_axis = [(end_date - timedelta(days=i)).strftime("%Y-%m-%d") for i in reversed(range(7))]
+
+    return start_date, trunc, group_func, x_axis
+
+
+def parse_category_ids(value):
+    """
+    Category ids of a comma-separated list (e.g. "1,2,3"), empty when not given
+    """
+    return [int(cid) for cid in value.split(",")] if value else []
+
+
+def rollup_trend_rows(user, window_start, window_end, trunc, tz, category_ids):
+    """
+    Query of hours per category and local period from the hourly rollup, grouped in one query
+    """
+    rollups = HourlyRollup.objects.filter(user=user, bucket__gte=window_start, bucket__lt=window_end)
+
+    # Filter all rollups with the selected category id
+    if category_ids:
+        rollups = rollups.filter(category_id__in=category_ids)
+
+    # Group by bucket (date/week/month) in the database, in the user's timezone
+    return (
+        rollups.annotate(period=trunc("bucket", tzinfo=tz, output_field=DateField()))
+        .values("category_id", "period")
+        .annotate(total=Sum("duration"))
+        .order_by()
+    )
+
+
+def fold_rollup_trend(rows, group_func):
+    """
+    Hours per category and label of rollup_trend_rows
+    """
+    trend_data = defaultdict(dict)  # {category_id: {bucket: hours}}
+    for row in rows:
+        trend_data[row["category_id"]][group_func(row["period"])] = row["total"].total_seconds() / 3600
+    return trend_data
+
+
+def clipped_trend_rows(user, edges, category_ids):
+    """
+    Query of the time per category of the activities, each clipped to every bucket it overlaps.
+    One conditional sum per bucket, all in one grouped query.
+    """
+    activities = Activity.objects.overlapping(user.id, edges[0], edges[-1])
+    if category_ids:
+        activities = activities.filter(category_id__in=category_ids)
+
+    buckets = {
+        f"bucket_{i}": Sum(clipped_duration(start, end), filter=Q(start_time__lt=end, end_time__gt=start))
+        for i, (start, end) in enumerate(zip(edges, edges[1:]))
+    }
+    return activities.values("category_id").annotate(**buckets).order_by()
+
+
+def fold_clipped_trend(rows, labels):
+    """
+    Hours per category and label of clipped_trend_rows
+    """
+    return {
+        row["category_id"]: {
+            label: row[f"bucket_{i}"].total_seconds() / 3600
+            for i, label in enumerate(labels) if row[f"bucket_{i}"]
+        }
+        for row in rows
+    }
+
+
+def parse_trend_params(query_params):
+    """
+    Return the type, last date, timezone and category ids of a trend request
+    """
+    trend_type = query_params.get("type", "daily")  # default to 'daily'
+    date_str = query_params.get("date")
+
+    # Default to today if no date provided
+    if date_str:
+        try:
+            end_date = date.fromisoformat(date_str)
+        except ValueError:
+            raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+    else:
+        end_date = timezone.localdate()
+
+    try:
+        tz = ZoneInfo(query_params.get("tz", "UTC"))
+    except (ValueError, ZoneInfoNotFoundError):
+        raise ValueError("Invalid timezone.")
+
+    try:
+        category_ids = parse_category_ids(query_params.get("categories"))  # e.g., "1,2,3"
+    except ValueError:
+        raise ValueError("Invalid category ID list.")
+
+    return trend_type, end_date, tz, category_ids
+
+
+def trend_source(user, trend_type, end_date, tz, category_ids):
+    """
+    Return the first date, labels and grouped query of a trend, and the function turning the
+    query's rows into hours per category and label
+    """
+    start_date, trunc, group_func, x_axis = trend_axis(trend_type, end_date)
+
+    # Read the window from start date 00:00 up to the day after end date (user's timezone)
+    window_start = datetime.combine(start_date, time.min, tzinfo=tz).astimezone(dt_timezone.utc)
+    window_end = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz).astimezone(dt_timezone.utc)
+
+    if is_hour_aligned(window_start) and is_hour_aligned(window_end):
+        rows = rollup_trend_rows(user, window_start, window_end, trunc, tz, category_ids)
+        return start_date, x_axis, rows, partial(fold_rollup_trend, group_func=group_func)
+
+    # Local midnights fall inside UTC hours (e.g. half-hour timezones), the hourly rollup can't be split there
+    labels, edges = bucket_edges(start_date, end_date + timedelta(days=1), GRANULARITIES.get(trend_type, "day"), tz)
+    return start_date, x_axis, clipped_trend_rows(user, edges, category_ids), partial(fold_clipped_trend, labels=labels)
+
+
+def trend_categories(user, category_ids):
+    """
+    Categories shown in a trend by id, the user's own and default ones unless category_ids is given
+    """
+    categories = user_categories(user.id).values()
+    if category_ids:
+        categories = [cat for cat in categories if cat.id in category_ids]
+
+    return {cat.id: cat for cat in categories}
+
+
+async def atrend_categories(user, category_ids):
+    """
+    Async version of trend_categories
+    """
+    categories = (await auser_categories(user.id)).values()
+    if category_ids:
+        categories = [cat for cat in categories if cat.id in category_ids]
+
+    return {cat.id: cat for cat in categories}
+
+
+def format_trend(category_map, trend_data, x_axis):
+    """
+    Series of hours per label for every category, 0.0 where nothing was recorded
+    """
+    response_data = []
+
+    for category_id, category in category_map.items():
+        bucket_data = trend_data.get(category_id, {})
+        trend = [
+            {"label": label, "hours": round(bucket_data.get(label, 0.0), 2)}
+            for label in x_axis
+        ]
+        response_data.append({
+            "category_id": category.id,
+            "category_name": category.name,
+            "trend": trend
+        })
+
+    return response_data
+
 
 class CategoryTrendView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cache_report
     def get(self, request):
         user = request.user
 
         # Parse query parameters
-        trend_type = request.query_params.get("type", "daily")  # default to 'daily'
-        date_str = request.query_params.get("date")
-        category_ids_str = request.query_params.get("categories")  # e.g., "1,2,3"
-        
-
-        # Default to today if no date provided
-        if date_str:
-            try:
-                end_date = date.fromisoformat(date_str)
-            except ValueError:
-                return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
-        else:
-            end_date = timezone.localdate()
-
-        # Determine start date and grouping logic based on trend type
-        if trend_type == "weekly":
-            # Get start date from end date
-            start_date = end_date - timedelta(weeks=8)
-            
-            # Function that takes an end date and create a label of type
-            group_func = lambda d: f"{d.isocalendar().year}-W{d.isocalendar().week}"
-            
-            # Create pairs of year and week
-            date_labels = [(end_date - timedelta(weeks=i)).isocalendar() for i in reversed(range(8))]
-            
-            # From each pair of year and week, create a label
-            x_axis = [f"{y}-W{w}" for (y, w, _) in date_labels]
-        elif trend_type == "monthly":
-            start_date = (end_date.replace(day=1) - timedelta(days=365))
-            group_func = lambda d: d.strftime("%Y-%m")
-            x_axis = [(end_date.replace(day=1) - timedelta(days=30 * i)).strftime("%Y-%m") for i in reversed(range(12))]
-        else:  # default to daily
-            start_date = end_date - timedelta(days=6)
-            group_func = lambda d: d.strftime("%Y-%m-%d")
-            x_axis = [(end_date - timedelta(days=i)).strftime("%Y-%m-%d") for i in reversed(range(7))]
-
-        if category_ids_str:
-            try:
-                category_ids = [int(cid) for cid in category_ids_str.split(",")]
-            except ValueError:
-                return Response({"error": "Invalid category ID list."}, status=400)
-        else:
-            category_ids = []
+        try:
+            trend_type, end_date, tz, category_ids = parse_trend_params(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
 
         # Load categories to preserve even empty ones
-        categories = Category.objects.filter(Q(user=user) | Q(is_default=True))
-        if category_ids:
-            categories = categories.filter(id__in=category_ids)
-
-        category_map = {cat.id: cat for cat in categories}
-
-        # Filter activities with the correct user, within start and end date
-        activities = Activity.objects.filter(
-            author=user,
-            start_time__date__gte=start_date,
-            start_time__date__lte=end_date
-        )
-        
-        # Filter all activities with the selected category id
-        if category_ids:
-            activities = activities.filter(category_id__in=category_ids)
-
-        # Get all info of all related category (optimization)
-        activities = activities.select_related("category")
-
-        # Group by bucket (date/week/month)
-        trend_data = defaultdict(lambda: defaultdict(float))  # {category_id: {bucket: hours}}
-
-        for act in activities:
-            # Bucket is decided by activity's start date
-            bucket = group_func(act.start_time.date())
-            hours = (act.end_time - act.start_time).total_seconds() / 3600
-            trend_data[act.category_id][bucket] += hours
+        category_map = trend_categories(user, category_ids)
+
+        start_date, x_axis, rows, fold = trend_source(user, trend_type, end_date, tz, category_ids)
+        trend_data = fold(rows)
 
         # Format response
-        response_data = []
-
-        for category_id, category in category_map.items():
-            bucket_data = trend_data.get(category_id, {})
-            trend = [
-                {"label": label, "hours": round(bucket_data.get(label, 0.0), 2)}
-                for label in x_axis
-            ]
-            response_data.append({
-                "category_id": category.id,
-                "category_name": category.name,
-                "trend": trend
-            })
+        response_data = format_trend(category_map, trend_data, x_axis)
 
         return Response({
             "type": trend_type,
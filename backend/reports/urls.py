@@ -2,10 +2,25 @@ from django.urls import path
 
 from reports.views import DailyReportView, WeeklyReportView, MonthlyReportView
 from reports.trends import CategoryTrendView
+from reports.dashboard import DashboardView
+from reports.ranges import RangeReportView
+from reports.analytics import MoodEnergyView
+from reports.heatmap import HeatmapView
+from reports.gaps import GapsView
+from reports.jobs import PlatformStatsView, ReportJobListView, ReportJobResultView, ReportJobView
 
 urlpatterns = [
     path('daily/', DailyReportView.as_view(), name='daily-report'),
     path('weekly/', WeeklyReportView.as_view(), name='weekly-report'),
     path('monthly/', MonthlyReportView.as_view(), name='monthly-report'),
-    path('trends/category/', CategoryTrendView.as_view(), name="category-trend")
+    path('trends/category/', CategoryTrendView.as_view(), name="category-trend"),
+    path('dashboard/', DashboardView.as_view(), name="dashboard"),
+    path('range/', RangeReportView.as_view(), name="range-report"),
+    path('analytics/mood-energy/', MoodEnergyView.as_view(), name="mood-energy"),
+    path('heatmap/', HeatmapView.as_view(), name="heatmap"),
+    path('gaps/', GapsView.as_view(), name="gaps"),
+    path('jobs/', ReportJobListView.as_view(), name="report-jobs"),
+    path('jobs/<int:pk>/', ReportJobView.as_view(), name="report-job"),
+    path('jobs/<int:pk>/result/', ReportJobResultView.as_view(), name="report-job-result"),
+    path('platform/', PlatformStatsView.as_view(), name="platform-stats"),
 ]
\ No newline at end of file
@@ -1,39 +1,78 @@
 from collections import defaultdict
-from datetime import timedelta, date, datetime, timezone
+from datetime import timedelta, date, datetime, time, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest, Least
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from activities.models import Activity
-from utils.time import get_utc_range_for_local_range, get_date_from_date_string
+from reports.cache import cache_report
+from reports.models import HourlyRollup
+from reports.rollups import is_hour_aligned
+
+
+def clipped_duration(start_date, end_date):
+    """
+    Expression of the part of an activity's duration inside the time frame, for activities overlapping it
+    """
+    return Least(F("end_time"), Value(end_date)) - Greatest(F("start_time"), Value(start_date))
+
+
+def duration_rows(user, start_date, end_date):
+    """
+    Query of (category name, duration) rows of the time user recorded from start_date to end_date.
+    Activities crossing the time frame boundaries only count with the part inside it.
+    """
+    # HOUR-ALIGNED TIME FRAMES (ANY WHOLE-HOUR UTC OFFSET) ARE SUMMED FROM THE HOURLY ROLLUP
+    if is_hour_aligned(start_date) and is_hour_aligned(end_date):
+        rows = HourlyRollup.objects.filter(
+            user=user,
+            bucket__gte=start_date,
+            bucket__lt=end_date
+        ).values("category__name").annotate(total=Sum("duration"))
+    else:
+        # OTHERWISE CLIP EACH OVERLAPPING ACTIVITY TO THE TIME FRAME
+        rows = (
+            Activity.objects.overlapping(user.id, start_date, end_date)
+            .values("category__name")
+            .annotate(total=Sum(clipped_duration(start_date, end_date)))
+        )
+
+    return rows.values_list("category__name", "total").order_by()
+
+
+def category_durations(user, start_date, end_date):
+    """
+    Return (category name, duration) pairs of the time user recorded from start_date to end_date
+    """
+    return list(duration_rows(user, start_date, end_date))
 
 
 def generate_report(user, start_date, end_date, period_label):
     """
     Generate usage report based for user from start_date to end_date
     """
-    # TRAVERSE ALL ACTIVITIES WITHIN THE GIVEN TIME FRAME
-    # ACCUMULATE ALL ACTIVITIES DURATION
+    # SUM ALL ACTIVITIES DURATION PER CATEGORY IN ONE GROUPED QUERY
+    return format_report(category_durations(user, start_date, end_date), start_date, end_date, period_label)
+
+
+def format_report(category_durations, start_date, end_date, period_label):
+    """
+    Build a report from (category name, duration) pairs recorded from start_date to end_date
+    """
     # UNDEFINED TIME WILL BE DIFFERENCE BETWEEN TOTAL TIME FRAME AND TOTAL RECORDED ACTIVITIES DURATION
 
-    # FILTER ALL ACTIVITY FROM GIVEN USER WITHIN GIVEN TIME FRAME
-    activities = Activity.objects.filter(
-        author=user,
-        start_time__gte=start_date,
-        end_time__lte=end_date
-    )
+    # Activity buckets for total hours, categories sharing a name are reported together
+    durations = defaultdict(timedelta)
+    for name, duration in category_durations:
+        durations[name] += duration
+    activity_summary = {name: duration.total_seconds() / 3600 for name, duration in durations.items()}
 
-    # Activity buckets for total hours
-    activity_summary = defaultdict(float)
     # Total length of recorded activities
-    total_hours = 0.0
-
-    # TRAVERSE ACTIVITIES
-    for act in activities:
-        duration = (act.end_time - act.start_time).total_seconds() / 3600   # GET DURATION FOR EACH ACTIVITY
-        total_hours += duration                                             # ADD DURATION TO TOTAL HOURS RECORDED
-        activity_summary[act.category.name] += duration                     # ADD DURATION TO ACCORDING BUCKET
+    total_hours = sum(activity_summary.values())
 
     # GET TOTAL HOURS FOR THE WHOLE TIME FRAME
     total_period_hours = (end_date - start_date).total_seconds() / 3600
@@ -61,89 +100,73 @@ def generate_report(user, start_date, end_date, period_label):
 
 def get_selected_date(request):
     """
-    Get the selected end date in UTC from user's request
+    Get the selected local date and timezone from user's request, None if either is invalid
     """
-    # GET DATE FROM QUERY PARAMS, IF NOT AVAILABLE, GET CURRENT UTC TIME 
+    # GET DATE FROM QUERY PARAMS, IF NOT AVAILABLE, GET CURRENT UTC DATE
     date_str = request.query_params.get("date", datetime.now(timezone.utc).date().isoformat())
 
     # GET TIMEZONE FROM QUERY PARAM, UTC OTHERWISE
     tz = request.query_params.get("tz", "UTC")
 
-    # GET ACCORDING UTC TIME FROM USER'S LOCAL TIMEZONE
-    [date_str,_] = get_utc_range_for_local_range(date_str, None, tz)
-
-    return date_str
+    try:
+        return date.fromisoformat(date_str), ZoneInfo(tz)
+    except (ValueError, ZoneInfoNotFoundError):
+        return None
 
 
-class DailyReportView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        """
-        Returns daily time usage reports
-        """
-        # GET SELECTED DATE FROM USER'S REQUEST, CURRENT UTC DAY BY DEFAULT
-        selected_date = request.query_params.get("date", datetime.now(timezone.utc).date().isoformat())
+def report_window(period, selected_date, tz):
+    """
+    Return (start, end, label) of the local day, week or month containing selected_date.
+    Start and end are the local midnights bounding it, in UTC.
+    """
+    def utc_midnight(day):
+        return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc)
 
-        # GET TIMEZONE FROM USER'S REQUEST, UTC BY DEFAULT
-        tz = request.query_params.get("tz", "UTC")
+    if period == "weekly":
+        first = selected_date - timedelta(days=selected_date.weekday())
+        following = first + timedelta(days=7)
+        label = f"{first} to {following}"
+    elif period == "monthly":
+        first = selected_date.replace(day=1)
+        following = (first + timedelta(days=32)).replace(day=1)
+        label = f"{first} to {following - timedelta(days=1)}"
+    else:
+        first, following = selected_date, selected_date + timedelta(days=1)
+        label = str(selected_date)
 
-        # GET EQUIVALENT UTC DATE FROM USER'S (TYPICALLY LOCAL DATE)
-        start, end = get_utc_range_for_local_range(selected_date, None, tz)
+    return utc_midnight(first), utc_midnight(following), label
 
-        # GENERATE REPORT
-        report = generate_report(
-            user=request.user,
-            start_date=start,
-            end_date=end,
-            period_label=get_date_from_date_string(selected_date),
-        )
-        
-        return Response(report)
 
-
-class WeeklyReportView(APIView):
+class PeriodReportView(APIView):
+    """
+    Time usage report of the local day, week or month containing the selected date
+    """
     permission_classes = [IsAuthenticated]
+    period = None
 
+    @cache_report
     def get(self, request):
-        selected_date = get_selected_date(request)
-        if not selected_date:
-            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
-
-        start_of_week = selected_date - timedelta(days=selected_date.weekday())
-        end_of_week = start_of_week + timedelta(days=7)
-        period_label = f"{get_date_from_date_string(start_of_week)} to {get_date_from_date_string(end_of_week)}"
+        selected = get_selected_date(request)
+        if not selected:
+            return Response({"error": "Invalid date or timezone. Use YYYY-MM-DD and an IANA timezone."}, status=400)
 
+        start, end, label = report_window(self.period, *selected)
         report = generate_report(
             user=request.user,
-            start_date=start_of_week,
-            end_date=end_of_week,
-            period_label=period_label
+            start_date=start,
+            end_date=end,
+            period_label=label,
         )
         return Response(report)
 
 
-class MonthlyReportView(APIView):
-    permission_classes = [IsAuthenticated]
+class DailyReportView(PeriodReportView):
+    period = "daily"
 
-    def get(self, request):
-        selected_date = get_selected_date(request)
-        if not selected_date:
-            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
 
-        first_of_month = selected_date.replace(day=1)
-        if selected_date.month == 12:
-            next_month = selected_date.replace(year=selected_date.year + 1, month=1, day=1)
-        else:
-            next_month = selected_date.replace(month=selected_date.month + 1, day=1)
-        last_of_month = next_month - timedelta(days=1)
+class WeeklyReportView(PeriodReportView):
+    period = "weekly"
 
-        period_label = f"{get_date_from_date_string(first_of_month)} to {get_date_from_date_string(last_of_month)}"
 
-        report = generate_report(
-            user=request.user,
-            start_date=first_of_month,
-            end_date=last_of_month,
-            period_label=period_label
-        )
-        return Response(report)
+class MonthlyReportView(PeriodReportView):
+    period = "monthly"
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.cache import caches
+from django.db.models import Max
+from django.http import HttpRequest, QueryDict
+from rest_framework.request import Request
+
+from activities.models import Activity
+from reports.cache import REPORT_CACHE, report_cache_key
+from reports.trends import CategoryTrendView
+from reports.views import DailyReportView, MonthlyReportView, WeeklyReportView
+
+# VIEWS THE DASHBOARD OPENS WITH, WARMED WITH THE SAME QUERY PARAMETERS IT SENDS
+WARMED_VIEWS = (DailyReportView, WeeklyReportView, MonthlyReportView, CategoryTrendView)
+
+
+def recently_active_users(since, limit=None):
+    """
+    Ids of users who recorded activities ending after SINCE, most recently active first
+    """
+    users = (
+        Activity.objects.filter(end_time__gte=since)
+        .values("author_id").annotate(latest=Max("end_time")).order_by("-latest")
+        .values_list("author_id", flat=True)
+    )
+    return list(users[:limit] if limit else users)
+
+
+def warm_dates(tz_name, now=None):
+    """
+    Dates the dashboard asks for right now: it sends the UTC date, the local date may differ
+    """
+    now = now or datetime.now(timezone.utc)
+    dates = [now.date()]
+    try:
+        local = now.astimezone(ZoneInfo(tz_name)).date()
+    except (ValueError, ZoneInfoNotFoundError):
+        return dates
+    return dates + [local] if local != dates[0] else dates
+
+
+def report_request(user, params):
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = QueryDict(mutable=True)
+    http_request.GET.update(params)
+    request = Request(http_request)
+    request.user = user
+    return request
+
+
+def warm_user_reports(user, tz_name, dates):
+    """
+    Compute the dashboard reports of USER missing from the report cache.
+    Returns the number of (warmed, already cached) entries.
+    """
+    cache = caches[REPORT_CACHE]
+    warmed = cached = 0
+    for day in dates:
+        for view_class in WARMED_VIEWS:
+            request = report_request(user, {"date": day.isoformat(), "tz": tz_name})
+            if cache.has_key(report_cache_key(user.id, view_class.__name__, request.query_params)):
+                cached += 1
+                continue
+            # THE CACHED VIEW STORES ITS RESPONSE UNDER THE SAME KEY
+            if view_class().get(request).status_code == 200:
+                warmed += 1
+    return warmed, cached
+
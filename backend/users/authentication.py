@@ -1,6 +1,74 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from django.conf import settings
 
+# SECONDS A RESOLVED USER IS REUSED, BOUNDS HOW LONG ANOTHER PROCESS'S CHANGE GOES UNSEEN
+USER_CACHE_TTL = 30
+
+# ENTRIES KEPT PER PROCESS, THE LEAST RECENTLY USED ARE DROPPED
+USER_CACHE_SIZE = 1024
+TOKEN_CACHE_SIZE = 4096
+
+
+class ExpiringLRU:
+    """
+    Bounded least-recently-used mapping whose entries expire at a given epoch time
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, expires_at):
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, matches):
+        """
+        Drop every entry whose key MATCHES
+        """
+        with self.lock:
+            for key in [key for key in self.entries if matches(key)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# RAW ACCESS TOKEN -> VALIDATED TOKEN, UNTIL THE TOKEN EXPIRES
+validated_tokens = ExpiringLRU(TOKEN_CACHE_SIZE)
+
+# (USER ID, TOKEN ID) -> ACTIVE USER, FOR USER_CACHE_TTL SECONDS
+resolved_users = ExpiringLRU(USER_CACHE_SIZE)
+
+
+def forget_user(user_id):
+    resolved_users.discard(lambda key: key[0] == str(user_id))
+
+
 class CookieJWTAuthentication(JWTAuthentication):
     """
     Custom authentication for Http-Only Cookie JWT
@@ -22,3 +90,67 @@ class CookieJWTAuthentication(JWTAuthentication):
             return self.get_user(validated_token), validated_token
         except Exception:
             return None
+
+    async def aauthenticate(self, request):
+        """
+        Async version of authenticate, for async views outside of DRF
+        """
+        raw_token = request.COOKIES.get(settings.SIMPLE_JWT["AUTH_COOKIE"])
+        if raw_token is None:
+            return None
+
+        try:
+            validated_token = self.get_validated_token(raw_token)
+            return await self.aget_user(validated_token), validated_token
+        except Exception:
+            return None
+
+    def get_validated_token(self, raw_token):
+        """
+        Validate a token once, then reuse the result until the token expires
+        """
+        key = raw_token.decode() if isinstance(raw_token, bytes) else raw_token
+        validated_token = validated_tokens.get(key)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            validated_tokens.set(key, validated_token, validated_token["exp"])
+        return validated_token
+
+    def get_user(self, validated_token):
+        """
+        Resolve the token's user from the database at most once per USER_CACHE_TTL seconds.
+        Each request gets its own copy of the cached user.
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        key = (str(user_id), validated_token.get("jti") or validated_token.get("iat"))
+
+        user = resolved_users.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            resolved_users.set(key, user, min(time.time() + USER_CACHE_TTL, validated_token["exp"]))
+        return copy.copy(user)
+
+    async def aget_user(self, validated_token):
+        """
+        Async version of get_user, sharing its cache
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken("Token contained no recognizable user identification")
+        key = (str(user_id), validated_token.get("jti") or validated_token.get("iat"))
+
+        user = resolved_users.get(key)
+        if user is None:
+            # SAME CHECKS AS JWTAuthentication.get_user
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed("User is inactive", code="user_inactive")
+            if api_settings.CHECK_REVOKE_TOKEN and (
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+            ):
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+            resolved_users.set(key, user, min(time.time() + USER_CACHE_TTL, validated_token["exp"]))
+        return copy.copy(user)
@@ -0,0 +1,12 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import forget_user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_resolved_user(sender, instance, **kwargs):
+    # DEACTIVATED, DELETED OR CHANGED USERS ARE LOADED AGAIN ON THEIR NEXT REQUEST
+    forget_user(instance.pk)
@@ -2,7 +2,9 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from users.authentication import resolved_users, validated_tokens
 
 class UserAPITestCase(APITestCase):
     def setUp(self):
@@ -58,3 +60,47 @@ class UserAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("access", response.data)
 
+
+class CookieJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        resolved_users.clear()
+        validated_tokens.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        self.me_url = reverse("me")
+        self.client.cookies["access"] = str(AccessToken.for_user(self.user))
+
+    def test_user_is_resolved_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.me_url).data["username"], "testuser")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.me_url).data["username"], "testuser")
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.me_url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(self.me_url)
+        self.user.delete()
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changes_are_seen(self):
+        self.client.get(self.me_url)
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(self.client.get(self.me_url).data["username"], "renamed")
+
+    def test_new_token_resolves_again(self):
+        self.client.get(self.me_url)
+        self.client.cookies["access"] = str(AccessToken.for_user(self.user))
+        with self.assertNumQueries(1):
+            self.client.get(self.me_url)
+
+    def test_tampered_token_is_rejected(self):
+        token = self.client.cookies["access"].value
+        self.client.get(self.me_url)
+        self.client.cookies["access"] = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
@@ -0,0 +1,56 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import resolve
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from users.authentication import CookieJWTAuthentication
+
+
+def render(response):
+    """
+    Render a DRF response returned outside of a DRF view as JSON, into a plain response the
+    handler does not pass through a thread to render again
+    """
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = response.accepted_renderer.media_type
+    response.renderer_context = {}
+    response.render()
+    return HttpResponse(response.content, status=response.status_code, headers=response.headers)
+
+
+def async_read(view):
+    """
+    Serve GET requests of a path with an async view taking a DRF request and returning a DRF
+    response, for authenticated users like the sync API views.
+    Other methods are passed to the sync view of the same path in ROOT_URLCONF.
+    """
+    @csrf_exempt
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+            return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+        authenticator = CookieJWTAuthentication()
+        authenticated = await authenticator.aauthenticate(request)
+        if authenticated is None:
+            response = Response({"detail": NotAuthenticated.default_detail}, status=NotAuthenticated.status_code)
+            response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+            return render(response)
+
+        request = Request(request)
+        request.user, request.auth = authenticated
+        try:
+            response = await view(request, *args, **kwargs)
+        except APIException as exc:
+            response = exception_handler(exc, {"request": request})
+        return render(response)
+    return wrapper
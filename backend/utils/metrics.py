@@ -0,0 +1,141 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+
+# UPPER BOUNDS OF THE HISTOGRAM BUCKETS, AN IMPLICIT +INF BUCKET FOLLOWS THE LAST
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# METHODS LABELLED AS THEY ARE, ANY OTHER (CLIENTS MAY SEND ARBITRARY ONES) IS LABELLED "other"
+# SO THE NUMBER OF SERIES STAYS BOUNDED
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# NAME -> (HELP, BUCKETS) OF THE HISTOGRAMS KEPT PER VIEW AND METHOD
+HISTOGRAMS = {
+    "timely_request_duration_seconds": ("Wall time of requests", SECONDS_BUCKETS),
+    "timely_request_db_duration_seconds": ("Time spent in database queries per request", SECONDS_BUCKETS),
+    "timely_request_db_queries": ("Database queries per request", QUERIES_BUCKETS),
+    "timely_response_size_bytes": ("Size of non-streaming response bodies", BYTES_BUCKETS),
+}
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """
+        Cumulative (upper bound, count) pairs, ending with +Inf, and the sum
+        """
+        cumulative, total = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative, self.sum
+
+
+class QueryTimer:
+    """
+    Count of the queries of a request and the time they took
+    """
+    __slots__ = ("queries", "duration")
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+
+# TIMER OF THE CURRENT REQUEST, ALSO SEEN BY THE THREADS ITS ASYNC VIEWS QUERY IN
+current_timer = ContextVar("current_timer", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - started
+        timer.queries += 1
+
+
+def install_query_timing(connection, **kwargs):
+    """
+    Time the queries of CONNECTION for the timer of the request running them. The wrapper
+    goes first, as execute_wrapper() blocks remove the last one when they exit.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+# CONNECTIONS ARE PER THREAD, THOSE OF THE THREADS ASYNC VIEWS QUERY IN ARE NEW FOR EACH REQUEST
+connection_created.connect(install_query_timing)
+
+
+class RequestMetrics:
+    """
+    Histograms of request timings, query counts and response sizes of this process, by URL
+    name and method
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (VIEW, METHOD) -> HISTOGRAMS IN THE ORDER OF HISTOGRAMS
+        self.views = {}
+
+    def record(self, view, method, duration, db_duration, queries, size=None):
+        method = method if method in METHODS else "other"
+        with self.lock:
+            histograms = self.views.get((view, method))
+            if histograms is None:
+                histograms = self.views[(view, method)] = [Histogram(buckets) for _, buckets in HISTOGRAMS.values()]
+            histograms[0].observe(duration)
+            histograms[1].observe(db_duration)
+            histograms[2].observe(queries)
+            if size is not None:
+                histograms[3].observe(size)
+
+    def render(self):
+        """
+        The histograms in the Prometheus text exposition format
+        """
+        with self.lock:
+            snapshot = {key: [histogram.samples() for histogram in histograms] for key, histograms in self.views.items()}
+
+        lines = []
+        for index, (name, (description, _)) in enumerate(HISTOGRAMS.items()):
+            lines.append(f"# HELP {name} {description}.")
+            lines.append(f"# TYPE {name} histogram")
+            for (view, method), histograms in sorted(snapshot.items()):
+                buckets, total = histograms[index]
+                labels = f'view="{escape(view)}",method="{escape(method)}"'
+                for bound, count in buckets:
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {total}")
+                lines.append(f"{name}_count{{{labels}}} {buckets[-1][1]}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# METRICS OF THE REQUESTS SERVED BY THIS PROCESS
+request_metrics = RequestMetrics()
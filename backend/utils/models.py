@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class DataVersion(models.Model):
+    """
+    Version token of cached data (reports, category indexes), replaced on every write so
+    entries cached under the previous token by any process are no longer used.
+    Only used when no shared cache is configured (see utils.versions).
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f'{self.key} {self.version}'
@@ -0,0 +1,73 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from utils.models import DataVersion
+
+# CACHE ALIAS HOLDING VERSION TOKENS WHEN CONFIGURED (REDIS), OTHERWISE THEY ARE KEPT IN THE
+# DATABASE. EITHER WAY EVERY PROCESS SEES THE VERSIONS BUMPED BY ANY OTHER.
+VERSION_CACHE = "versions"
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def get_versions(keys):
+    """
+    Current version tokens of KEYS, in order.
+    A version missing (never set or evicted) is started afresh, so entries cached under an
+    earlier version can never be served again.
+    """
+    if VERSION_CACHE in settings.CACHES:
+        return cached_versions(keys)
+    return stored_versions(keys)
+
+
+def cached_versions(keys):
+    cache = caches[VERSION_CACHE]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = new_version()
+            # ADD DOES NOT OVERWRITE A VERSION SET CONCURRENTLY, READ BACK WHICHEVER WON
+            if not cache.add(key, versions[key], timeout=None):
+                versions[key] = cache.get(key, versions[key])
+    return [versions[key] for key in keys]
+
+
+def stored_versions(keys):
+    versions = dict(DataVersion.objects.filter(key__in=keys).values_list("key", "version"))
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # CONFLICTS ARE VERSIONS CREATED CONCURRENTLY, READ BACK WHICHEVER WON
+        DataVersion.objects.bulk_create(
+            [DataVersion(key=key, version=new_version()) for key in missing], ignore_conflicts=True
+        )
+        versions.update(DataVersion.objects.filter(key__in=missing).values_list("key", "version"))
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    """
+    Replace the version token of KEY, retiring everything cached under the previous one
+    """
+    if VERSION_CACHE not in settings.CACHES:
+        # ONE UPSERT, COMMITTED TOGETHER WITH THE WRITE IT RETIRES ENTRIES FOR
+        DataVersion.objects.bulk_create(
+            [DataVersion(key=key, version=new_version())],
+            update_conflicts=True, unique_fields=["key"], update_fields=["version"],
+        )
+        return
+
+    cache = caches[VERSION_CACHE]
+
+    def bump():
+        cache.set(key, new_version(), timeout=None)
+
+    # BUMP NOW SO READERS STOP USING OLD ENTRIES, AND AGAIN ON COMMIT SO ENTRIES COMPUTED
+    # FROM THE NOT YET COMMITTED STATE ARE NOT KEPT
+    bump()
+    transaction.on_commit(bump)
@@ -107,8 +107,11 @@ function CategoryTrendPanel({ date, categoryOptions }: CategoryTrendPanelProps)
       // FORMAT DATE TO YYYY-MM-DD FOR BACKEND QUERY
       const dateIso = date.toISOString().split("T")[0]
 
+      // BUCKETS FOLLOW THE USER'S LOCAL DAYS
+      const tz = Intl.DateTimeFormat().resolvedOptions().timeZone
+
       // SEND REQUEST TO BACKEND
-      const res = await authFetch(`${API_URL}/reports/trends/category/?date=${dateIso}`)
+      const res = await authFetch(`${API_URL}/reports/trends/category/?date=${dateIso}&tz=${tz}`)
 
       // HANDLE ERROR RESPONSE AND LOG WARNING
       if (!res.ok) {
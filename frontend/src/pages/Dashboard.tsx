@@ -88,19 +88,24 @@ function Dashboard() {
       // GET TIMEZONE
       const tz = Intl.DateTimeFormat().resolvedOptions().timeZone
 
-      // SEND REQUEST TO BACKEND
-      const res = await authFetch(
-        `${API_URL}/activities/?date=${isoDate}&tz=${tz}`
-      )
-
-      // RESPONSE STATUS CHECK
-      if (!res.ok) {
-        console.warn("Error fetching activities")
-        return
+      // SEND REQUEST TO BACKEND, FOLLOWING CURSOR PAGES UNTIL THE DAY IS COMPLETE
+      const activitiesData: ActivityRead[] = []
+      let url: string | null = `${API_URL}/activities/?date=${isoDate}&tz=${tz}`
+      while (url) {
+        const res = await authFetch(url)
+
+        // RESPONSE STATUS CHECK
+        if (!res.ok) {
+          console.warn("Error fetching activities")
+          return
+        }
+
+        const page = await res.json()
+        activitiesData.push(...page.results)
+        url = page.next
       }
 
       // SET DATA
-      const activitiesData = await res.json()
       setActivities(activitiesData)
     }
     catch (err) {